@@ -0,0 +1,220 @@
+import os
+import sys
+import time
+import types
+import random
+import argparse
+import tempfile
+import threading
+import logging
+import numpy as np
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Setup logging
+logging.basicConfig(level=logging.WARNING, format='[%(asctime)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+logger = logging.getLogger(__name__)
+
+UI_CHANNELS = ("whatsapp",)  # Channels driven by the (compressed) UI automation
+
+class WaitLog:
+    """Record of the simulated UI waits as (wall time it ended, full length in seconds)"""
+
+    def __init__(self):
+        self.waits = []
+        self.lock = threading.Lock()
+
+    def sleep(self, seconds, scale):
+        time.sleep(seconds * scale)
+        with self.lock:
+            self.waits.append((time.time(), seconds))
+
+    def take(self):
+        """Return the waits recorded so far and start a new log"""
+        with self.lock:
+            waits, self.waits = self.waits, []
+        return waits
+
+ui_waits = WaitLog()
+
+class ScaledTime:
+    """Stand-in for the `time` module whose sleep() is compressed by `scale`.
+
+    Installed into the UI automation modules only, so their fixed waits run
+    faster while everything else (SQLite, file writes, threads, SMS latency)
+    runs at real speed. Every wait is logged in ui_waits so the results can
+    be scaled back afterwards.
+    """
+
+    def __init__(self, scale):
+        self.scale = scale
+
+    def sleep(self, seconds):
+        ui_waits.sleep(seconds, self.scale)
+
+    def __getattr__(self, name):
+        return getattr(time, name)
+
+def install_fake_drivers(scale, page_load=3.0, geocoder_delay=0.4):
+    """Replace pyautogui, webbrowser.open, geocoder and the Windows helpers with simulated drivers"""
+    def delay(seconds):
+        ui_waits.sleep(seconds, scale)
+
+    pyautogui = types.ModuleType("pyautogui")
+    pyautogui.clicks = []
+    pyautogui.click = lambda x=None, y=None, **kwargs: (delay(0.05), pyautogui.clicks.append((x, y)))
+    pyautogui.moveTo = lambda x, y, duration=0, **kwargs: delay(duration)
+    pyautogui.press = lambda key, **kwargs: delay(0.02)
+    pyautogui.hotkey = lambda *keys, **kwargs: delay(0.02)
+    pyautogui.size = lambda: (1920, 1080)
+    pyautogui.screenshot = lambda *args, **kwargs: None
+    sys.modules['pyautogui'] = pyautogui
+
+    geocoder = types.ModuleType("geocoder")
+    def ip(query):
+        delay(geocoder_delay)
+        return types.SimpleNamespace(ok=True, lat=12.9716, lng=77.5946, address="Bengaluru, Karnataka, IN",
+                                     city="Bengaluru", state="Karnataka", country="IN")
+    geocoder.ip = ip
+    sys.modules['geocoder'] = geocoder
+
+    import webbrowser
+    webbrowser.open = lambda url, *args, **kwargs: delay(page_load) or True
+
+    for name in ("win32gui", "win32con", "win32process", "pygetwindow", "pywhatkit", "pyperclip"):
+        module = types.ModuleType(name)
+        module.copy = lambda text: None
+        sys.modules.setdefault(name, module)
+    try:
+        import psutil
+    except ImportError:
+        sys.modules['psutil'] = types.ModuleType("psutil")
+
+class SimulatedWhatsApp:
+    """WhatsApp channel that runs the real desktop automation in-process against the fake drivers"""
+    name = "whatsapp"
+    ui_lock = threading.Lock()
+
+    def can_reach(self, contact):
+        return bool(contact.get('phone'))
+
+    def send(self, contact, message, audio_file=None, share_location=True):
+        from Backend.WhatsAppAutomation import send_whatsapp_alert
+        with self.ui_lock:
+            return send_whatsapp_alert(contact['phone'], message, audio_file, share_location=share_location)
+
+def run_benchmark(runs=20, contacts=3, scale=0.01, sms=True, failure_rate=0.0, timeout=120, workdir=None):
+    """Drive the whole alert path `runs` times and return the per-run summaries"""
+    install_fake_drivers(scale)
+    workdir = workdir or tempfile.mkdtemp(prefix="alert_benchmark_")
+
+    import Backend.WhatsAppAutomation as automation
+    import Backend.AlertOutbox as outbox_module
+    from Backend import AlertOutbox, AlertDispatcher, ScreenReadiness, AlertTrace, EvidenceCatalog
+    from Backend.AudioRingBuffer import AudioRingBuffer, save_preroll
+    from Backend.LocationService import LocationService
+
+    # Only the UI waits are compressed; they are scaled back up in the results
+    automation.time = ScaledTime(scale)
+    ScreenReadiness.time = ScaledTime(scale)
+    ScreenReadiness.get_screen_readiness().template_dir = os.path.join(workdir, "Templates")
+
+    channels = [SimulatedWhatsApp()]
+    if sms:
+        channels.append(AlertDispatcher.LocalChannel("sms", delay=(0.5, 2.0), failure_rate=failure_rate))
+    AlertDispatcher.alert_dispatcher.channels = channels
+    outbox_module.alert_outbox = AlertOutbox.AlertOutbox(os.path.join(workdir, "outbox.db"))
+    EvidenceCatalog.evidence_catalog = EvidenceCatalog.EvidenceCatalog(os.path.join(workdir, "evidence.db"))
+    people = [{'name': f"Contact {index + 1}", 'phone': f"+1555000{index:04d}"} for index in range(contacts)]
+    automation.load_contacts = lambda: people
+
+    location_service = LocationService(state_file=None)
+    location_service.refresh()
+    ring = AudioRingBuffer(10, 44100, 2)
+    ring.write((np.random.default_rng(0).standard_normal((441000, 2)) * 3000).astype(np.int16))
+    trace_path = os.path.join(workdir, "traces.jsonl")
+
+    summaries = []
+    for run in range(runs):
+        trace = AlertTrace.AlertTrace("benchmark", path=trace_path)
+        location = location_service.get_location()
+        trace.mark("location", age=location.get('age'))
+        audio_file = save_preroll(ring, 5, directory=os.path.join(workdir, "Emergency"))
+        trace.mark("recording", file=audio_file)
+        ui_waits.take()  # Only this alert's deliveries count
+        automation.send_emergency_alert(location, audio_file, trace=trace)
+
+        deadline = time.time() + timeout
+        # A job is marked sent just before its trace event is written; wait for the worker to finish it
+        while ((outbox_module.alert_outbox.pending_count() or outbox_module.outbox_worker.in_flight)
+               and time.time() < deadline):
+            time.sleep(0.01)
+        events = AlertTrace.load_traces(trace_path).get(trace.trace_id, [])
+        waits = ui_waits.take()
+        summary = AlertTrace.summarize(events)
+        summary['real'] = AlertTrace.summarize(rescale_events(events, waits, scale))
+        summary['ui_wait_ms'] = sum(seconds for _, seconds in waits) * 1000
+        summaries.append(summary)
+        print(f"run {run + 1}/{runs}: first contact {summary['real']['first_contact_ms']} ms, "
+              f"all contacts {summary['real']['all_contacts_ms']} ms (UI waits at full length)")
+
+    outbox_module.outbox_worker.stop()
+    return summaries, trace_path
+
+def rescale_events(events, waits, scale):
+    """Trace events with the UI waits played back at full length.
+
+    UI sends are serialised, so every wait that ended before a UI channel
+    event delayed it; the compressed part of those waits is added back.
+    Other channels never waited on the UI and keep their measured times.
+    """
+    rescaled = []
+    for event in events:
+        if event.get('channel') in UI_CHANNELS and event.get('elapsed_ms') is not None:
+            waited = sum(seconds for ended, seconds in waits if ended <= event['time'])
+            event = dict(event, elapsed_ms=event['elapsed_ms'] + waited * 1000 * (1 - scale))
+        rescaled.append(event)
+    return rescaled
+
+def report(summaries, scale):
+    """Print p50/p95/p99 of time-to-first-contact and time-to-all-contacts"""
+    from Backend.AlertTrace import percentiles
+
+    def print_row(label, values):
+        stats = percentiles(values)
+        missing = sum(value is None for value in values)
+        line = "  ".join(f"{name} {value:9.1f} ms" if value is not None else f"{name} n/a" for name, value in stats.items())
+        print(f"{label:38s} {line}" + (f"  ({missing} incomplete)" if missing else ""))
+
+    print(f"\n{len(summaries)} alerts, UI waits run at x{scale} and scaled back to full length")
+    for key, label in (('first_contact_ms', "time to first contact"), ('all_contacts_ms', "time to all contacts")):
+        print_row(label, [summary['real'][key] for summary in summaries])
+    print_row("UI waits per alert (full length)", [summary['ui_wait_ms'] for summary in summaries])
+    for key, label in (('first_contact_ms', "time to first contact"), ('all_contacts_ms', "time to all contacts")):
+        print_row(f"{label} (as run, compressed)", [summary[key] for summary in summaries])
+
+    for stage in ('location', 'recording', 'queued', 'send_start'):
+        stats = percentiles([summary['stages'].get(stage) for summary in summaries])
+        if stats['p50'] is not None:
+            print(f"  {stage:20s} " + "  ".join(f"{name} {value:9.1f} ms" for name, value in stats.items()))
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end alert latency benchmark with simulated drivers")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--contacts", type=int, default=3)
+    parser.add_argument("--time-scale", type=float, default=0.01,
+                        help="Factor applied to simulated UI and page-load waits while running; "
+                             "reported latencies are scaled back to full length")
+    parser.add_argument("--no-sms", action="store_true", help="Only use the WhatsApp channel")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Probability that an SMS send fails")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    summaries, trace_path = run_benchmark(args.runs, args.contacts, args.time_scale, not args.no_sms, args.failure_rate)
+    report(summaries, args.time_scale)
+    print(f"\nTraces written to {trace_path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+import os
+import json
+import time
+import random
+import asyncio
+import threading
+import logging
+from dotenv import dotenv_values
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+env_vars = dotenv_values(".env")
+
+CONTACTS_FILE = os.path.join("Data", "EmergencyContacts.json")
+DEFAULT_CONTACTS = [
+    {'name': "Contact 1", 'phone': "+917760401421"},
+    {'name': "Contact 2", 'phone': "+916205245097"}
+]
+ATTACHMENT_CAPTION = "🎙️ JARVIS EMERGENCY - audio recording for the alert above"
+
+def load_contacts(path=CONTACTS_FILE):
+    """Load emergency contacts ({name, phone, telegram_chat_id}) or fall back to the defaults"""
+    try:
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as file:
+                return json.load(file)
+    except Exception as e:
+        logger.error(f"Error loading emergency contacts: {e}")
+    return DEFAULT_CONTACTS
+
+def configured(value):
+    """False for empty settings and the placeholders copied from .env.example"""
+    if not value:
+        return False
+    value = value.strip()
+    return not (value.lower().startswith("your_") or value.lower().endswith("_here") or value == "+10000000000")
+
+def contact_key(contact):
+    """Stable identifier for a contact"""
+    return contact.get('phone') or contact.get('telegram_chat_id') or contact.get('name')
+
+class AlertChannel:
+    """Base class for a way of reaching a contact"""
+    name = "channel"
+
+    def can_reach(self, contact):
+        """True if this channel has an address for the contact"""
+        return True
+
+    def send(self, contact, message, audio_file=None, share_location=True):
+        """Deliver the alert; return True on success.
+
+        `share_location` False asks channels that can share a live location
+        (the desktop WhatsApp path) to skip it, e.g. for follow-up messages.
+        """
+        raise NotImplementedError
+
+class WhatsAppChannel(AlertChannel):
+    """WhatsApp through the persistent Selenium session (WHATSAPP_DRIVER=selenium)
+    or the WhatsApp Web + pyautogui path.
+
+    There is only one screen and keyboard (or one browser tab), so sends on
+    this channel are serialised while the other channels keep running in
+    parallel.
+    """
+    name = "whatsapp"
+    ui_lock = threading.Lock()
+
+    def can_reach(self, contact):
+        return bool(contact.get('phone'))
+
+    def send(self, contact, message, audio_file=None, share_location=True):
+        # Imported here so offline channels work without the desktop automation stack
+        from Backend.WhatsAppSession import AttachmentError, get_whatsapp_session, whatsapp_driver_mode
+
+        if whatsapp_driver_mode() == "selenium":
+            session = get_whatsapp_session()
+            try:
+                if session.send_alert(contact['phone'], message, audio_file):
+                    return True
+            except AttachmentError as e:
+                # The text is already out; only resend the file, with a short caption
+                logger.error(str(e))
+                message = ATTACHMENT_CAPTION
+                share_location = False
+            except Exception as e:
+                logger.error(f"WhatsApp Web session failed for {contact['phone']}: {e}")
+            logger.warning("Falling back to desktop WhatsApp automation")
+
+        # The desktop automation runs in its own process so capture and the GUI keep going
+        from Backend.AlertWorker import get_gui_worker
+        with self.ui_lock:
+            return get_gui_worker().send(contact['phone'], message, audio_file, share_location=share_location)
+
+class SmsChannel(AlertChannel):
+    """SMS through Twilio; the audio file cannot be attached"""
+    name = "sms"
+
+    def __init__(self, account_sid=None, auth_token=None, from_number=None):
+        self.account_sid = account_sid or env_vars.get("TWILIO_ACCOUNT_SID")
+        self.auth_token = auth_token or env_vars.get("TWILIO_AUTH_TOKEN")
+        self.from_number = from_number or env_vars.get("TWILIO_FROM_NUMBER")
+        self.client = None
+
+    def available(self):
+        return configured(self.account_sid) and configured(self.auth_token) and configured(self.from_number)
+
+    def can_reach(self, contact):
+        return bool(contact.get('phone'))
+
+    def send(self, contact, message, audio_file=None, share_location=True):
+        from twilio.rest import Client
+
+        if self.client is None:
+            self.client = Client(self.account_sid, self.auth_token)
+        result = self.client.messages.create(body=message[:1600], from_=self.from_number, to=contact['phone'])
+        logger.info(f"SMS queued for {contact['phone']} ({result.sid})")
+        return True
+
+class TelegramChannel(AlertChannel):
+    """Telegram bot message, with the audio file attached as a document"""
+    name = "telegram"
+
+    def __init__(self, token=None):
+        self.token = token or env_vars.get("TELEGRAM_BOT_TOKEN")
+
+    def available(self):
+        return configured(self.token)
+
+    def can_reach(self, contact):
+        return bool(contact.get('telegram_chat_id'))
+
+    def send(self, contact, message, audio_file=None, share_location=True):
+        from telegram import Bot
+
+        async def deliver():
+            bot = Bot(self.token)
+            async with bot:
+                await bot.send_message(chat_id=contact['telegram_chat_id'], text=message)
+                if audio_file and os.path.exists(audio_file):
+                    with open(audio_file, 'rb') as file:
+                        await bot.send_document(chat_id=contact['telegram_chat_id'], document=file)
+
+        # Each dispatcher thread gets its own event loop
+        asyncio.run(deliver())
+        return True
+
+class LocalChannel(AlertChannel):
+    """Offline stand-in that records deliveries instead of sending them.
+
+    `delay` (seconds, or a (min, max) range) simulates network latency,
+    `failure_rate` randomly fails sends, and contacts listed in `unreachable`
+    always fail. Delivered alerts are kept in `sent`.
+    """
+
+    def __init__(self, name="local", delay=0.0, failure_rate=0.0, unreachable=()):
+        self.name = name
+        self.delay = delay
+        self.failure_rate = failure_rate
+        self.unreachable = set(unreachable)
+        self.sent = []
+        self.lock = threading.Lock()
+
+    def send(self, contact, message, audio_file=None, share_location=True):
+        delay = random.uniform(*self.delay) if isinstance(self.delay, tuple) else self.delay
+        time.sleep(delay)
+        if contact_key(contact) in self.unreachable or random.random() < self.failure_rate:
+            raise ConnectionError(f"{self.name}: could not reach {contact_key(contact)}")
+        with self.lock:
+            self.sent.append({'contact': contact_key(contact), 'message': message, 'audio_file': audio_file,
+                              'time': time.time()})
+        return True
+
+def build_default_channels():
+    """WhatsApp always, plus SMS and Telegram when their credentials are configured"""
+    channels = [WhatsAppChannel()]
+    for channel in (SmsChannel(), TelegramChannel()):
+        if channel.available():
+            channels.append(channel)
+    return channels
+
+class AlertDispatcher:
+    """Owns the alert channels and sends over one of them at a time.
+
+    The outbox worker fans each alert out as one job per (contact, channel)
+    and calls send_one for each; AlertOutbox.status reports which channel
+    reached every contact first.
+    """
+
+    def __init__(self, channels=None):
+        self.channels = channels
+
+    def get_channels(self):
+        if self.channels is None:
+            self.channels = build_default_channels()
+        return self.channels
+
+    def send_one(self, channel, contact, message, audio_file=None, share_location=True):
+        """Send over one channel, turning exceptions into a failed result"""
+        try:
+            return bool(channel.send(contact, message, audio_file, share_location)), None
+        except Exception as e:
+            logger.error(f"{channel.name} alert to {contact_key(contact)} failed: {e}")
+            return False, str(e)
+
+# Create a global instance
+alert_dispatcher = AlertDispatcher()
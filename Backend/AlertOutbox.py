@@ -0,0 +1,323 @@
+import os
+import json
+import time
+import uuid
+import random
+import hashlib
+import sqlite3
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from Backend.AlertDispatcher import alert_dispatcher, contact_key
+from Backend.AlertTrace import trace_event
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+logger = logging.getLogger(__name__)
+
+OUTBOX_PATH = os.path.join("Data", "alert_outbox.db")
+MAX_ATTEMPTS = 8
+BACKOFF_BASE = 2.0  # Seconds before the first retry, doubled on every failure
+BACKOFF_MAX = 300.0
+LEASE_SECONDS = 600  # A job stuck in "sending" longer than this is retried
+POLL_INTERVAL = 1.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id TEXT PRIMARY KEY,
+    created REAL NOT NULL,
+    message TEXT NOT NULL,
+    audio_file TEXT,
+    share_location INTEGER NOT NULL DEFAULT 1
+);
+CREATE TABLE IF NOT EXISTS deliveries (
+    id TEXT PRIMARY KEY,
+    alert_id TEXT NOT NULL REFERENCES alerts(id),
+    contact TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt REAL NOT NULL,
+    last_error TEXT,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS deliveries_due ON deliveries (status, next_attempt);
+"""
+
+def delivery_key(alert_id, contact, channel):
+    """Idempotency key of one (alert, contact, channel) delivery"""
+    raw = f"{alert_id}|{contact_key(contact)}|{channel}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]
+
+def backoff_delay(attempts):
+    """Exponential backoff with jitter for the given number of failed attempts"""
+    delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** max(0, attempts - 1))
+    return delay * random.uniform(0.8, 1.2)
+
+class AlertOutbox:
+    """Durable store of alert delivery jobs in SQLite (WAL mode).
+
+    Every alert is written once with one row per (contact, channel) before
+    anything is sent, so a crash or a failed browser session cannot lose it.
+    Each row's primary key is an idempotency key derived from the alert id,
+    contact and channel: enqueueing the same alert twice is a no-op and a
+    delivery that is already marked sent is never claimed again. Delivery is
+    at-least-once - a job that was in flight when the process died is sent
+    again once its lease runs out.
+    """
+
+    def __init__(self, path=OUTBOX_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=FULL")  # An accepted alert must survive a power cut
+        self.conn.executescript(SCHEMA)
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(alerts)")]
+        if "share_location" not in columns:  # Outboxes created before the column existed
+            self.conn.execute("ALTER TABLE alerts ADD COLUMN share_location INTEGER NOT NULL DEFAULT 1")
+
+    def enqueue(self, contacts, message, audio_file=None, channels=None, alert_id=None, share_location=True):
+        """Record an alert and its delivery jobs; return the alert id.
+
+        `share_location` False marks a follow-up (location update, recording)
+        that should not share the live location again.
+        """
+        alert_id = alert_id or uuid.uuid4().hex
+        now = time.time()
+        rows = []
+        for contact in contacts:
+            for channel in channels:
+                if channel.can_reach(contact):
+                    rows.append((delivery_key(alert_id, contact, channel.name), alert_id,
+                                 json.dumps(contact), channel.name, now, now))
+
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute("INSERT OR IGNORE INTO alerts (id, created, message, audio_file, share_location) "
+                                  "VALUES (?, ?, ?, ?, ?)", (alert_id, now, message, audio_file, int(share_location)))
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO deliveries (id, alert_id, contact, channel, next_attempt, updated) "
+                    "VALUES (?, ?, ?, ?, ?, ?)", rows)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        logger.info(f"Alert {alert_id} queued with {len(rows)} deliveries")
+        return alert_id
+
+    def claim_due(self, limit=8):
+        """Lease the jobs that are due and return them"""
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self.conn.execute(
+                    "SELECT d.id, d.alert_id, d.contact, d.channel, d.attempts, a.message, a.audio_file, a.share_location "
+                    "FROM deliveries d JOIN alerts a ON a.id = d.alert_id "
+                    "WHERE d.status IN ('pending', 'sending') AND d.next_attempt <= ? "
+                    "ORDER BY a.created, d.next_attempt LIMIT ?", (now, limit)).fetchall()
+                self.conn.executemany(
+                    "UPDATE deliveries SET status = 'sending', attempts = attempts + 1, next_attempt = ?, updated = ? "
+                    "WHERE id = ?", [(now + LEASE_SECONDS, now, row[0]) for row in rows])
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return [{
+            'id': row[0], 'alert_id': row[1], 'contact': json.loads(row[2]), 'channel': row[3],
+            'attempts': row[4] + 1, 'message': row[5], 'audio_file': row[6], 'share_location': bool(row[7])
+        } for row in rows]
+
+    def release_stale(self):
+        """Make jobs left in "sending" by a process that died due straight away; return how many"""
+        now = time.time()
+        with self.lock:
+            cursor = self.conn.execute("UPDATE deliveries SET status = 'pending', next_attempt = ?, updated = ? "
+                                       "WHERE status = 'sending'", (now, now))
+        return cursor.rowcount
+
+    def mark_sent(self, job_id):
+        with self.lock:
+            self.conn.execute("UPDATE deliveries SET status = 'sent', last_error = NULL, updated = ? WHERE id = ?",
+                              (time.time(), job_id))
+
+    def mark_failed(self, job, error):
+        """Schedule a retry, or give up once the job has used all its attempts"""
+        now = time.time()
+        if job['attempts'] >= MAX_ATTEMPTS:
+            status, next_attempt = 'failed', now
+        else:
+            status, next_attempt = 'pending', now + backoff_delay(job['attempts'])
+        with self.lock:
+            self.conn.execute("UPDATE deliveries SET status = ?, next_attempt = ?, last_error = ?, updated = ? "
+                              "WHERE id = ?", (status, next_attempt, str(error), now, job['id']))
+        return status
+
+    def next_due(self):
+        """Time the next pending job becomes due, or None"""
+        with self.lock:
+            row = self.conn.execute("SELECT MIN(next_attempt) FROM deliveries "
+                                    "WHERE status IN ('pending', 'sending')").fetchone()
+        return row[0]
+
+    def status(self, alert_id):
+        """Per-contact delivery state of an alert.
+
+        For each contact the report names the first channel that delivered
+        and how many seconds after the alert was queued, plus the state of
+        every channel.
+        """
+        with self.lock:
+            rows = self.conn.execute("SELECT d.contact, d.channel, d.status, d.attempts, d.last_error, "
+                                     "d.updated - a.created FROM deliveries d JOIN alerts a ON a.id = d.alert_id "
+                                     "WHERE d.alert_id = ? ORDER BY d.updated", (alert_id,)).fetchall()
+        report = {}
+        for contact, channel, status, attempts, last_error, elapsed in rows:
+            result = report.setdefault(contact_key(json.loads(contact)),
+                                       {'delivered': False, 'channel': None, 'elapsed': None, 'channels': {}})
+            result['channels'][channel] = {'status': status, 'attempts': attempts, 'last_error': last_error}
+            if status == 'sent' and not result['delivered']:  # Rows come in update order, so this is the first
+                result.update(delivered=True, channel=channel, elapsed=elapsed)
+        return report
+
+    def pending_count(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM deliveries "
+                                     "WHERE status IN ('pending', 'sending')").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+class OutboxWorker:
+    """Background thread that delivers outbox jobs through the alert dispatcher.
+
+    Jobs are sent concurrently on the dispatcher's channels. A failure is
+    retried with exponential backoff, and whatever was still pending when
+    the process last stopped is picked up as soon as the worker starts.
+    """
+
+    def __init__(self, outbox=None, dispatcher=alert_dispatcher, max_workers=8):
+        self.outbox = outbox
+        self.dispatcher = dispatcher
+        self.max_workers = max_workers
+        self.wakeup = threading.Event()
+        self.running = False
+        self.thread = None
+        self.executor = None
+        self.lock = threading.Lock()
+        self.in_flight = 0  # Claimed jobs not yet finished; never more than max_workers
+
+    def start(self):
+        """Start delivering, resuming anything left over from a previous run"""
+        with self.lock:
+            if self.running:
+                return
+            self.outbox = self.outbox or get_alert_outbox()
+            # Nothing else sends from this outbox, so "sending" rows belong to a previous run
+            released = self.outbox.release_stale()
+            if released:
+                logger.info(f"Retrying {released} deliveries interrupted by the last shutdown")
+            self.in_flight = 0
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers)
+            self.running = True
+            self.thread = threading.Thread(target=self._run)
+            self.thread.daemon = True
+            self.thread.start()
+        pending = self.outbox.pending_count()
+        if pending:
+            logger.info(f"Resuming {pending} pending alert deliveries")
+
+    def notify(self):
+        """Wake the worker after new jobs were queued"""
+        self.wakeup.set()
+
+    def _run(self):
+        while self.running:
+            try:
+                # Claim only what can start now; a job queued behind busy workers could outlive its lease
+                with self.lock:
+                    free = self.max_workers - self.in_flight
+                for job in self.outbox.claim_due(free) if free > 0 else []:
+                    with self.lock:
+                        self.in_flight += 1
+                    self.executor.submit(self._deliver, job)
+            except Exception as e:
+                logger.error(f"Error reading alert outbox: {e}")
+
+            next_due = self.outbox.next_due()
+            timeout = POLL_INTERVAL if next_due is None else min(POLL_INTERVAL, max(0.0, next_due - time.time()))
+            self.wakeup.wait(timeout)
+            self.wakeup.clear()
+
+    def _deliver(self, job):
+        try:
+            trace_event(job['alert_id'], 'send_start', channel=job['channel'], contact=contact_key(job['contact']),
+                        attempt=job['attempts'])
+            channel = next((c for c in self.dispatcher.get_channels() if c.name == job['channel']), None)
+            if channel is None:
+                ok, error = False, f"channel {job['channel']} is not configured"
+            else:
+                ok, error = self.dispatcher.send_one(channel, job['contact'], job['message'], job['audio_file'],
+                                                     job['share_location'])
+
+            if ok:
+                self.outbox.mark_sent(job['id'])
+                trace_event(job['alert_id'], 'delivered', channel=job['channel'], contact=contact_key(job['contact']),
+                            attempt=job['attempts'])
+                logger.info(f"Alert {job['alert_id']} delivered to {contact_key(job['contact'])} "
+                            f"via {job['channel']} (attempt {job['attempts']})")
+            else:
+                status = self.outbox.mark_failed(job, error)
+                trace_event(job['alert_id'], 'send_failed', channel=job['channel'], contact=contact_key(job['contact']),
+                            attempt=job['attempts'], error=error, status=status)
+                if status == 'failed':
+                    logger.error(f"Giving up on {job['channel']} alert to {contact_key(job['contact'])} "
+                                 f"after {job['attempts']} attempts")
+        except Exception as e:
+            logger.error(f"Error delivering alert job {job['id']}: {e}")
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+            self.wakeup.set()
+
+    def stop(self):
+        """Stop claiming new jobs; in-flight ones are retried next run if they do not finish"""
+        self.running = False
+        self.wakeup.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+        if self.executor:
+            self.executor.shutdown(wait=False)
+
+alert_outbox = None
+outbox_worker = OutboxWorker()
+
+def get_alert_outbox():
+    """Return the shared outbox, opening it on first use"""
+    global alert_outbox
+    if alert_outbox is None:
+        alert_outbox = AlertOutbox()
+    return alert_outbox
+
+def queue_alert(contacts, message, audio_file=None, trace=None, share_location=True):
+    """Durably queue an alert for delivery and return its id without waiting for it to be sent"""
+    alert_id = get_alert_outbox().enqueue(contacts, message, audio_file, alert_dispatcher.get_channels(),
+                                          share_location=share_location)
+    if trace:
+        trace.link(alert_id)
+        trace.mark('queued', alert=alert_id, contacts=[contact_key(contact) for contact in contacts],
+                   audio=bool(audio_file))
+    outbox_worker.start()
+    outbox_worker.notify()
+    return alert_id
+
+def start_outbox_worker():
+    """Resume pending deliveries; call once at startup"""
+    try:
+        outbox_worker.start()
+    except Exception as e:
+        logger.error(f"Error starting alert outbox worker: {e}")
@@ -0,0 +1,121 @@
+import os
+import json
+import time
+import uuid
+import threading
+import logging
+from collections import OrderedDict
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+logger = logging.getLogger(__name__)
+
+TRACE_LOG = os.path.join("Data", "alert_traces.jsonl")
+MAX_LIVE_TRACES = 256  # Alert ids remembered for routing delivery events to their trace
+
+_write_lock = threading.Lock()
+_traces = OrderedDict()  # alert id -> AlertTrace
+
+def write_event(event, path=TRACE_LOG):
+    """Append one event to the JSONL trace log"""
+    try:
+        with _write_lock:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, 'a', encoding='utf-8') as file:
+                file.write(json.dumps(event, default=str) + "\n")
+    except Exception as e:
+        logger.error(f"Error writing alert trace: {e}")
+
+class AlertTrace:
+    """Timeline of one emergency, from detection to each contact's delivery.
+
+    Every mark() is written to the trace log straight away as one JSON line
+    with the wall-clock time and the milliseconds since detection, so a
+    trace is useful even if the process dies halfway. Alerts queued for the
+    trace are linked to it, and the outbox worker reports each send attempt
+    and delivery through trace_event().
+    """
+
+    def __init__(self, source="detector", path=None):
+        self.trace_id = uuid.uuid4().hex
+        self.source = source
+        self.path = path or TRACE_LOG
+        self.started = time.time()
+        self.mark("detected", source=source)
+
+    def mark(self, stage, **fields):
+        """Record that a stage was reached"""
+        now = time.time()
+        event = {'trace': self.trace_id, 'stage': stage, 'time': round(now, 6),
+                 'elapsed_ms': round((now - self.started) * 1000, 3)}
+        event.update(fields)
+        write_event(event, self.path)
+        return event
+
+    def link(self, alert_id):
+        """Route delivery events of an outbox alert to this trace"""
+        _traces[alert_id] = self
+        while len(_traces) > MAX_LIVE_TRACES:
+            _traces.popitem(last=False)
+
+def trace_event(alert_id, stage, **fields):
+    """Record a delivery event for an alert, on its trace if it has one"""
+    trace = _traces.get(alert_id)
+    if trace:
+        return trace.mark(stage, alert=alert_id, **fields)
+    # Alerts resumed after a restart have no live trace; log them on their own
+    write_event({'trace': alert_id, 'stage': stage, 'time': round(time.time(), 6), 'alert': alert_id, **fields})
+
+def load_traces(path=TRACE_LOG):
+    """Read the trace log into {trace id: [events]}"""
+    traces = {}
+    if not os.path.exists(path):
+        return traces
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue
+            traces.setdefault(event['trace'], []).append(event)
+    return traces
+
+def summarize(events):
+    """Latency summary of one trace.
+
+    Returns the milliseconds from detection to each stage, to the first
+    contact reached and to the moment every queued contact had been
+    reached (None if some never were).
+    """
+    summary = {'stages': {}, 'first_contact_ms': None, 'all_contacts_ms': None}
+    contacts = set()
+    reached = {}
+    for event in events:
+        elapsed = event.get('elapsed_ms')
+        if elapsed is None:
+            continue
+        summary['stages'].setdefault(event['stage'], elapsed)
+        if event['stage'] == 'queued':
+            contacts.update(event.get('contacts', []))
+        elif event['stage'] == 'delivered':
+            contact = event.get('contact')
+            reached[contact] = min(reached.get(contact, elapsed), elapsed)
+
+    if reached:
+        summary['first_contact_ms'] = min(reached.values())
+    if contacts and contacts.issubset(reached):
+        summary['all_contacts_ms'] = max(reached[contact] for contact in contacts)
+    summary['contacts'] = len(contacts)
+    summary['reached'] = len(reached)
+    return summary
+
+def percentiles(values, points=(50, 95, 99)):
+    """Nearest-rank percentiles of a list of numbers"""
+    values = sorted(value for value in values if value is not None)
+    if not values:
+        return {f"p{point}": None for point in points}
+    result = {}
+    for point in points:
+        rank = max(1, int(-(-point * len(values) // 100)))
+        result[f"p{point}"] = values[rank - 1]
+    return result
@@ -0,0 +1,147 @@
+import os
+import sys
+import json
+import uuid
+import queue
+import threading
+import subprocess
+import logging
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+logger = logging.getLogger(__name__)
+
+JOB_TIMEOUT = 300  # Seconds before a stuck automation job is abandoned and the worker restarted
+
+class GuiAutomationWorker:
+    """Runs the pyautogui WhatsApp automation in a separate process.
+
+    Jobs go to the worker as JSON lines on its stdin and it answers on
+    stdout with 'progress' events for each completed step and one 'result'
+    per job. The caller's thread only waits on a queue, so audio capture,
+    detection and the Qt GUI keep running while the browser is driven. A
+    worker that dies or hangs is restarted for the next job.
+    """
+
+    def __init__(self, job_timeout=JOB_TIMEOUT):
+        self.job_timeout = job_timeout
+        self.process = None
+        self.reader_thread = None
+        self.lock = threading.Lock()
+        self.jobs = {}
+
+    def start(self):
+        """Launch the worker process if it is not running"""
+        with self.lock:
+            if self.is_alive():
+                return
+            self.process = subprocess.Popen(
+                [sys.executable, "-m", "Backend.AlertWorker"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                text=True,
+                encoding='utf-8'
+            )
+            self.reader_thread = threading.Thread(target=self._read_events, args=(self.process,))
+            self.reader_thread.daemon = True
+            self.reader_thread.start()
+            logger.info(f"GUI automation worker started (pid {self.process.pid})")
+
+    def _read_events(self, process):
+        """Route events from the worker to the job that is waiting for them"""
+        for line in process.stdout:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                logger.debug(f"Worker output: {line.strip()}")
+                continue
+            job = self.jobs.get(event.get('job'))
+            if job:
+                job[1].put(event)
+
+        # The worker exited; fail whatever was still waiting on it
+        for owner, events in list(self.jobs.values()):
+            if owner is process:
+                events.put({'type': 'result', 'ok': False, 'error': "GUI automation worker exited"})
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def send(self, number, message, audio_file=None, on_progress=None, share_location=True):
+        """Deliver one WhatsApp alert through the worker; blocks only the calling thread"""
+        self.start()
+        job_id = uuid.uuid4().hex
+        events = queue.Queue()
+        try:
+            request = {'job': job_id, 'number': number, 'message': message, 'audio_file': audio_file,
+                       'share_location': share_location}
+            with self.lock:
+                self.jobs[job_id] = (self.process, events)
+                self.process.stdin.write(json.dumps(request) + "\n")
+                self.process.stdin.flush()
+
+            while True:
+                try:
+                    event = events.get(timeout=self.job_timeout)
+                except queue.Empty:
+                    logger.error(f"WhatsApp alert to {number} timed out, restarting the GUI worker")
+                    self.stop()
+                    return False
+                if event['type'] == 'progress':
+                    logger.info(f"WhatsApp alert to {number}: {event['step']} done")
+                    if on_progress:
+                        on_progress(event['step'])
+                elif event['type'] == 'result':
+                    if event.get('error'):
+                        logger.error(f"WhatsApp alert to {number} failed: {event['error']}")
+                    return bool(event['ok'])
+        finally:
+            self.jobs.pop(job_id, None)
+
+    def stop(self):
+        """Terminate the worker process"""
+        with self.lock:
+            if self.process:
+                try:
+                    self.process.stdin.close()
+                    self.process.wait(timeout=5)
+                except Exception:
+                    self.process.kill()
+                self.process = None
+
+# Create a global instance
+gui_worker = GuiAutomationWorker()
+
+def get_gui_worker():
+    """Return the shared GUI automation worker"""
+    return gui_worker
+
+def emit(event):
+    """Send one event to the parent process"""
+    sys.stdout.write(json.dumps(event) + "\n")
+    sys.stdout.flush()
+
+def run_worker():
+    """Worker process main loop: one job per stdin line, handled in order"""
+    from Backend.WhatsAppAutomation import send_whatsapp_alert
+
+    for line in sys.stdin:
+        try:
+            job = json.loads(line)
+        except ValueError:
+            continue
+        try:
+            ok = send_whatsapp_alert(job['number'], job['message'], job.get('audio_file'),
+                                     progress=lambda step: emit({'type': 'progress', 'job': job['job'], 'step': step}),
+                                     share_location=job.get('share_location', True))
+            emit({'type': 'result', 'job': job['job'], 'ok': bool(ok)})
+        except Exception as e:
+            emit({'type': 'result', 'job': job['job'], 'ok': False, 'error': str(e)})
+
+if __name__ == "__main__":
+    # stdout carries events only; logging already goes to stderr
+    run_worker()
@@ -0,0 +1,103 @@
+import queue
+import time
+import logging
+import numpy as np
+import pyaudio
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+logger = logging.getLogger(__name__)
+
+class AudioCapture:
+    """Microphone capture driven by the PortAudio stream callback.
+
+    The callback only hands each block to a bounded queue and returns, so the
+    device keeps being serviced while the consumer thread is busy. Blocks that
+    do not fit in the queue are dropped and counted instead of stalling the
+    stream, and input overflows reported by PortAudio are counted as well.
+    """
+
+    def __init__(self, sample_rate=44100, channels=2, block_size=1024, max_blocks=64, blocking=False):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.block_size = block_size
+        self.blocking = blocking
+        self.queue = queue.Queue(maxsize=max_blocks)
+        self.audio = None
+        self.stream = None
+        self.overflows = 0
+        self.dropped_blocks = 0
+        self.dropped_frames = 0
+        self.captured_frames = 0
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        """Called by PortAudio on its own thread for every captured block"""
+        if status & pyaudio.paInputOverflow:
+            self.overflows += 1
+        try:
+            self.queue.put_nowait(in_data)
+            self.captured_frames += frame_count
+        except queue.Full:
+            self.dropped_blocks += 1
+            self.dropped_frames += frame_count
+        return (None, pyaudio.paContinue)
+
+    def start(self):
+        """Open the input stream"""
+        self.audio = pyaudio.PyAudio()
+        self.stream = self.audio.open(
+            format=pyaudio.paInt16,
+            channels=self.channels,
+            rate=self.sample_rate,
+            input=True,
+            frames_per_buffer=self.block_size,
+            stream_callback=None if self.blocking else self._callback
+        )
+        if not self.blocking:
+            self.stream.start_stream()
+        logger.info(f"Audio capture started ({'blocking' if self.blocking else 'callback'} mode)")
+
+    def read(self, timeout=0.5, max_blocks=1):
+        """Return queued audio as interleaved int16 samples, or None on timeout.
+
+        With max_blocks > 1 any backlog (up to that many blocks) is returned
+        in one array so the caller can process it as a single batch.
+        """
+        if self.blocking:
+            data = self.stream.read(self.block_size, exception_on_overflow=False)
+            self.captured_frames += self.block_size
+            return np.frombuffer(data, dtype=np.int16)
+        try:
+            blocks = [self.queue.get(timeout=timeout)]
+        except queue.Empty:
+            return None
+        while len(blocks) < max_blocks:
+            try:
+                blocks.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return np.frombuffer(b''.join(blocks) if len(blocks) > 1 else blocks[0], dtype=np.int16)
+
+    def stats(self):
+        """Return capture counters"""
+        return {
+            'captured_frames': self.captured_frames,
+            'dropped_frames': self.dropped_frames,
+            'dropped_blocks': self.dropped_blocks,
+            'overflows': self.overflows,
+            'queued_blocks': self.queue.qsize()
+        }
+
+    def stop(self):
+        """Close the input stream"""
+        try:
+            if self.stream:
+                self.stream.stop_stream()
+                self.stream.close()
+            if self.audio:
+                self.audio.terminate()
+        except Exception as e:
+            logger.error(f"Error stopping audio capture: {e}")
+        finally:
+            self.stream = None
+            self.audio = None
@@ -0,0 +1,86 @@
+import logging
+import numpy as np
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+logger = logging.getLogger(__name__)
+
+FREQUENCY_THRESHOLD = 1000  # Hz, start of the "high frequency" band
+VOLUME_THRESHOLD = 0.01  # Mean absolute amplitude needed before looking at the spectrum
+HIGH_FREQ_THRESHOLD = 0.005  # Mean high-band magnitude that counts as voice activity
+
+# Frequency bands (Hz) whose share of the frame energy is reported
+BANDS = {
+    'low': (0, 500),
+    'voice': (500, 2000),
+    'high': (2000, 8000)
+}
+
+class FeatureEngine:
+    """Frame-batched spectral features for the distress detectors.
+
+    Everything that only depends on the frame size and sample rate (window,
+    bin frequencies, band masks) is computed once here. Incoming audio is
+    de-interleaved to mono, cut into fixed-size frames (a partial frame is
+    carried over to the next call) and all frames of a batch go through a
+    single real-input FFT.
+    """
+
+    def __init__(self, sample_rate=44100, frame_size=1024, channels=2, high_freq=FREQUENCY_THRESHOLD):
+        self.sample_rate = sample_rate
+        self.frame_size = frame_size
+        self.channels = channels
+        self.window = np.hanning(frame_size).astype(np.float32)
+        self.freqs = np.fft.rfftfreq(frame_size, 1.0 / sample_rate)
+        self.high_mask = self.freqs > high_freq
+        self.band_masks = {name: (self.freqs >= lo) & (self.freqs < hi) for name, (lo, hi) in BANDS.items()}
+        self.carry = np.zeros(0, dtype=np.float32)
+
+    def to_mono(self, block):
+        """Convert an interleaved block (int16 or float) to mono float32 in [-1, 1]"""
+        block = np.asarray(block)
+        scale = 1.0 / 32768.0 if block.dtype == np.int16 else 1.0
+        if self.channels > 1:
+            block = block.reshape(-1, self.channels).mean(axis=1, dtype=np.float32)
+        else:
+            block = block.reshape(-1)
+        return block.astype(np.float32, copy=False) * np.float32(scale)
+
+    def frame(self, block):
+        """Cut a block into an (n_frames, frame_size) array, carrying the remainder"""
+        mono = self.to_mono(block)
+        if len(self.carry):
+            mono = np.concatenate((self.carry, mono))
+        count = len(mono) // self.frame_size
+        self.carry = mono[count * self.frame_size:].copy()
+        return mono[:count * self.frame_size].reshape(count, self.frame_size)
+
+    def analyze(self, frames):
+        """Compute per-frame features for a batch of mono frames"""
+        frames = np.atleast_2d(frames)
+        magnitudes = np.abs(np.fft.rfft(frames * self.window, axis=1))
+        power = magnitudes ** 2
+        total_power = power.sum(axis=1) + 1e-12
+        features = {
+            'volume': np.abs(frames).mean(axis=1),
+            'rms': np.sqrt((frames ** 2).mean(axis=1)),
+            'zcr': (np.signbit(frames[:, 1:]) != np.signbit(frames[:, :-1])).mean(axis=1),
+            'centroid': power @ self.freqs / total_power,
+            'high_freq_energy': magnitudes[:, self.high_mask].mean(axis=1),
+            'magnitudes': magnitudes
+        }
+        for name, mask in self.band_masks.items():
+            features[f'{name}_ratio'] = power[:, mask].sum(axis=1) / total_power
+        return features
+
+    def process(self, block):
+        """Frame and analyze a block of captured audio in one go"""
+        return self.analyze(self.frame(block))
+
+    def reset(self):
+        """Drop any partial frame carried over from the previous block"""
+        self.carry = np.zeros(0, dtype=np.float32)
+
+def voice_activity(features):
+    """Return a boolean per frame for the volume plus high-frequency test"""
+    return (features['volume'] > VOLUME_THRESHOLD) & (features['high_freq_energy'] > HIGH_FREQ_THRESHOLD)
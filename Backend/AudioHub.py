@@ -0,0 +1,230 @@
+import threading
+import time
+import logging
+import numpy as np
+import speech_recognition as sr
+from Backend.AudioCapture import AudioCapture
+from Backend.AudioRingBuffer import AudioRingBuffer
+from Backend.Resampler import DetectionStream, DETECTION_RATE
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+logger = logging.getLogger(__name__)
+
+BUFFER_SECONDS = 10  # Audio kept in each shared stream
+
+class Subscription:
+    """One reader of a hub stream with its own cursor and backpressure policy.
+
+    Policies:
+      "skip"   - read everything; if the reader falls more than the buffer
+                 behind, the overwritten audio is skipped and counted.
+      "latest" - stay real-time; whenever the backlog exceeds
+                 `max_backlog` seconds the cursor jumps forward and the
+                 skipped audio is counted.
+    """
+
+    def __init__(self, hub, name, stream, policy="skip", max_backlog=None, position=None):
+        self.hub = hub
+        self.name = name
+        self.ring = hub.streams[stream]
+        self.stream = stream
+        self.policy = policy
+        self.max_backlog = int(max_backlog * self.ring.sample_rate) if max_backlog else None
+        self.position = self.ring.total if position is None else position  # Default to "now"
+        self.dropped_frames = 0
+        self.read_frames = 0
+
+    def backlog(self):
+        """Frames written but not yet read"""
+        return self.ring.total - self.position
+
+    def read(self, timeout=0.5, max_frames=None):
+        """Wait for new audio and return it as (frames, channels), or None on timeout.
+
+        The result is a view into the shared buffer whenever possible; copy
+        it if it has to outlive the next few seconds of capture.
+        """
+        with self.hub.condition:
+            if self.ring.total <= self.position:
+                self.hub.condition.wait(timeout)
+        if self.ring.total <= self.position:
+            return None
+
+        if self.policy == "latest" and self.max_backlog and self.backlog() > self.max_backlog:
+            skip = self.backlog() - self.max_backlog
+            self.dropped_frames += skip
+            self.position += skip
+
+        frames, self.position, skipped = self.ring.read_since(self.position, max_frames)
+        self.dropped_frames += skipped
+        self.read_frames += len(frames)
+        return frames
+
+    def close(self):
+        """Stop receiving audio"""
+        self.hub.unsubscribe(self)
+
+class AudioHub:
+    """Single owner of the capture device that fans audio out to every consumer.
+
+    Captured blocks are written once into a full-rate ring ("full") and,
+    after one shared downmix/resample, into a 16 kHz mono ring ("detect").
+    Subscribers read from those rings through their own cursor, so adding a
+    consumer costs no extra capture and no per-subscriber copy. The device is
+    opened by the first start() and closed by the matching last stop().
+    """
+
+    def __init__(self, sample_rate=44100, channels=2, block_size=1024, buffer_seconds=BUFFER_SECONDS):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.block_size = block_size
+        self.streams = {
+            'full': AudioRingBuffer(buffer_seconds, sample_rate, channels, np.int16),
+            'detect': AudioRingBuffer(buffer_seconds, DETECTION_RATE, 1, np.int16)
+        }
+        self.condition = threading.Condition()
+        self.lock = threading.Lock()
+        self.subscriptions = []
+        self.users = 0
+        self.capture = None
+        self.detection_stream = None
+        self.pump_thread = None
+        self.running = False
+
+    def start(self):
+        """Open the device for one more user"""
+        with self.lock:
+            self.users += 1
+            if self.running:
+                return True
+            try:
+                self.capture = AudioCapture(self.sample_rate, self.channels, self.block_size)
+                self.capture.start()
+                self.detection_stream = DetectionStream(self.sample_rate, self.channels)
+                self.running = True
+                self.pump_thread = threading.Thread(target=self._pump)
+                self.pump_thread.daemon = True
+                self.pump_thread.start()
+                logger.info("Audio hub started")
+                return True
+            except Exception as e:
+                logger.error(f"Error starting audio hub: {e}")
+                self.users -= 1
+                if self.capture:
+                    self.capture.stop()
+                    self.capture = None
+                return False
+
+    def stop(self):
+        """Release one user; the device closes when nobody needs it"""
+        with self.lock:
+            self.users = max(0, self.users - 1)
+            if self.users or not self.running:
+                return
+            self.running = False
+        if self.pump_thread:
+            self.pump_thread.join(timeout=5)
+        if self.capture:
+            logger.info(f"Audio hub stats: {self.stats()}")
+            self.capture.stop()
+            self.capture = None
+        with self.condition:
+            self.condition.notify_all()
+        logger.info("Audio hub stopped")
+
+    def _pump(self):
+        """Move captured blocks into the shared streams"""
+        while self.running:
+            try:
+                block = self.capture.read(timeout=0.5, max_blocks=8)
+                if block is None:
+                    continue
+                self.streams['full'].write(block)
+                detect = self.detection_stream.process(block)
+                self.streams['detect'].write((np.clip(detect, -1.0, 1.0) * 32767).astype(np.int16))
+                with self.condition:
+                    self.condition.notify_all()
+            except Exception as e:
+                logger.error(f"Error in audio hub: {e}")
+                time.sleep(0.1)
+
+    def subscribe(self, name, stream="detect", policy="skip", max_backlog=None, position=None):
+        """Register a reader of the "full" or "detect" stream, from now or from an absolute `position`"""
+        subscription = Subscription(self, name, stream, policy, max_backlog, position)
+        with self.lock:
+            self.subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        """Remove a reader"""
+        with self.lock:
+            if subscription in self.subscriptions:
+                self.subscriptions.remove(subscription)
+
+    def stats(self):
+        """Return capture counters and per-subscriber drops"""
+        stats = self.capture.stats() if self.capture else {}
+        stats['subscribers'] = {
+            sub.name: {'backlog': sub.backlog(), 'dropped_frames': sub.dropped_frames}
+            for sub in list(self.subscriptions)
+        }
+        return stats
+
+class HubMicrophone(sr.AudioSource):
+    """speech_recognition audio source backed by the hub's 16 kHz stream.
+
+    Drop-in replacement for sr.Microphone, so speech recognition shares the
+    device with the detectors instead of opening it a second time.
+    """
+
+    def __init__(self, hub=None, chunk_size=1024):
+        self.hub = hub
+        self.SAMPLE_RATE = DETECTION_RATE
+        self.SAMPLE_WIDTH = 2
+        self.CHUNK = chunk_size
+        self.stream = None
+        self.subscription = None
+
+    def __enter__(self):
+        self.hub = self.hub or get_audio_hub()
+        if not self.hub.start():
+            raise OSError("Could not open the microphone")
+        self.subscription = self.hub.subscribe("speech", "detect")
+        self.stream = HubMicrophone.Stream(self.subscription)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.subscription.close()
+        self.hub.stop()
+        self.stream = None
+        self.subscription = None
+
+    class Stream:
+        def __init__(self, subscription):
+            self.subscription = subscription
+
+        def read(self, size):
+            """Return exactly `size` frames of 16-bit PCM, or fewer if capture stops"""
+            chunks = []
+            remaining = size
+            while remaining > 0:
+                frames = self.subscription.read(timeout=1.0, max_frames=remaining)
+                if frames is None:
+                    if not self.subscription.hub.running:
+                        break
+                    continue
+                chunks.append(frames.tobytes())
+                remaining -= len(frames)
+            return b''.join(chunks)
+
+def to_float(frames):
+    """Convert int16 frames from a hub stream to float32 in [-1, 1]"""
+    return frames.astype(np.float32) * np.float32(1.0 / 32768.0)
+
+# Create a global instance
+audio_hub = AudioHub()
+
+def get_audio_hub():
+    """Return the shared audio hub"""
+    return audio_hub
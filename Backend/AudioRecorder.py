@@ -4,26 +4,58 @@ import numpy as np
 import threading
 import time
 import os
+import queue
 import logging
 from datetime import datetime
+from Backend.AudioHub import get_audio_hub
+from Backend.EvidenceCatalog import register_evidence
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
 logger = logging.getLogger(__name__)
 
+STREAM_TO_DISK = True  # Write frames to the file as they arrive instead of keeping them in memory
+FLUSH_INTERVAL = 2.0  # Seconds between flushes; a crash loses at most this much audio
+WRITE_QUEUE_BLOCKS = 256  # Blocks the writer may fall behind before frames are dropped
+
 class AudioRecorder:
-    def __init__(self):
+    """Records the hub's full-rate stream to Data/Emergency.
+
+    In streaming mode a writer thread appends each block to an open WAV file
+    and flushes it every `flush_interval` seconds, so memory use stays flat
+    however long the recording runs and the file is readable up to the last
+    flush if the process dies. The reader hands blocks to the writer through
+    a bounded queue; if the disk stalls long enough to fill it, blocks are
+    dropped and counted rather than buffered without limit. Each recording
+    gets its own queue and writer, and only the writer closes the file.
+    """
+
+    def __init__(self, streaming=STREAM_TO_DISK, flush_interval=FLUSH_INTERVAL, max_queue_blocks=WRITE_QUEUE_BLOCKS):
         self.recording = False
         self.audio_thread = None
         self.recording_data = []
         self.sample_rate = 44100
         self.channels = 2
+        self.streaming = streaming
+        self.flush_interval = flush_interval
+        self.max_queue_blocks = max_queue_blocks
+        self.write_queue = None
+        self.write_done = None
+        self.writer_thread = None
+        self.sound_file = None
+        self.filename = None
+        self.started_at = None
+        self.frames_written = 0
+        self.dropped_blocks = 0
         
     def start_recording(self):
         """Start recording audio"""
         if not self.recording:
+            if self.streaming and not self._open_stream():
+                return False
             self.recording = True
             self.recording_data = []
+            self.started_at = time.time()
             
             # Start recording in a separate thread
             self.audio_thread = threading.Thread(target=self._record)
@@ -33,30 +65,109 @@ class AudioRecorder:
             return True
         return False
     
+    def _open_stream(self):
+        """Open the output file and start the writer thread"""
+        try:
+            os.makedirs("Data/Emergency", exist_ok=True)
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            self.filename = f"Data/Emergency/emergency_recording_{timestamp}.wav"
+            self.sound_file = sf.SoundFile(self.filename, 'w', samplerate=self.sample_rate, channels=self.channels,
+                                           subtype='PCM_16', format='WAV')
+            self.frames_written = 0
+            self.dropped_blocks = 0
+            # A fresh queue, so a writer left over from a stalled recording never sees this one's blocks
+            self.write_queue = queue.Queue(maxsize=self.max_queue_blocks)
+            self.write_done = threading.Event()
+            self.writer_thread = threading.Thread(target=self._write, args=(self.sound_file, self.write_queue,
+                                                                            self.write_done, self.filename,
+                                                                            time.time()))
+            self.writer_thread.daemon = True
+            self.writer_thread.start()
+            return True
+        except Exception as e:
+            logger.error(f"Error opening recording file: {e}")
+            self.sound_file = None
+            return False
+    
+    def _write(self, sound_file, write_queue, done, filename, started_at):
+        """Writer thread: append queued blocks to the file and flush periodically.
+
+        Runs until `done` is set and the queue is drained, then closes the
+        file and catalogues it, so the file is only closed once nothing can
+        write to it any more.
+        """
+        last_flush = time.monotonic()
+        written = 0
+        try:
+            while True:
+                try:
+                    frames = write_queue.get(timeout=0.5)
+                except queue.Empty:
+                    if done.is_set():
+                        break
+                    frames = ()
+                if frames is None:
+                    break
+                try:
+                    if len(frames):
+                        sound_file.write(frames)
+                        written += len(frames)
+                        if self.sound_file is sound_file:
+                            self.frames_written = written
+                    if time.monotonic() - last_flush >= self.flush_interval:
+                        # Rewrites the WAV header so the file is valid up to this point
+                        sound_file.flush()
+                        last_flush = time.monotonic()
+                except Exception as e:
+                    logger.error(f"Error writing recording: {e}")
+        finally:
+            try:
+                sound_file.close()
+            except Exception as e:
+                logger.error(f"Error closing recording file: {e}")
+            if written:
+                register_evidence(filename, "recording", started=started_at)
+    
     def _record(self):
         """Internal recording function"""
+        hub = get_audio_hub()
+        if not hub.start():
+            self.recording = False
+            return
+        # Evidence taps the hub's full-rate stream instead of opening the device again
+        subscription = hub.subscribe("recorder", "full")
         try:
-            def callback(indata, frames, time, status):
-                if status:
-                    logger.warning(f"Recording status: {status}")
-                if self.recording:
-                    self.recording_data.append(indata.copy())
-            
-            with sd.InputStream(samplerate=self.sample_rate, channels=self.channels, callback=callback):
-                logger.info("Recording...")
-                while self.recording:
-                    sd.sleep(100)  # Sleep for 100ms
+            logger.info("Recording...")
+            while self.recording:
+                frames = subscription.read(timeout=0.1)
+                if frames is None:
+                    continue
+                if not self.streaming:
+                    self.recording_data.append(frames.copy())
+                    continue
+                try:
+                    self.write_queue.put(frames.copy(), timeout=0.5)
+                except queue.Full:
+                    self.dropped_blocks += 1
+            if subscription.dropped_frames:
+                logger.warning(f"Recording lost {subscription.dropped_frames} frames")
                 
         except Exception as e:
             logger.error(f"Error in recording: {e}")
+        finally:
+            subscription.close()
+            hub.stop()
     
     def stop_recording(self):
         """Stop recording and save the audio file"""
-        if self.recording:
+        if self.recording or self.sound_file is not None:
             self.recording = False
             if self.audio_thread:
                 self.audio_thread.join(timeout=5)
             
+            if self.streaming:
+                return self._close_stream()
+            
             if self.recording_data:
                 try:
                     # Create Emergency directory if it doesn't exist
@@ -73,6 +184,7 @@ class AudioRecorder:
                     sf.write(filename, recording, self.sample_rate)
                     
                     logger.info(f"Audio saved to {filename}")
+                    register_evidence(filename, "recording", started=self.started_at)
                     
                     # Verify the file exists and has content
                     if os.path.exists(filename) and os.path.getsize(filename) > 0:
@@ -89,6 +201,33 @@ class AudioRecorder:
             return None
         return None
     
+    def _close_stream(self):
+        """Let the writer drain and close the file; return its path"""
+        if self.sound_file is None:
+            return None
+        self.write_done.set()
+        try:
+            self.write_queue.put_nowait(None)
+        except queue.Full:
+            pass  # The writer stops by itself once it has drained the queue
+        finished = True
+        if self.writer_thread:
+            self.writer_thread.join(timeout=10)
+            finished = not self.writer_thread.is_alive()
+        self.sound_file = None
+        
+        if self.dropped_blocks:
+            logger.warning(f"Recording dropped {self.dropped_blocks} blocks while the disk was busy")
+        if not self.frames_written:
+            logger.error("Recording is empty")
+            return None
+        if finished:
+            logger.info(f"Audio saved to {self.filename} ({self.frames_written / self.sample_rate:.1f}s)")
+        else:
+            # The writer still owns the file; it is valid up to its last flush and is closed when the writer is done
+            logger.warning(f"Recording writer still busy; {self.filename} will be finished in the background")
+        return self.filename
+    
     def cleanup(self):
         """Clean up resources"""
         self.stop_recording()
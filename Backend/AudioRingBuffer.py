@@ -0,0 +1,145 @@
+import os
+import time
+import wave
+import threading
+import logging
+import numpy as np
+from datetime import datetime
+from Backend.EvidenceCatalog import register_evidence
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+logger = logging.getLogger(__name__)
+
+class AudioRingBuffer:
+    """Fixed-size ring buffer holding the last few seconds of captured audio.
+
+    The storage is allocated once up front. Writing a block copies it straight
+    into that storage (at most two slice assignments when it wraps), so memory
+    stays bounded and nothing is allocated per block. A copy is only made when
+    the contents are read out, e.g. when an alert needs the pre-roll audio.
+
+    `total` counts every frame ever written, which lets several readers keep
+    their own absolute cursor into the same storage (see read_since).
+    """
+
+    def __init__(self, seconds=10, sample_rate=44100, channels=2, dtype=np.int16):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.capacity = int(seconds * sample_rate)
+        self.buffer = np.zeros((self.capacity, channels), dtype=dtype)
+        self.write_pos = 0
+        self.filled = 0
+        self.total = 0
+        self.last_write = None  # time.monotonic() of the newest block
+        self.lock = threading.Lock()
+
+    def write(self, frames):
+        """Append a block of frames (interleaved or shaped (n, channels))"""
+        frames = np.asarray(frames).reshape(-1, self.channels)
+        written = len(frames)
+        if written > self.capacity:
+            frames = frames[-self.capacity:]
+        count = len(frames)
+
+        with self.lock:
+            # Only the newest `capacity` frames of an oversized block are stored
+            self.write_pos = (self.total + written - count) % self.capacity
+            end = self.write_pos + count
+            if end <= self.capacity:
+                self.buffer[self.write_pos:end] = frames
+            else:
+                first = self.capacity - self.write_pos
+                self.buffer[self.write_pos:] = frames[:first]
+                self.buffer[:count - first] = frames[first:]
+            self.write_pos = end % self.capacity
+            self.filled = min(self.filled + count, self.capacity)
+            self.total += written
+            self.last_write = time.monotonic()
+
+    def read_since(self, position, max_frames=None):
+        """Return (frames, next_position, skipped) for audio written after `position`.
+
+        `position` is an absolute frame count as returned by a previous call
+        (or `total` to start from now). When the range does not wrap the
+        frames are a view into the ring rather than a copy, so readers must
+        use them before the writer comes round again. `skipped` is how many
+        frames were overwritten before this reader got to them.
+        """
+        with self.lock:
+            oldest = self.total - self.filled
+            skipped = max(0, oldest - position)
+            position = max(position, oldest)
+            end = self.total if max_frames is None else min(self.total, position + max_frames)
+            count = end - position
+            start = position % self.capacity
+            if start + count <= self.capacity:
+                frames = self.buffer[start:start + count]
+            else:
+                frames = np.concatenate((self.buffer[start:], self.buffer[:count - (self.capacity - start)]))
+        return frames, end, skipped
+
+    def _copy_latest(self, count):
+        """Chronological copy of the newest `count` frames; the caller holds the lock"""
+        start = (self.write_pos - count) % self.capacity
+        if start + count <= self.capacity:
+            return self.buffer[start:start + count].copy()
+        return np.concatenate((self.buffer[start:], self.buffer[:self.write_pos]))
+
+    def latest(self, seconds=None):
+        """Return a chronologically ordered copy of the most recent audio"""
+        with self.lock:
+            count = self.filled
+            if seconds is not None:
+                count = min(count, int(seconds * self.sample_rate))
+            return self._copy_latest(count)
+
+    def snapshot(self, seconds):
+        """Return (audio captured in the last `seconds`, position just after it).
+
+        Both are taken under one lock, so a reader starting at the returned
+        position carries on exactly where the copy ends. Audio older than
+        `seconds`, such as what is left over from before capture was
+        stopped, is not included.
+        """
+        with self.lock:
+            age = time.monotonic() - self.last_write if self.last_write is not None else seconds
+            count = min(self.filled, int(max(0.0, seconds - age) * self.sample_rate))
+            return self._copy_latest(count), self.total
+
+    def clear(self):
+        """Forget the buffered audio without releasing the storage"""
+        with self.lock:
+            self.filled = 0
+
+    def save_wav(self, filepath, seconds=None):
+        """Write the buffered audio to a 16-bit WAV file"""
+        audio = self.latest(seconds)
+        if len(audio) == 0:
+            return None
+
+        if audio.dtype != np.int16:
+            audio = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16)
+
+        os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+        with wave.open(filepath, 'wb') as wf:
+            wf.setnchannels(self.channels)
+            wf.setsampwidth(2)
+            wf.setframerate(self.sample_rate)
+            wf.writeframes(audio.tobytes())
+        return filepath
+
+def save_preroll(ring_buffer, seconds=None, directory=os.path.join("Data", "Emergency")):
+    """Dump the pre-roll audio held in a ring buffer to a timestamped WAV file"""
+    try:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filepath = os.path.join(directory, f"emergency_preroll_{timestamp}.wav")
+        if ring_buffer.save_wav(filepath, seconds):
+            logger.info(f"Pre-roll audio saved to {filepath}")
+            now = time.time()
+            register_evidence(filepath, "preroll", started=now - seconds if seconds else None, ended=now)
+            return filepath
+        logger.error("Pre-roll buffer is empty")
+    except Exception as e:
+        logger.error(f"Error saving pre-roll audio: {e}")
+    return None
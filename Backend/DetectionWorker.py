@@ -0,0 +1,253 @@
+import os
+import sys
+import json
+import time
+import queue
+import threading
+import subprocess
+import logging
+import numpy as np
+from multiprocessing import shared_memory
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Backend.AudioFeatures import FeatureEngine
+from Backend.DistressScorer import DistressScorer
+from Backend.DistressClassifier import load_classifier, MODEL_PATH
+from Backend.Resampler import DETECTION_RATE
+from Backend.EnergyGate import EnergyGate, CpuMeter, GATE_THRESHOLD_DBFS
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+logger = logging.getLogger(__name__)
+
+RING_SECONDS = 10
+HEADER_SLOTS = 4  # total frames written, stop flag, worker heartbeat, spare
+POLL_INTERVAL = 0.02  # Worker wake-up period when no audio is pending
+STATS_INTERVAL = 30  # Seconds between stats events from the worker
+
+class SharedAudioRing:
+    """Single-producer 16 kHz mono int16 ring in multiprocessing.shared_memory.
+
+    The header holds the absolute number of frames written. The producer
+    copies a block in first and only then advances that counter, and a
+    reader re-checks the counter after copying out, so any frames that were
+    overwritten mid-read are detected and counted as skipped.
+    """
+
+    def __init__(self, name=None, seconds=RING_SECONDS, sample_rate=DETECTION_RATE):
+        self.capacity = int(seconds * sample_rate)
+        size = HEADER_SLOTS * 8 + self.capacity * 2
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size)
+        if not self.owner:
+            _untrack(self.shm)
+        self.header = np.ndarray((HEADER_SLOTS,), dtype=np.int64, buffer=self.shm.buf)
+        self.data = np.ndarray((self.capacity,), dtype=np.int16, buffer=self.shm.buf, offset=HEADER_SLOTS * 8)
+        if self.owner:
+            self.header[:] = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def write(self, samples):
+        """Append int16 samples (producer side)"""
+        samples = np.asarray(samples, dtype=np.int16).reshape(-1)[-self.capacity:]
+        total = int(self.header[0])
+        start = total % self.capacity
+        end = start + len(samples)
+        if end <= self.capacity:
+            self.data[start:end] = samples
+        else:
+            first = self.capacity - start
+            self.data[start:] = samples[:first]
+            self.data[:end - self.capacity] = samples[first:]
+        self.header[0] = total + len(samples)
+
+    def read_since(self, position):
+        """Copy out the samples written after `position`; return (samples, next_position, skipped)"""
+        total = int(self.header[0])
+        skipped = max(0, total - self.capacity - position)
+        position += skipped
+        count = total - position
+        start = position % self.capacity
+        if start + count <= self.capacity:
+            samples = self.data[start:start + count].copy()
+        else:
+            samples = np.concatenate((self.data[start:], self.data[:count - (self.capacity - start)]))
+
+        # Anything the producer lapped while we were copying is unreliable
+        lapped = max(0, int(self.header[0]) - self.capacity - position)
+        if lapped:
+            samples = samples[lapped:]
+            skipped += lapped
+        return samples, total, skipped
+
+    def close(self):
+        """Detach, and free the segment if this side created it"""
+        self.header = None
+        self.data = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+def _untrack(shm):
+    """Stop the resource tracker from unlinking a segment this process only attached to"""
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+
+class DetectionWorker:
+    """Runs distress detection in a separate process.
+
+    The parent copies the hub's 16 kHz stream into a SharedAudioRing and the
+    worker process (started as `python -m Backend.DetectionWorker`, so it
+    does not re-import the GUI) runs the feature engine, classifier and
+    scorer on it. Only small JSON events come back over the worker's stdout,
+    so GIL contention in the assistant process no longer delays detection.
+    """
+
+    def __init__(self, frame_size=512, decision_latency=1.0, release_time=2.0, model_path=MODEL_PATH,
+                 low_power=False, gate_threshold_dbfs=GATE_THRESHOLD_DBFS):
+        self.config = {
+            'frame_size': frame_size,
+            'decision_latency': decision_latency,
+            'release_time': release_time,
+            'model_path': model_path,
+            'low_power': low_power,
+            'gate_threshold_dbfs': gate_threshold_dbfs
+        }
+        self.ring = None
+        self.process = None
+        self.reader_thread = None
+        self.events = queue.Queue()
+
+    def start(self):
+        """Create the shared ring and launch the worker process"""
+        self.ring = SharedAudioRing()
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "Backend.DetectionWorker", self.ring.name, json.dumps(self.config)],
+            stdin=subprocess.PIPE,  # Never written; the worker sees EOF when this process dies
+            stdout=subprocess.PIPE,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            text=True
+        )
+        self.reader_thread = threading.Thread(target=self._read_events)
+        self.reader_thread.daemon = True
+        self.reader_thread.start()
+        logger.info(f"Detection worker started (pid {self.process.pid})")
+
+    def _read_events(self):
+        """Forward events printed by the worker to the events queue"""
+        for line in self.process.stdout:
+            try:
+                self.events.put(json.loads(line))
+            except ValueError:
+                logger.debug(f"Worker output: {line.strip()}")
+
+    def write(self, samples):
+        """Hand 16 kHz int16 audio to the worker"""
+        self.ring.write(samples)
+
+    def poll(self):
+        """Return the events received since the last call"""
+        events = []
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def is_alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def stop(self):
+        """Ask the worker to exit and release the shared memory"""
+        if self.process:
+            self.ring.header[1] = 1
+            self.process.stdin.close()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+            self.process = None
+        if self.ring:
+            self.ring.close()
+            self.ring = None
+        logger.info("Detection worker stopped")
+
+def emit(event):
+    """Send one event to the parent process"""
+    sys.stdout.write(json.dumps(event) + "\n")
+    sys.stdout.flush()
+
+def watch_parent(orphaned):
+    """Set `orphaned` once stdin reaches EOF, i.e. when the parent has gone away"""
+    try:
+        while sys.stdin.read(4096):
+            pass
+    except (OSError, ValueError):
+        pass
+    orphaned.set()
+
+def run_worker(ring_name, config):
+    """Worker process main loop"""
+    parent = os.getppid()
+    orphaned = threading.Event()
+    watcher = threading.Thread(target=watch_parent, args=(orphaned,))
+    watcher.daemon = True
+    watcher.start()
+    ring = SharedAudioRing(ring_name)
+    engine = FeatureEngine(DETECTION_RATE, config['frame_size'], channels=1)
+    scorer = DistressScorer(DETECTION_RATE, config['frame_size'],
+                            decision_latency=config['decision_latency'], release_time=config['release_time'])
+    classifier = load_classifier(config['model_path'])
+    gate = EnergyGate(config['gate_threshold_dbfs'], frame_size=config['frame_size']) if config.get('low_power') else None
+    cpu_meter = CpuMeter()
+    position = int(ring.header[0])
+    dropped = 0
+    processed = 0
+    last_stats = time.time()
+
+    try:
+        while not ring.header[1]:
+            # A crashed parent never sets the stop flag; don't outlive it
+            if orphaned.is_set() or os.getppid() != parent:
+                logger.info("Parent process has exited; stopping detection worker")
+                break
+            samples, position, skipped = ring.read_since(position)
+            dropped += skipped
+            ring.header[2] = int(time.time())
+            if not len(samples):
+                time.sleep(POLL_INTERVAL)
+                continue
+
+            processed += len(samples)
+            with cpu_meter:
+                if gate and not gate.update(samples):
+                    engine.reset()
+                    fired = scorer.update(None, np.zeros(gate.frames))
+                else:
+                    features = engine.process(samples)
+                    if not len(features['rms']):
+                        continue
+                    frame_scores = classifier.predict(features) if classifier else None
+                    fired = scorer.update(features, frame_scores)
+            if fired:
+                emit({'type': 'distress', 'time': time.time(), 'score': float(scorer.window_score)})
+
+            if time.time() - last_stats >= STATS_INTERVAL:
+                stats = {'type': 'stats', 'processed_frames': processed, 'dropped_frames': dropped}
+                stats.update(cpu_meter.report(gate))
+                emit(stats)
+                last_stats = time.time()
+    finally:
+        ring.close()
+
+if __name__ == "__main__":
+    # stdout carries events only; logging already goes to stderr
+    run_worker(sys.argv[1], json.loads(sys.argv[2]))
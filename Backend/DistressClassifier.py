@@ -0,0 +1,240 @@
+import os
+import sys
+import time
+import argparse
+import logging
+import numpy as np
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Backend.AudioFeatures import FeatureEngine
+from Backend.Resampler import PolyphaseResampler, DETECTION_RATE
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+logger = logging.getLogger(__name__)
+
+MODEL_PATH = os.path.join("Data", "distress_model.npz")
+FRAME_SIZE = 512
+N_MELS = 32
+N_MFCC = 13
+MIN_DISTRESS_RMS = 0.005  # Near-silent frames in distress clips are not used for training
+
+def mel_filterbank(sample_rate, frame_size, n_mels):
+    """Triangular mel filterbank as an (n_mels, frame_size // 2 + 1) matrix"""
+    def hz_to_mel(hz):
+        return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+    def mel_to_hz(mel):
+        return 700.0 * (10 ** (mel / 2595.0) - 1.0)
+
+    freqs = np.fft.rfftfreq(frame_size, 1.0 / sample_rate)
+    edges = mel_to_hz(np.linspace(hz_to_mel(0), hz_to_mel(sample_rate / 2), n_mels + 2))
+    lower, center, upper = edges[:-2, None], edges[1:-1, None], edges[2:, None]
+    rising = (freqs - lower) / (center - lower)
+    falling = (upper - freqs) / (upper - center)
+    return np.maximum(0, np.minimum(rising, falling)).astype(np.float32)
+
+def dct_matrix(n_mfcc, n_mels):
+    """Orthonormal DCT-II basis mapping log-mel energies to MFCCs"""
+    n = np.arange(n_mels)
+    basis = np.cos(np.pi / n_mels * (n + 0.5)[None, :] * np.arange(n_mfcc)[:, None])
+    basis[0] *= 1 / np.sqrt(2)
+    return (basis * np.sqrt(2.0 / n_mels)).astype(np.float32)
+
+class DistressClassifier:
+    """Tiny per-frame distress model with pure NumPy inference.
+
+    Frames are described by MFCCs plus log energy, computed from the
+    magnitudes FeatureEngine already produces with a precomputed mel
+    filterbank and DCT matrix. The model is logistic regression, or a one
+    hidden layer MLP when trained with `hidden > 0`. Its per-frame
+    probabilities can be fed straight into DistressScorer.
+    """
+
+    def __init__(self, params, sample_rate=DETECTION_RATE, frame_size=FRAME_SIZE, n_mels=N_MELS, n_mfcc=N_MFCC):
+        self.params = {name: np.asarray(value, dtype=np.float32) for name, value in params.items()}
+        self.sample_rate = sample_rate
+        self.frame_size = frame_size
+        self.filterbank_t = mel_filterbank(sample_rate, frame_size, n_mels).T.copy()
+        self.dct_t = dct_matrix(n_mfcc, n_mels).T.copy()
+
+    def embed(self, features):
+        """Turn FeatureEngine output into standardized model inputs"""
+        power = features['magnitudes'] ** 2
+        log_mel = np.log(power @ self.filterbank_t + 1e-10)
+        log_energy = np.log(features['rms'] ** 2 + 1e-10)[:, None]
+        inputs = np.hstack((log_mel @ self.dct_t, log_energy))
+        return (inputs - self.params['mean']) / self.params['std']
+
+    def predict(self, features):
+        """Return the distress probability of every frame"""
+        return forward(self.params, self.embed(features))[0]
+
+    def save(self, path):
+        """Store the weights and front-end settings in an .npz file"""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez(path, sample_rate=self.sample_rate, frame_size=self.frame_size,
+                 n_mels=self.filterbank_t.shape[1], n_mfcc=self.dct_t.shape[1], **self.params)
+
+    @classmethod
+    def load(cls, path):
+        """Load a model written by save()"""
+        with np.load(path) as data:
+            settings = {key: int(data[key]) for key in ('sample_rate', 'frame_size', 'n_mels', 'n_mfcc')}
+            params = {key: data[key] for key in data.files if key not in settings}
+        return cls(params, **settings)
+
+def load_classifier(path=MODEL_PATH):
+    """Load the trained model if there is one, otherwise return None"""
+    try:
+        if os.path.exists(path):
+            classifier = DistressClassifier.load(path)
+            logger.info(f"Loaded distress classifier from {path}")
+            return classifier
+    except Exception as e:
+        logger.error(f"Error loading distress classifier: {e}")
+    return None
+
+def forward(params, inputs):
+    """Model forward pass; returns probabilities and the hidden activations"""
+    hidden = None
+    if 'w1' in params:
+        hidden = np.tanh(inputs @ params['w1'] + params['b1'])
+        inputs = hidden
+    logits = inputs @ params['w'] + params['b']
+    return 1.0 / (1.0 + np.exp(-np.clip(logits, -30, 30))), hidden
+
+def train(inputs, labels, hidden=0, epochs=300, learning_rate=0.01, l2=1e-4, seed=0):
+    """Fit the model with full-batch Adam on class-balanced cross-entropy"""
+    rng = np.random.default_rng(seed)
+    mean = inputs.mean(axis=0)
+    std = inputs.std(axis=0) + 1e-6
+    x = ((inputs - mean) / std).astype(np.float32)
+    y = labels.astype(np.float32)
+
+    params = {}
+    width = x.shape[1]
+    if hidden:
+        params['w1'] = rng.normal(0, 1 / np.sqrt(width), (width, hidden)).astype(np.float32)
+        params['b1'] = np.zeros(hidden, dtype=np.float32)
+        width = hidden
+    params['w'] = np.zeros(width, dtype=np.float32)
+    params['b'] = np.zeros((), dtype=np.float32)
+
+    # Weight the classes so a small distress set is not drowned out
+    positive = max(y.mean(), 1e-6)
+    weights = np.where(y > 0.5, 0.5 / positive, 0.5 / max(1 - positive, 1e-6)) / len(y)
+
+    moments = {name: (np.zeros_like(value), np.zeros_like(value)) for name, value in params.items()}
+    for step in range(1, epochs + 1):
+        probs, hidden_out = forward(params, x)
+        error = (probs - y) * weights
+        grads = {}
+        top = hidden_out if hidden else x
+        grads['w'] = top.T @ error + l2 * params['w']
+        grads['b'] = error.sum()
+        if hidden:
+            back = np.outer(error, params['w']) * (1 - hidden_out ** 2)
+            grads['w1'] = x.T @ back + l2 * params['w1']
+            grads['b1'] = back.sum(axis=0)
+        for name, grad in grads.items():
+            m, v = moments[name]
+            m[...] = 0.9 * m + 0.1 * grad
+            v[...] = 0.999 * v + 0.001 * grad ** 2
+            m_hat = m / (1 - 0.9 ** step)
+            v_hat = v / (1 - 0.999 ** step)
+            params[name] = (params[name] - learning_rate * m_hat / (np.sqrt(v_hat) + 1e-8)).astype(np.float32)
+
+    params['mean'] = mean.astype(np.float32)
+    params['std'] = std.astype(np.float32)
+    return params
+
+def load_wav_features(filepath, engine, embed):
+    """Read a WAV file, bring it to 16 kHz mono and return (inputs, rms) per frame"""
+    import soundfile as sf
+
+    audio, sample_rate = sf.read(filepath, dtype='float32', always_2d=True)
+    mono = audio.mean(axis=1)
+    if sample_rate != DETECTION_RATE:
+        mono = PolyphaseResampler(sample_rate, DETECTION_RATE).process(mono)
+    engine.reset()
+    features = engine.process(mono)
+    return embed(features), features['rms']
+
+def load_corpus(directory):
+    """Load a corpus laid out as <directory>/distress/*.wav and <directory>/normal/*.wav.
+
+    Returns (inputs, labels, files), where `files` holds the index of the
+    file each frame came from.
+    """
+    engine = FeatureEngine(DETECTION_RATE, FRAME_SIZE, channels=1)
+    # An identity-standardized model is enough to compute the raw inputs
+    raw = DistressClassifier({'mean': 0.0, 'std': 1.0})
+    inputs, labels, files = [], [], []
+    for label, name in ((1, "distress"), (0, "normal")):
+        folder = os.path.join(directory, name)
+        if not os.path.isdir(folder):
+            raise FileNotFoundError(f"Missing corpus folder: {folder}")
+        for filename in sorted(os.listdir(folder)):
+            if not filename.lower().endswith(('.wav', '.flac', '.ogg')):
+                continue
+            x, rms = load_wav_features(os.path.join(folder, filename), engine, raw.embed)
+            if label:
+                x = x[rms > MIN_DISTRESS_RMS]
+            inputs.append(x)
+            labels.append(np.full(len(x), label))
+            files.append(np.full(len(x), len(files)))
+            logger.info(f"Loaded {len(x)} frames from {name}/{filename}")
+    return np.vstack(inputs), np.concatenate(labels), np.concatenate(files)
+
+def split_by_file(labels, files, holdout, seed=0):
+    """Hold out whole files, about `holdout` of each class, and return (train_idx, test_idx).
+
+    Neighbouring frames of one recording are nearly identical, so a
+    frame-level split would score the model on audio it was trained on.
+    """
+    rng = np.random.default_rng(seed)
+    test_files = []
+    for label in (1, 0):
+        candidates = rng.permutation(np.unique(files[labels == label]))
+        count = int(round(len(candidates) * holdout))
+        if holdout > 0 and len(candidates) > 1:
+            count = min(max(count, 1), len(candidates) - 1)  # Keep at least one file of each class on each side
+        test_files.extend(candidates[:count])
+    test = np.isin(files, test_files)
+    return np.flatnonzero(~test), np.flatnonzero(test)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the NumPy distress classifier")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    train_parser = subparsers.add_parser("train", help="train on a labelled WAV corpus")
+    train_parser.add_argument("--data", required=True, help="folder with distress/ and normal/ subfolders")
+    train_parser.add_argument("--out", default=MODEL_PATH, help="where to write the model")
+    train_parser.add_argument("--hidden", type=int, default=0, help="hidden units (0 = logistic regression)")
+    train_parser.add_argument("--epochs", type=int, default=300)
+    train_parser.add_argument("--learning-rate", type=float, default=0.01)
+    train_parser.add_argument("--holdout", type=float, default=0.2,
+                              help="fraction of each class's files kept for evaluation")
+    args = parser.parse_args(argv)
+
+    inputs, labels, files = load_corpus(args.data)
+    train_idx, test_idx = split_by_file(labels, files, args.holdout)
+
+    params = train(inputs[train_idx], labels[train_idx], args.hidden, args.epochs, args.learning_rate)
+    classifier = DistressClassifier(params)
+    classifier.save(args.out)
+    logger.info(f"Model saved to {args.out}")
+
+    if len(test_idx):
+        x = (inputs[test_idx] - params['mean']) / params['std']
+        start = time.perf_counter()
+        probs = forward(classifier.params, x)[0]
+        per_frame = (time.perf_counter() - start) / len(test_idx) * 1e6
+        accuracy = ((probs >= 0.5) == (labels[test_idx] > 0)).mean()
+        logger.info(f"Hold-out accuracy: {accuracy:.3f} on {len(test_idx)} frames from "
+                    f"{len(np.unique(files[test_idx]))} unseen files ({per_frame:.1f} us/frame)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import logging
+import numpy as np
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+logger = logging.getLogger(__name__)
+
+# Per-frame tests and how much each contributes to the frame score
+RMS_THRESHOLD = 0.05  # Roughly -26 dBFS; quieter frames score zero
+CENTROID_RANGE = (800, 3500)  # Hz, bright but still voiced
+ZCR_RANGE = (0.02, 0.25)  # Excludes hum and broadband hiss
+VOICE_BAND_RATIO = 0.6  # Share of energy in the voice and high bands
+WEIGHTS = {
+    'rms': 0.4,
+    'centroid': 0.25,
+    'band': 0.2,
+    'zcr': 0.15
+}
+
+IDLE = "idle"
+ALERT = "alert"
+
+class DistressScorer:
+    """Sliding-window distress score with attack/release hysteresis.
+
+    Each frame gets a score from a handful of cheap features (RMS, spectral
+    centroid, zero-crossing rate and band-energy ratio). The scores are
+    averaged over a sliding window, and the state machine only enters ALERT
+    once that average has stayed above `attack_threshold` for
+    `decision_latency` seconds. It returns to IDLE only after the average has
+    stayed below the lower `release_threshold` for `release_time` seconds, so
+    a single odd frame can neither fire nor cancel an alert.
+    """
+
+    def __init__(self, sample_rate=16000, frame_size=512, window_seconds=0.5,
+                 attack_threshold=0.6, release_threshold=0.3,
+                 decision_latency=1.0, release_time=2.0):
+        self.frame_duration = frame_size / sample_rate
+        self.attack_threshold = attack_threshold
+        self.release_threshold = release_threshold
+        self.decision_latency = decision_latency
+        self.release_time = release_time
+
+        # Preallocated window of recent frame scores with a running sum
+        self.scores = np.zeros(max(1, int(round(window_seconds / self.frame_duration))), dtype=np.float64)
+        self.score_pos = 0
+        self.score_sum = 0.0
+
+        self.state = IDLE
+        self.above_time = 0.0
+        self.below_time = 0.0
+        self.window_score = 0.0
+
+    def frame_scores(self, features):
+        """Score every frame of a feature batch in [0, 1]"""
+        loud = features['rms'] > RMS_THRESHOLD
+        centroid = (features['centroid'] >= CENTROID_RANGE[0]) & (features['centroid'] <= CENTROID_RANGE[1])
+        zcr = (features['zcr'] >= ZCR_RANGE[0]) & (features['zcr'] <= ZCR_RANGE[1])
+        band = (features['voice_ratio'] + features['high_ratio']) >= VOICE_BAND_RATIO
+
+        score = (WEIGHTS['rms'] * loud + WEIGHTS['centroid'] * centroid +
+                 WEIGHTS['band'] * band + WEIGHTS['zcr'] * zcr)
+        return np.where(loud, score, 0.0)
+
+    def update(self, features, frame_scores=None):
+        """Feed a feature batch; return True if the batch moved the state into ALERT.
+
+        `frame_scores` can be passed in directly (e.g. classifier
+        probabilities) instead of deriving them from the features.
+        """
+        if frame_scores is None:
+            frame_scores = self.frame_scores(features)
+
+        fired = False
+        for score in frame_scores:
+            # Slide the window
+            self.score_sum += score - self.scores[self.score_pos]
+            self.scores[self.score_pos] = score
+            self.score_pos = (self.score_pos + 1) % len(self.scores)
+            self.window_score = self.score_sum / len(self.scores)
+
+            if self.state == IDLE:
+                if self.window_score >= self.attack_threshold:
+                    self.above_time += self.frame_duration
+                    if self.above_time >= self.decision_latency:
+                        self.state = ALERT
+                        self.below_time = 0.0
+                        fired = True
+                        logger.info(f"Distress state: ALERT (window score {self.window_score:.2f})")
+                elif self.window_score < self.release_threshold:
+                    self.above_time = 0.0
+            else:
+                if self.window_score < self.release_threshold:
+                    self.below_time += self.frame_duration
+                    if self.below_time >= self.release_time:
+                        self.state = IDLE
+                        self.above_time = 0.0
+                        logger.info("Distress state: IDLE")
+                else:
+                    self.below_time = 0.0
+        return fired
+
+    def reset(self):
+        """Return to IDLE and clear the score window"""
+        self.scores[:] = 0
+        self.score_pos = 0
+        self.score_sum = 0.0
+        self.state = IDLE
+        self.above_time = 0.0
+        self.below_time = 0.0
+        self.window_score = 0.0
@@ -1,7 +1,6 @@
 import os
 import sys
 import numpy as np
-import geocoder
 import threading
 import time
 from datetime import datetime
@@ -12,6 +11,21 @@ import pyaudio
 import wave
 from Backend.WhatsAppAutomation import send_emergency_alert
 from Backend.AudioRecorder import stop_recording
+from Backend.AudioRingBuffer import save_preroll
+from Backend.AudioHub import get_audio_hub
+from Backend.AudioFeatures import FeatureEngine, voice_activity
+from Backend.DistressScorer import DistressScorer
+from Backend.DistressClassifier import load_classifier
+from Backend.DetectionWorker import DetectionWorker
+from Backend.EnergyGate import EnergyGate, CpuMeter, GATE_THRESHOLD_DBFS
+from Backend.Resampler import DETECTION_RATE
+from Backend.LocationService import get_location, get_location_service
+from Backend.LocationTracker import open_incident, close_incident
+from Backend.SegmentRecorder import start_incident_recording, start_rolling_recording
+from Backend.EvidenceBundle import close_incident_evidence
+from Backend.EvidenceCatalog import get_evidence_catalog, latest_audio_file
+from Backend.Transcriber import start_transcription
+from Backend.AlertTrace import AlertTrace
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
@@ -24,6 +38,19 @@ emergency_active = False
 VOLUME_THRESHOLD = 0.1
 FREQUENCY_THRESHOLD = 1000
 ALERT_COOLDOWN = 60  # 60 seconds cooldown between alerts
+PREROLL_SECONDS = 10  # Audio kept from before the trigger
+preroll_buffer = None
+CAPTURE_STATS_INTERVAL = 10  # Seconds between capture loss checks
+DETECTION_FRAME_SIZE = 512  # 32 ms frames on the 16 kHz detection stream
+DECISION_LATENCY = 1.0  # Seconds of sustained distress before an alert fires
+RELEASE_TIME = 2.0  # Seconds of calm before the detector re-arms
+DETECTION_BACKEND = "thread"  # "thread" or "process" (separate worker process)
+LOW_POWER_MODE = False  # Only run the spectral stages while the energy gate is open
+GATE_SENSITIVITY_DBFS = GATE_THRESHOLD_DBFS  # Lower values wake the detector for quieter sounds
+last_alert_time = 0
+alert_lock = threading.Lock()  # Held while an alert is being raised
+_feature_engines = {}
+distress_classifier = load_classifier()  # None until a model has been trained
 
 class EmergencyDetector:
     def __init__(self):
@@ -46,24 +73,29 @@ class EmergencyDetector:
     
     def _monitor_audio(self):
         """Monitor audio input for distress signals"""
+        hub = get_audio_hub()
+        if not hub.start():
+            self.monitoring = False
+            return
+        subscription = hub.subscribe("volume", "detect", policy="latest", max_backlog=0.5)
         try:
-            def callback(indata, frames, time, status):
-                if status:
-                    logger.warning(f"Monitoring status: {status}")
-                if self.monitoring:
-                    # Calculate volume level
-                    volume = np.abs(indata).mean()
-                    if volume > self.threshold:
-                        logger.info(f"Distress signal detected! Volume: {volume}")
-                        self._handle_distress()
-            
-            with sd.InputStream(samplerate=self.sample_rate, channels=self.channels, callback=callback):
-                logger.info("Monitoring audio...")
-                while self.monitoring:
-                    sd.sleep(100)  # Sleep for 100ms
+            logger.info("Monitoring audio...")
+            while self.monitoring:
+                audio_data = subscription.read(timeout=0.1)
+                if audio_data is None:
+                    continue
+                
+                # Calculate volume level on the shared 16 kHz mono stream
+                volume = np.abs(audio_data).mean() / 32768.0
+                if volume > self.threshold:
+                    logger.info(f"Distress signal detected! Volume: {volume}")
+                    self._handle_distress()
                     
         except Exception as e:
             logger.error(f"Error in audio monitoring: {e}")
+        finally:
+            subscription.close()
+            hub.stop()
     
     def _handle_distress(self):
         """Handle detected distress signal"""
@@ -102,6 +134,10 @@ def start_detection():
     
     try:
         if not emergency_active:
+            get_location_service().start()  # Have a fix cached before an alert needs it
+            get_evidence_catalog()  # Open the evidence index before an alert needs it
+            start_transcription()
+            start_rolling_recording()
             recording = True
             audio_thread = threading.Thread(target=monitor_audio)
             audio_thread.daemon = True
@@ -118,140 +154,197 @@ def stop_detection():
     """Stop emergency detection"""
     return emergency_detector.stop_detection()
 
-def get_location():
-    """Get current location using geocoder."""
-    try:
-        g = geocoder.ip('me')
-        return {
-            'address': g.address,
-            'coordinates': (g.lat, g.lng)
-        }
-    except Exception as e:
-        logger.error(f"Error getting location: {e}")
-        return None
-
 def detect_distress(audio_data, sample_rate):
     """Analyze audio data for distress signals."""
     try:
-        # Volume analysis
-        volume = np.abs(audio_data).mean()
-        logger.info(f"Current volume level: {volume}")
+        # Treat the block as a single mono frame; engines are cached per frame size
+        key = (sample_rate, len(audio_data))
+        if key not in _feature_engines:
+            _feature_engines[key] = FeatureEngine(sample_rate, len(audio_data), channels=1)
+        features = _feature_engines[key].analyze(audio_data)
+        logger.debug(f"Volume: {features['volume'][0]}, high frequency energy: {features['high_freq_energy'][0]}")
         
-        # Lower threshold for initial detection
-        if volume > 0.01:  # Lowered threshold for initial voice detection
-            # Frequency analysis
-            fft_data = np.fft.fft(audio_data)
-            freqs = np.fft.fftfreq(len(audio_data)) * sample_rate
-            high_freq_energy = np.abs(fft_data[freqs > FREQUENCY_THRESHOLD]).mean()
-            
-            logger.info(f"High frequency energy: {high_freq_energy}")
-            
-            # Check for sustained voice activity
-            if high_freq_energy > 0.005:  # Lowered threshold for frequency analysis
-                logger.info("Voice activity detected!")
+        # Prefer the learned model when the frame matches what it was trained on
+        classifier = distress_classifier
+        if classifier and key == (classifier.sample_rate, classifier.frame_size):
+            if classifier.predict(features)[0] >= 0.5:
+                logger.info("Distress detected by classifier!")
                 return True
+        elif voice_activity(features)[0]:
+            logger.info("Voice activity detected!")
+            return True
     except Exception as e:
         logger.error(f"Error in distress detection: {e}")
     return False
 
+def save_preroll_audio(seconds=None):
+    """Save the audio captured just before now and return the file path"""
+    if preroll_buffer is None:
+        return None
+    return save_preroll(preroll_buffer, seconds or PREROLL_SECONDS)
+
 def get_audio_file():
     """Get the latest recorded audio file"""
-    try:
-        emergency_dir = os.path.join("Data", "Emergency")
-        if not os.path.exists(emergency_dir):
-            return None
-            
-        # Get the most recent audio file
-        audio_files = [f for f in os.listdir(emergency_dir) if f.endswith('.wav')]
-        if not audio_files:
-            return None
-            
-        latest_file = max(audio_files, key=lambda x: os.path.getctime(os.path.join(emergency_dir, x)))
-        return os.path.join(emergency_dir, latest_file)
-    except Exception as e:
-        logger.error(f"Error getting audio file: {e}")
-        return None
+    # An index lookup in the evidence catalogue; no directory scan on the alert path
+    return latest_audio_file()
+
+def trigger_emergency_alert(trace=None):
+    """Send an alert for a detected emergency, honouring the cooldown."""
+    global last_alert_time
+    current_time = time.time()
+    if current_time - last_alert_time < ALERT_COOLDOWN:
+        return False
+    logger.info("Sustained distress detected - triggering emergency alert!")
+    trace = trace or AlertTrace("detector")
+    
+    # The cached fix, or UNKNOWN_LOCATION; never None
+    location = get_location()
+    trace.mark("location", age=location.get('age'))
+    
+    # Ship the audio from before the trigger, falling back to the latest recording
+    audio_file = save_preroll_audio() or get_audio_file()
+    if not audio_file:
+        logger.error("Could not get audio file!")
+        return False
+    trace.mark("recording", file=audio_file)
+    
+    # Send emergency alert
+    if send_emergency_alert(location=location, audio_file=audio_file, trace=trace):
+        logger.info("Emergency alert sent successfully")
+        last_alert_time = current_time
+        open_incident(location)
+        start_incident_recording()
+        return True
+    logger.error("Failed to send emergency alert")
+    return False
+
+def trigger_emergency_alert_async():
+    """Raise the alert on its own thread so capture and detection keep running"""
+    if time.time() - last_alert_time < ALERT_COOLDOWN:
+        return False
+    if not alert_lock.acquire(blocking=False):
+        return False  # An alert is already being raised
+    trace = AlertTrace("detector")  # Timed from the moment of detection
+    
+    def run():
+        try:
+            trigger_emergency_alert(trace)
+        except Exception as e:
+            logger.error(f"Error triggering emergency alert: {e}")
+        finally:
+            alert_lock.release()
+    
+    thread = threading.Thread(target=run)
+    thread.daemon = True
+    thread.start()
+    return True
 
 def monitor_audio():
     """Monitor audio for emergency signals."""
-    global recording, emergency_active
-    last_alert_time = 0
-    voice_detection_count = 0  # Counter for sustained voice detection
+    global recording, emergency_active, preroll_buffer
+    hub = get_audio_hub()
+    subscription = None
+    worker = None
     
     try:
-        # Audio monitoring parameters
-        sample_rate = 44100
-        channels = 2
-        dtype = np.int16
+        # The shared hub owns the microphone; detection reads its 16 kHz mono stream
+        if not hub.start():
+            return
+        subscription = hub.subscribe("distress", "detect")
+        
+        # The hub's full-rate stream already holds the audio from before the trigger
+        preroll_buffer = hub.streams['full']
         
-        # Initialize PyAudio
-        p = pyaudio.PyAudio()
-        stream = p.open(
-            format=pyaudio.paInt16,
-            channels=channels,
-            rate=sample_rate,
-            input=True,
-            frames_per_buffer=1024
-        )
+        if DETECTION_BACKEND == "process":
+            # Detection runs in its own process; this thread only forwards audio
+            worker = DetectionWorker(DETECTION_FRAME_SIZE, DECISION_LATENCY, RELEASE_TIME,
+                                     low_power=LOW_POWER_MODE, gate_threshold_dbfs=GATE_SENSITIVITY_DBFS)
+            worker.start()
+        else:
+            # Window, bin frequencies and band masks are computed once here
+            engine = FeatureEngine(DETECTION_RATE, DETECTION_FRAME_SIZE, channels=1)
+            
+            # Scores several features over a sliding window with attack/release hysteresis
+            scorer = DistressScorer(DETECTION_RATE, DETECTION_FRAME_SIZE,
+                                    decision_latency=DECISION_LATENCY, release_time=RELEASE_TIME)
         
-        logger.info("Started monitoring...")
+        # Cheap integer gate in front of the spectral stages (low-power mode only)
+        gate = EnergyGate(GATE_SENSITIVITY_DBFS, frame_size=DETECTION_FRAME_SIZE) if LOW_POWER_MODE else None
+        cpu_meter = CpuMeter()
+        
+        logger.info(f"Started monitoring{' (low-power mode)' if LOW_POWER_MODE else ''}...")
+        last_stats_time = time.time()
+        reported_drops = 0
         
         while recording:
             try:
-                # Read audio data
-                audio_data = np.frombuffer(stream.read(1024), dtype=np.int16)
+                # Wait for new audio without polling; any backlog arrives as one batch
+                audio_data = subscription.read(timeout=0.5)
                 
-                # Convert to float for processing
-                audio_float = audio_data.astype(np.float32) / 32768.0
+                # Report lost audio instead of silently falling behind
+                if time.time() - last_stats_time >= CAPTURE_STATS_INTERVAL:
+                    stats = hub.stats()
+                    lost = stats.get('dropped_frames', 0) + stats.get('overflows', 0) + subscription.dropped_frames
+                    if lost > reported_drops:
+                        logger.warning(f"Audio capture is losing data: {stats}")
+                        reported_drops = lost
+                    if not worker:
+                        logger.info(f"Detection CPU: {cpu_meter.report(gate)}")
+                    last_stats_time = time.time()
                 
-                # Check for emergency conditions
-                if detect_distress(audio_float, sample_rate):
-                    voice_detection_count += 1
-                    logger.info(f"Voice detection count: {voice_detection_count}")
-                    
-                    # If we detect sustained voice activity (3 consecutive detections)
-                    if voice_detection_count >= 3:
-                        current_time = time.time()
-                        if current_time - last_alert_time >= ALERT_COOLDOWN:
-                            logger.info("Sustained voice activity detected - triggering emergency alert!")
-                            
-                            # Get current location
-                            location = get_location()
-                            if not location:
-                                logger.error("Could not get location!")
-                                continue
-                            
-                            # Get the recorded audio file
-                            audio_file = get_audio_file()
-                            if not audio_file:
-                                logger.error("Could not get audio file!")
-                                continue
-                            
-                            # Send emergency alert
-                            if send_emergency_alert(location=location, audio_file=audio_file):
-                                logger.info("Emergency alert sent successfully")
-                                last_alert_time = current_time
-                            else:
-                                logger.error("Failed to send emergency alert")
-                else:
-                    voice_detection_count = 0  # Reset counter if no voice detected
+                if worker:
+                    if audio_data is not None:
+                        worker.write(audio_data)
+                    for event in worker.poll():
+                        if event['type'] == 'distress':
+                            trigger_emergency_alert_async()
+                        else:
+                            logger.info(f"Detection worker: {event}")
+                    if not worker.is_alive():
+                        logger.error("Detection worker exited, falling back to in-process detection")
+                        worker.stop()
+                        worker = None
+                        engine = FeatureEngine(DETECTION_RATE, DETECTION_FRAME_SIZE, channels=1)
+                        scorer = DistressScorer(DETECTION_RATE, DETECTION_FRAME_SIZE,
+                                                decision_latency=DECISION_LATENCY, release_time=RELEASE_TIME)
+                    continue
+                
+                if audio_data is None:
+                    continue
                 
-                # Small delay to prevent CPU overload
-                time.sleep(0.01)
+                with cpu_meter:
+                    # In low-power mode a quiet block only ages the scorer window
+                    if gate and not gate.update(audio_data):
+                        engine.reset()
+                        fired = scorer.update(None, np.zeros(gate.frames))
+                    else:
+                        # Analyze every frame of the batch in one pass
+                        features = engine.process(audio_data)
+                        if not len(features['rms']):
+                            continue
+                        
+                        # Learned per-frame probabilities replace the hand-tuned score when available
+                        frame_scores = distress_classifier.predict(features) if distress_classifier else None
+                        fired = scorer.update(features, frame_scores)
+                
+                # Check for emergency conditions
+                if fired:
+                    trigger_emergency_alert_async()
                 
             except Exception as e:
                 logger.error(f"Error in audio processing loop: {e}")
-                time.sleep(0.1)
             
     except Exception as e:
         logger.error(f"Error in audio monitoring: {e}")
     finally:
         recording = False
-        if 'stream' in locals():
-            stream.stop_stream()
-            stream.close()
-        if 'p' in locals():
-            p.terminate()
+        if 'cpu_meter' in locals() and not worker:
+            logger.info(f"Detection CPU: {cpu_meter.report(gate)}")
+        if worker:
+            worker.stop()
+        if subscription:
+            subscription.close()
+            hub.stop()
 
 def stop_recording():
     """Stop the emergency detection system."""
@@ -263,6 +356,8 @@ def stop_recording():
             if audio_thread and audio_thread.is_alive():
                 audio_thread.join(timeout=5)
             emergency_active = False
+            close_incident()
+            close_incident_evidence()
             logger.info("Emergency detection system deactivated")
             return True
         return False
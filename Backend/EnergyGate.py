@@ -0,0 +1,93 @@
+import time
+import logging
+import numpy as np
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+logger = logging.getLogger(__name__)
+
+GATE_THRESHOLD_DBFS = -45.0  # Frames quieter than this keep the gate closed
+GATE_HANGOVER = 0.5  # Seconds the gate stays open after the last loud frame
+
+class EnergyGate:
+    """Integer RMS gate that decides when the expensive detection stages run.
+
+    Works directly on the int16 samples: the squared sum of each frame is
+    compared against a precomputed integer threshold, so no float conversion,
+    square root or FFT is needed while the room is quiet. After the last
+    loud frame the gate stays open for `hangover` seconds so the scorer can
+    see the end of an event. Blocks rarely line up with frames, so samples
+    short of a whole frame are carried over to the next call; `frames` is
+    the number of whole frames the last call judged.
+    """
+
+    def __init__(self, threshold_dbfs=GATE_THRESHOLD_DBFS, hangover=GATE_HANGOVER, frame_size=512, sample_rate=16000):
+        self.frame_size = frame_size
+        amplitude = 32768 * 10 ** (threshold_dbfs / 20.0)
+        self.energy_threshold = int(amplitude ** 2 * frame_size)
+        self.hangover_frames = int(hangover * sample_rate / frame_size)
+        self.frames_left = 0
+        self.pending = np.zeros(0, dtype=np.int16)
+        self.frames = 0
+        self.is_open = False
+        self.open_frames = 0
+        self.total_frames = 0
+
+    def update(self, samples):
+        """Return True if this block of int16 samples should be analysed"""
+        samples = np.asarray(samples).reshape(-1)
+        if len(self.pending):
+            samples = np.concatenate((self.pending, samples))
+        count = len(samples) // self.frame_size
+        self.pending = samples[count * self.frame_size:].copy()
+        self.frames = count
+        if not count:
+            return self.is_open  # Not a whole frame yet; keep the last decision
+        frames = samples[:count * self.frame_size].reshape(count, -1).astype(np.int32)
+        energy = (frames * frames).sum(axis=1, dtype=np.int64)
+
+        loud = np.flatnonzero(energy > self.energy_threshold)
+        if len(loud):
+            # Keep the gate open for the hangover after the last loud frame
+            self.frames_left = max(0, self.hangover_frames + int(loud[-1]) + 1 - count)
+            is_open = True
+        else:
+            is_open = self.frames_left > 0
+            self.frames_left = max(0, self.frames_left - count)
+
+        self.total_frames += count
+        if is_open:
+            self.open_frames += count
+        self.is_open = is_open
+        return is_open
+
+    def duty_cycle(self):
+        """Fraction of frames for which the gate was open"""
+        return self.open_frames / self.total_frames if self.total_frames else 0.0
+
+class CpuMeter:
+    """Accumulates the CPU time a thread spends on detection work"""
+
+    def __init__(self):
+        self.cpu_seconds = 0.0
+        self.started = time.monotonic()
+        self._mark = None
+
+    def __enter__(self):
+        self._mark = time.thread_time()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.cpu_seconds += time.thread_time() - self._mark
+
+    def cpu_per_hour(self):
+        """CPU seconds spent per hour of wall-clock monitoring"""
+        elapsed = time.monotonic() - self.started
+        return self.cpu_seconds / elapsed * 3600 if elapsed > 0 else 0.0
+
+    def report(self, gate=None):
+        """Summary suitable for logging"""
+        report = {'cpu_seconds': round(self.cpu_seconds, 3), 'cpu_seconds_per_hour': round(self.cpu_per_hour(), 1)}
+        if gate is not None:
+            report['gate_duty_cycle'] = round(gate.duty_cycle(), 3)
+        return report
@@ -0,0 +1,249 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import zipfile
+import argparse
+import threading
+import logging
+from datetime import datetime
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Backend.SegmentRecorder import SEGMENT_DIR, load_ledger, stop_incident_recording
+from Backend.EvidenceCatalog import get_evidence_catalog, register_evidence
+from Backend.LocationTracker import get_location_trail
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+logger = logging.getLogger(__name__)
+
+BUNDLE_DIR = os.path.join("Data", "Emergency", "Bundles")
+BUNDLE_LEDGER = "bundles.jsonl"  # Manifest digest of every bundle, kept outside the archives
+REPORT_DIR = os.path.join("Data", "Data")
+REPORT_PREFIX = "emergency_report_"
+EVIDENCE_MARGIN = 60  # Seconds before the incident opened from which loose files still belong to it
+CHUNK_SIZE = 1024 * 1024
+
+def sha256_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+def find_reports(since, until):
+    """Emergency reports modified within [since, until].
+
+    Reports can be written by tools that never touch the catalogue, so they
+    are found by scanning their directory; this only runs when a bundle is
+    built, never on the alert path. Anything found is catalogued as well.
+    """
+    reports = []
+    if not os.path.isdir(REPORT_DIR):
+        return reports
+    with os.scandir(REPORT_DIR) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.startswith(REPORT_PREFIX):
+                stat = entry.stat()
+                if since <= stat.st_mtime <= until:
+                    register_evidence(entry.path, "report", ended=stat.st_mtime, size=stat.st_size)
+                    reports.append({'path': os.path.normpath(entry.path), 'kind': "report"})
+    return reports
+
+def collect_evidence(incident_id, opened, closed):
+    """Everything that belongs to an incident as (source path, archive name, kind).
+
+    Segments are found by incident id; alert recordings and reports, which
+    are written before the incident has an id, by the time they cover.
+    """
+    catalog = get_evidence_catalog()
+    since = (opened or closed) - EVIDENCE_MARGIN
+    entries = catalog.for_incident(incident_id, ("segment",))
+    entries += catalog.in_range(since, closed, ("recording", "preroll", "report"))
+    entries += find_reports(since, closed)
+    members = []
+    seen = set()
+    for entry in entries:
+        if entry['path'] in seen or not os.path.exists(entry['path']):
+            continue
+        seen.add(entry['path'])
+        folder = "reports" if entry['kind'] == "report" else "audio"
+        members.append((entry['path'], f"{folder}/{os.path.basename(entry['path'])}", entry['kind']))
+    return members
+
+def copy_into(archive, source, name, compress):
+    """Stream a file into the archive, hashing it in the same pass; return (sha256, bytes)"""
+    info = zipfile.ZipInfo(name, date_time=time.localtime(os.path.getmtime(source))[:6])
+    info.compress_type = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+    digest = hashlib.sha256()
+    size = 0
+    with open(source, 'rb') as src, archive.open(info, 'w', force_zip64=True) as dst:
+        while True:
+            chunk = src.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+            dst.write(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+def build_bundle(incident_id, opened=None, closed=None, trail=None, out_dir=BUNDLE_DIR, segment_dir=SEGMENT_DIR):
+    """Package an incident's audio, reports and location trail into one zip archive.
+
+    Members are streamed from their files straight into the archive, and
+    each is hashed as it is copied. Segment hashes are checked against the
+    ledger written when the audio was recorded. The manifest goes in last
+    and its own digest is added to the bundle ledger.
+    """
+    closed = closed or time.time()
+    members = collect_evidence(incident_id, opened, closed)
+    ledger = load_ledger(segment_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"incident_{incident_id}.zip")
+    temp_path = path + ".part"
+
+    manifest = {
+        'incident': incident_id,
+        'opened': opened,
+        'closed': closed,
+        'created': time.time(),
+        'members': []
+    }
+    with zipfile.ZipFile(temp_path, 'w') as archive:
+        for source, name, kind in members:
+            try:
+                # Audio is already compressed; only text is worth deflating
+                digest, size = copy_into(archive, source, name, compress=(kind == "report"))
+            except OSError as e:
+                logger.error(f"Error adding {source} to bundle: {e}")
+                continue
+            member = {'name': name, 'kind': kind, 'bytes': size, 'sha256': digest}
+            recorded = ledger.get(os.path.basename(source)) if kind == "segment" else None
+            if recorded:
+                member.update(started=recorded['started'], frames=recorded['frames'],
+                              sample_rate=recorded['sample_rate'])
+                if recorded['sha256'] != digest:
+                    member['recorded_sha256'] = recorded['sha256']
+                    logger.warning(f"{source} changed since it was recorded")
+            manifest['members'].append(member)
+
+        trail_data = json.dumps(trail or [], indent=2).encode('utf-8')
+        archive.writestr(zipfile.ZipInfo("location_trail.json", date_time=time.localtime(closed)[:6]), trail_data,
+                         compress_type=zipfile.ZIP_DEFLATED)
+        manifest['members'].append({'name': "location_trail.json", 'kind': "location", 'bytes': len(trail_data),
+                                    'sha256': sha256_bytes(trail_data)})
+
+        manifest_data = json.dumps(manifest, indent=2).encode('utf-8')
+        archive.writestr("manifest.json", manifest_data, compress_type=zipfile.ZIP_DEFLATED)
+    os.replace(temp_path, path)
+
+    entry = {'bundle': os.path.basename(path), 'incident': incident_id, 'manifest_sha256': sha256_bytes(manifest_data),
+             'bytes': os.path.getsize(path), 'created': manifest['created']}
+    with open(os.path.join(out_dir, BUNDLE_LEDGER), 'a', encoding='utf-8') as file:
+        file.write(json.dumps(entry) + "\n")
+    register_evidence(path, "bundle", incident_id, opened, closed)
+    logger.info(f"Evidence bundle written to {path} ({len(manifest['members'])} files)")
+    return path
+
+def load_bundle_ledger(directory=BUNDLE_DIR):
+    entries = {}
+    path = os.path.join(directory, BUNDLE_LEDGER)
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                entries[entry['bundle']] = entry
+    return entries
+
+def verify_bundle(path, full=False, segment_dir=SEGMENT_DIR):
+    """Check a bundle against its manifest; return {'ok', 'problems', 'members'}.
+
+    The quick check reads only the manifest and the zip directory: the
+    manifest digest must match the bundle ledger, every member must be
+    present with its listed size, and segment hashes must match the ones
+    recorded at capture time. With `full` every member is read and
+    re-hashed as well.
+    """
+    problems = []
+    with zipfile.ZipFile(path) as archive:
+        manifest_data = archive.read("manifest.json")
+        manifest = json.loads(manifest_data)
+
+        recorded = load_bundle_ledger(os.path.dirname(path)).get(os.path.basename(path))
+        if not recorded:
+            problems.append("bundle is not in the ledger")
+        elif recorded['manifest_sha256'] != sha256_bytes(manifest_data):
+            problems.append("manifest does not match the ledger")
+
+        ledger = load_ledger(segment_dir)
+        for member in manifest['members']:
+            try:
+                info = archive.getinfo(member['name'])
+            except KeyError:
+                problems.append(f"{member['name']} is missing")
+                continue
+            if info.file_size != member['bytes']:
+                problems.append(f"{member['name']} has the wrong size")
+            if 'recorded_sha256' in member:
+                problems.append(f"{member['name']} differed from the recording when bundled")
+            segment = ledger.get(os.path.basename(member['name'])) if member['kind'] == "segment" else None
+            if segment and segment['sha256'] != member['sha256']:
+                problems.append(f"{member['name']} does not match its recorded hash")
+            if full:
+                digest = hashlib.sha256()
+                with archive.open(info) as file:
+                    for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+                        digest.update(chunk)
+                if digest.hexdigest() != member['sha256']:
+                    problems.append(f"{member['name']} content does not match the manifest")
+    return {'ok': not problems, 'problems': problems, 'members': len(manifest['members'])}
+
+def close_incident_evidence():
+    """Finish recording the incident and package its evidence in the background"""
+    incident_id, opened = stop_incident_recording()
+    if not incident_id:
+        return None
+    trail = get_location_trail()
+    closed = time.time()
+
+    def run():
+        try:
+            build_bundle(incident_id, opened, closed, trail)
+        except Exception as e:
+            logger.error(f"Error building evidence bundle: {e}")
+
+    thread = threading.Thread(target=run)
+    thread.daemon = True
+    thread.start()
+    return incident_id
+
+def main():
+    parser = argparse.ArgumentParser(description="Incident evidence bundles")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Bundle the evidence of an incident")
+    build_parser.add_argument("incident")
+    build_parser.add_argument("--since", help="Incident start as YYYYmmdd_HHMMSS (defaults to the incident id)")
+
+    verify_parser = subparsers.add_parser("verify", help="Check a bundle against its manifest")
+    verify_parser.add_argument("bundle")
+    verify_parser.add_argument("--full", action="store_true", help="Re-hash every member as well")
+
+    args = parser.parse_args()
+    if args.command == "build":
+        try:
+            opened = datetime.strptime(args.since or args.incident, "%Y%m%d_%H%M%S").timestamp()
+        except ValueError:
+            opened = None
+        print(build_bundle(args.incident, opened))
+    else:
+        result = verify_bundle(args.bundle, args.full)
+        print(f"{'OK' if result['ok'] else 'FAILED'}: {result['members']} members checked")
+        for problem in result['problems']:
+            print(f"  {problem}")
+        sys.exit(0 if result['ok'] else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+import os
+import sys
+import time
+import sqlite3
+import argparse
+import threading
+import logging
+from datetime import datetime
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+logger = logging.getLogger(__name__)
+
+CATALOG_PATH = os.path.join("Data", "evidence.db")
+AUDIO_KINDS = ("recording", "preroll")
+# File name prefixes used to classify files found by rebuild()
+KIND_PREFIXES = (
+    ("emergency_preroll_", "preroll"),
+    ("emergency_recording_", "recording"),
+    ("emergency_audio_", "recording"),
+    ("emergency_report_", "report"),
+    ("incident_", "bundle")
+)
+SCAN_DIRS = (os.path.join("Data", "Emergency"), os.path.join("Data", "Data"), os.path.join("Data", "Emergency", "Bundles"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS evidence (
+    path TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    incident TEXT,
+    started REAL NOT NULL,
+    ended REAL NOT NULL,
+    bytes INTEGER,
+    sha256 TEXT,
+    registered REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS evidence_incident ON evidence (incident, kind, started);
+CREATE INDEX IF NOT EXISTS evidence_kind_time ON evidence (kind, ended);
+CREATE INDEX IF NOT EXISTS evidence_time ON evidence (ended, started);
+CREATE INDEX IF NOT EXISTS evidence_registered ON evidence (registered);
+"""
+
+COLUMNS = ("path", "kind", "incident", "started", "ended", "bytes", "sha256", "registered")
+
+class EvidenceCatalog:
+    """Index of every evidence file, kept in SQLite (WAL mode).
+
+    Recorders register each file as they finish writing it, with its kind
+    (recording, preroll, segment, report, bundle), incident id and the time
+    span it covers. Lookups such as "newest recording" or "everything from
+    this incident" are then single index seeks, however many files have
+    accumulated on disk. The files stay the source of truth: a missing or
+    damaged catalogue can be rebuilt from the directories.
+    """
+
+    def __init__(self, path=CATALOG_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        is_new = not os.path.exists(path)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")  # The catalogue can be rebuilt from the files
+        self.conn.executescript(SCHEMA)
+        if is_new and path == CATALOG_PATH:
+            self.rebuild()  # Pick up recordings made before the catalogue existed
+
+    def register(self, path, kind, incident=None, started=None, ended=None, size=None, sha256=None):
+        """Add or update a file's entry"""
+        now = time.time()
+        ended = ended or now
+        if size is None and os.path.exists(path):
+            size = os.path.getsize(path)
+        with self.lock:
+            self.conn.execute("INSERT OR REPLACE INTO evidence (path, kind, incident, started, ended, bytes, sha256, "
+                              "registered) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                              (os.path.normpath(path), kind, incident, started or ended, ended, size, sha256, now))
+
+    def remove(self, path):
+        with self.lock:
+            self.conn.execute("DELETE FROM evidence WHERE path = ?", (os.path.normpath(path),))
+
+    def latest(self, kinds=AUDIO_KINDS, incident=None):
+        """Path of the most recently finished file of the given kinds, or None"""
+        best = None
+        with self.lock:
+            for kind in kinds:
+                # One index seek per kind; an IN (...) list would sort every match
+                if incident is None:
+                    row = self.conn.execute("SELECT path, ended FROM evidence WHERE kind = ? "
+                                            "ORDER BY ended DESC LIMIT 1", (kind,)).fetchone()
+                else:
+                    row = self.conn.execute("SELECT path, started FROM evidence WHERE incident = ? AND kind = ? "
+                                            "ORDER BY started DESC LIMIT 1", (incident, kind)).fetchone()
+                if row and (best is None or row[1] > best[1]):
+                    best = row
+        return best[0] if best else None
+
+    def for_incident(self, incident, kinds=None):
+        """Entries of one incident, oldest first"""
+        query = f"SELECT {', '.join(COLUMNS)} FROM evidence WHERE incident = ?"
+        params = [incident]
+        if kinds:
+            query += f" AND kind IN ({', '.join('?' * len(kinds))})"
+            params += list(kinds)
+        with self.lock:
+            rows = self.conn.execute(query + " ORDER BY started", params).fetchall()
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def in_range(self, since, until, kinds=None):
+        """Entries whose time span overlaps [since, until], oldest first"""
+        query = f"SELECT {', '.join(COLUMNS)} FROM evidence WHERE ended >= ? AND started <= ?"
+        params = [since, until]
+        if kinds:
+            query += f" AND kind IN ({', '.join('?' * len(kinds))})"
+            params += list(kinds)
+        with self.lock:
+            rows = self.conn.execute(query + " ORDER BY started", params).fetchall()
+        return [dict(zip(COLUMNS, row)) for row in rows]
+
+    def registered_since(self, after, kinds=None, limit=100, after_rowid=None):
+        """Entries registered after a timestamp, in registration order.
+
+        Each entry carries its 'rowid', which breaks ties between entries
+        registered at the same time (rebuild() registers a whole directory
+        at once). Paging with the last entry's 'registered' and 'rowid'
+        therefore never skips one; without `after_rowid` the timestamp
+        alone is compared.
+        """
+        query = f"SELECT {', '.join(COLUMNS)}, rowid FROM evidence WHERE "
+        if after_rowid is None:
+            query += "registered > ?"
+            params = [after]
+        else:
+            query += "(registered > ? OR (registered = ? AND rowid > ?))"
+            params = [after, after, after_rowid]
+        if kinds:
+            query += f" AND kind IN ({', '.join('?' * len(kinds))})"
+            params += list(kinds)
+        with self.lock:
+            rows = self.conn.execute(query + " ORDER BY registered, rowid LIMIT ?", params + [limit]).fetchall()
+        return [dict(zip(COLUMNS + ("rowid",), row)) for row in rows]
+
+    def count(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM evidence").fetchone()[0]
+
+    def rebuild(self, directories=SCAN_DIRS):
+        """Register the files already on disk and forget entries whose file is gone; return the number found"""
+        from Backend.SegmentRecorder import SEGMENT_DIR, load_ledger, segment_files
+
+        found = 0
+        for directory in directories:
+            if not os.path.isdir(directory):
+                continue
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if not entry.is_file():
+                        continue
+                    kind = next((kind for prefix, kind in KIND_PREFIXES if entry.name.startswith(prefix)), None)
+                    if kind is None or entry.name.endswith(".part"):
+                        continue
+                    incident = None
+                    if kind == "bundle":
+                        if not entry.name.endswith(".zip"):
+                            continue
+                        incident = entry.name[len("incident_"):-len(".zip")]
+                    stat = entry.stat()
+                    self.register(entry.path, kind, incident, ended=stat.st_mtime, size=stat.st_size)
+                    found += 1
+
+        ledger = load_ledger(SEGMENT_DIR)
+        for path, size, mtime, _ in segment_files(SEGMENT_DIR):
+            entry = ledger.get(os.path.basename(path), {})
+            started = entry.get('started')
+            ended = started + entry['frames'] / entry['sample_rate'] if started else mtime
+            self.register(path, "segment", entry.get('incident'), started, ended, size, entry.get('sha256'))
+            found += 1
+
+        with self.lock:
+            paths = [row[0] for row in self.conn.execute("SELECT path FROM evidence").fetchall()]
+        for path in paths:
+            if not os.path.exists(path):
+                self.remove(path)
+        logger.info(f"Evidence catalogue rebuilt with {found} files")
+        return found
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+evidence_catalog = None
+
+def get_evidence_catalog():
+    """Return the shared catalogue, opening it on first use"""
+    global evidence_catalog
+    if evidence_catalog is None:
+        evidence_catalog = EvidenceCatalog()
+    return evidence_catalog
+
+def register_evidence(path, kind, incident=None, started=None, ended=None, size=None, sha256=None):
+    """Record a finished evidence file; never raises, so it is safe on the recording path"""
+    try:
+        get_evidence_catalog().register(path, kind, incident, started, ended, size, sha256)
+    except Exception as e:
+        logger.error(f"Error cataloguing {path}: {e}")
+
+def forget_evidence(path):
+    """Drop a deleted file from the catalogue"""
+    try:
+        get_evidence_catalog().remove(path)
+    except Exception as e:
+        logger.error(f"Error updating evidence catalogue: {e}")
+
+def latest_audio_file():
+    """Newest alert recording or pre-roll that is still on disk"""
+    try:
+        path = get_evidence_catalog().latest(AUDIO_KINDS)
+    except Exception as e:
+        logger.error(f"Error reading evidence catalogue: {e}")
+        return None
+    return path if path and os.path.exists(path) else None
+
+def main():
+    parser = argparse.ArgumentParser(description="Evidence catalogue")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("rebuild", help="Re-index the evidence directories")
+    incident_parser = subparsers.add_parser("incident", help="List the files of an incident")
+    incident_parser.add_argument("incident")
+    subparsers.add_parser("latest", help="Show the newest alert recording")
+
+    args = parser.parse_args()
+    catalog = get_evidence_catalog()
+    if args.command == "rebuild":
+        catalog.rebuild()
+        print(f"{catalog.count()} files catalogued")
+    elif args.command == "incident":
+        for entry in catalog.for_incident(args.incident):
+            started = datetime.fromtimestamp(entry['started']).strftime("%Y-%m-%d %H:%M:%S")
+            print(f"{started}  {entry['kind']:10s} {entry['bytes'] or 0:>12}  {entry['path']}")
+    else:
+        print(latest_audio_file())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+import os
+import sys
+import argparse
+import logging
+from datetime import datetime
+import numpy as np
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Backend.DistressClassifier import mel_filterbank, dct_matrix
+from Backend.Resampler import PolyphaseResampler, DETECTION_RATE
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+logger = logging.getLogger(__name__)
+
+KEYWORDS_DIR = os.path.join("Data", "Keywords")
+FRAME_SIZE = 256  # 16 ms frames
+N_MELS = 24
+N_MFCC = 13
+MIN_SPEECH_RMS = 0.01  # Absolute floor for the speech gate
+HANGOVER_FRAMES = 10  # ~160 ms of quiet closes a segment
+MAX_SEGMENT_FRAMES = 125  # ~2 s; longer speech is matched in windows
+DEFAULT_THRESHOLD = 1.2  # Mean per-frame MFCC distance accepted as a match
+STAY_PENALTY = 0.5  # Cost of holding a segment frame for several template frames
+NOISE_TRACK_RATE = 0.05  # Noise floor update per quiet frame
+NOISE_RISE_RATE = 0.002  # Slow rise while the gate is open; steady noise closes it within seconds
+
+class KeywordSpotter:
+    """On-device spotting of a small emergency vocabulary.
+
+    Each keyword is enrolled as a few short recordings. Incoming 16 kHz audio
+    is cut into 16 ms frames and converted to MFCCs, and a simple energy gate
+    groups frames into speech segments. When a segment ends (about 160 ms of
+    quiet) it is compared against every template with a subsequence DTW that
+    only looks one template row back, so the whole dynamic programme is
+    vectorised along the segment. A match below the keyword's threshold is
+    reported straight away.
+    """
+
+    def __init__(self, words, directory=KEYWORDS_DIR, sample_rate=DETECTION_RATE):
+        self.sample_rate = sample_rate
+        self.window = np.hanning(FRAME_SIZE).astype(np.float32)
+        self.filterbank_t = mel_filterbank(sample_rate, FRAME_SIZE, N_MELS).T.copy()
+        self.dct_t = dct_matrix(N_MFCC, N_MELS)[1:].T.copy()  # c0 dropped, energy handled by the gate
+        self.templates = {}
+        self.thresholds = {}
+        self.carry = np.zeros(0, dtype=np.float32)
+        self.noise_floor = MIN_SPEECH_RMS
+        self.segment = []
+        self.quiet_frames = 0
+        for word in words:
+            self.enroll_directory(word, os.path.join(directory, word))
+
+    def mfcc(self, frames):
+        """MFCCs for an (n, FRAME_SIZE) batch of frames"""
+        power = np.abs(np.fft.rfft(frames * self.window, axis=1)) ** 2
+        return np.log(power @ self.filterbank_t + 1e-10) @ self.dct_t
+
+    def sequence(self, audio):
+        """Cepstral-mean-normalised MFCC sequence of a whole utterance"""
+        count = len(audio) // FRAME_SIZE
+        frames = audio[:count * FRAME_SIZE].reshape(count, FRAME_SIZE)
+        rms = np.sqrt((frames ** 2).mean(axis=1))
+        if not len(rms):
+            return np.zeros((0, N_MFCC - 1), dtype=np.float32)
+        # Trim leading and trailing silence so templates start on the word
+        voiced = np.flatnonzero(rms > max(MIN_SPEECH_RMS, rms.max() * 0.1))
+        if len(voiced):
+            frames = frames[voiced[0]:voiced[-1] + 1]
+        features = self.mfcc(frames)
+        return features - features.mean(axis=0)
+
+    def enroll(self, word, audio):
+        """Add one 16 kHz mono recording of `word` as a template"""
+        template = self.sequence(np.asarray(audio, dtype=np.float32))
+        if len(template) < 3:
+            logger.warning(f"Template for '{word}' is too short, skipping")
+            return
+        self.templates.setdefault(word, []).append(template)
+
+        # Accept anything closer than the enrolled takes are to each other
+        templates = self.templates[word]
+        if len(templates) > 1:
+            spread = max(dtw_distance(a, b) for a in templates for b in templates if a is not b)
+            self.thresholds[word] = float(max(DEFAULT_THRESHOLD, spread * 1.2))
+        else:
+            self.thresholds[word] = DEFAULT_THRESHOLD
+
+    def enroll_directory(self, word, folder):
+        """Enroll every recording in a keyword folder"""
+        if not os.path.isdir(folder):
+            return
+        import soundfile as sf
+
+        for filename in sorted(os.listdir(folder)):
+            if not filename.lower().endswith(('.wav', '.flac', '.ogg')):
+                continue
+            try:
+                audio, rate = sf.read(os.path.join(folder, filename), dtype='float32', always_2d=True)
+                mono = audio.mean(axis=1)
+                if rate != self.sample_rate:
+                    mono = PolyphaseResampler(rate, self.sample_rate).process(mono)
+                self.enroll(word, mono)
+            except Exception as e:
+                logger.error(f"Error loading keyword template {filename}: {e}")
+        if word in self.templates:
+            logger.info(f"Keyword '{word}': {len(self.templates[word])} templates")
+
+    def has_templates(self):
+        """True if at least one keyword has been enrolled"""
+        return bool(self.templates)
+
+    def process(self, samples):
+        """Feed 16 kHz mono audio (float32 or int16); return the keywords spotted in it"""
+        samples = np.asarray(samples).reshape(-1)
+        if samples.dtype == np.int16:
+            samples = samples.astype(np.float32) * np.float32(1.0 / 32768.0)
+        samples = samples.astype(np.float32, copy=False)
+        if len(self.carry):
+            samples = np.concatenate((self.carry, samples))
+        count = len(samples) // FRAME_SIZE
+        self.carry = samples[count * FRAME_SIZE:].copy()
+        if not count:
+            return []
+
+        frames = samples[:count * FRAME_SIZE].reshape(count, FRAME_SIZE)
+        rms = np.sqrt((frames ** 2).mean(axis=1))
+        features = self.mfcc(frames)
+
+        spotted = []
+        for level, feature in zip(rms, features):
+            if level > max(MIN_SPEECH_RMS, self.noise_floor * 3):
+                # Creep up towards loud audio, so a fan or traffic that starts
+                # mid-stream eventually closes the gate instead of holding it open
+                self.noise_floor += NOISE_RISE_RATE * (level - self.noise_floor)
+                self.segment.append(feature)
+                self.quiet_frames = 0
+            else:
+                # Track the background level while nobody is speaking
+                self.noise_floor += NOISE_TRACK_RATE * (max(level, 1e-4) - self.noise_floor)
+                if self.segment:
+                    self.quiet_frames += 1
+            if self.segment and (self.quiet_frames >= HANGOVER_FRAMES or len(self.segment) >= MAX_SEGMENT_FRAMES):
+                spotted.extend(self.match(np.array(self.segment)))
+                self.segment = []
+                self.quiet_frames = 0
+        return spotted
+
+    def match(self, segment):
+        """Return the keywords whose templates occur inside a speech segment"""
+        segment = segment - segment.mean(axis=0)
+        found = []
+        for word, templates in self.templates.items():
+            distance = min(dtw_distance(template, segment) for template in templates)
+            logger.debug(f"Keyword '{word}' distance {distance:.2f}")
+            if distance <= self.thresholds[word]:
+                logger.info(f"Keyword spotted: '{word}' (distance {distance:.2f})")
+                found.append(word)
+        return found
+
+    def reset(self):
+        """Drop any partial frame or open segment"""
+        self.carry = np.zeros(0, dtype=np.float32)
+        self.segment = []
+        self.quiet_frames = 0
+
+def dtw_distance(template, segment):
+    """Subsequence DTW: mean frame distance of the best placement of template in segment.
+
+    Every step advances the template by one frame and the segment by 0, 1 or
+    2 frames, so row i only depends on row i - 1 and is computed in one
+    vectorised operation.
+    """
+    if len(segment) == 0:
+        return np.inf
+    cost = np.sqrt(((template[:, None, :] - segment[None, :, :]) ** 2).mean(axis=2))
+    row = cost[0].copy()  # Free start anywhere in the segment
+    for i in range(1, len(template)):
+        best = row + STAY_PENALTY
+        best[1:] = np.minimum(best[1:], row[:-1])
+        best[2:] = np.minimum(best[2:], row[:-2])
+        row = cost[i] + best
+    return row.min() / len(template)
+
+def record_templates(word, count=3, seconds=1.5, directory=KEYWORDS_DIR):
+    """Record keyword templates from the microphone"""
+    import sounddevice as sd
+    import soundfile as sf
+
+    folder = os.path.join(directory, word)
+    os.makedirs(folder, exist_ok=True)
+    for take in range(count):
+        input(f"Press Enter and say '{word}' ({take + 1}/{count})...")
+        audio = sd.rec(int(seconds * DETECTION_RATE), samplerate=DETECTION_RATE, channels=1, dtype='float32')
+        sd.wait()
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filepath = os.path.join(folder, f"{word}_{timestamp}_{take}.wav")
+        sf.write(filepath, audio, DETECTION_RATE)
+        logger.info(f"Template saved to {filepath}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage offline emergency keyword templates")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    enroll_parser = subparsers.add_parser("enroll", help="record templates for a keyword")
+    enroll_parser.add_argument("word")
+    enroll_parser.add_argument("--count", type=int, default=3)
+    enroll_parser.add_argument("--seconds", type=float, default=1.5)
+    subparsers.add_parser("list", help="show enrolled keywords")
+    args = parser.parse_args(argv)
+
+    if args.command == "enroll":
+        record_templates(args.word, args.count, args.seconds)
+    else:
+        words = sorted(os.listdir(KEYWORDS_DIR)) if os.path.isdir(KEYWORDS_DIR) else []
+        spotter = KeywordSpotter(words)
+        for word in words:
+            print(f"{word}: {len(spotter.templates.get(word, []))} templates, threshold {spotter.thresholds.get(word, 0):.2f}")
+
+if __name__ == "__main__":
+    main()
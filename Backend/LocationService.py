@@ -0,0 +1,146 @@
+import os
+import json
+import math
+import time
+import threading
+import logging
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+logger = logging.getLogger(__name__)
+
+STATE_FILE = os.path.join("Data", "last_location.json")
+REFRESH_INTERVAL = 300  # Seconds between background refreshes
+RETRY_INTERVAL = 30  # Seconds before retrying after a failed refresh
+UNKNOWN_LOCATION = {'address': "Unknown", 'coordinates': None}
+
+def distance_m(first, second):
+    """Great-circle distance in metres between two (lat, lng) pairs"""
+    lat1, lng1 = map(math.radians, first)
+    lat2, lng2 = map(math.radians, second)
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * 6371000.0 * math.asin(min(1.0, math.sqrt(h)))
+
+def ip_location():
+    """Look up the current location from the public IP address"""
+    import geocoder
+
+    g = geocoder.ip('me')
+    if not g.ok or g.lat is None:
+        return None
+    return {
+        'address': g.address or f"{g.city}, {g.state}, {g.country}",
+        'coordinates': (g.lat, g.lng),
+        'source': 'ip'
+    }
+
+class LocationService:
+    """Keeps the last good location fix fresh in the background.
+
+    A daemon thread calls the provider every `refresh_interval` seconds (and
+    sooner after a failure), so the alert path never waits on the network:
+    get_location() just returns the cached fix with its age. A failed
+    refresh keeps the previous fix, and the last fix is saved to disk so it
+    survives a restart.
+    """
+
+    def __init__(self, provider=ip_location, refresh_interval=REFRESH_INTERVAL, retry_interval=RETRY_INTERVAL,
+                 state_file=STATE_FILE):
+        self.provider = provider
+        self.refresh_interval = refresh_interval
+        self.retry_interval = retry_interval
+        self.state_file = state_file
+        self.fix = self._load()
+        self.wakeup = threading.Event()
+        self.thread = None
+        self.running = False
+        self.failures = 0
+
+    def _load(self):
+        """Read the last saved fix"""
+        try:
+            if self.state_file and os.path.exists(self.state_file):
+                with open(self.state_file, 'r', encoding='utf-8') as file:
+                    fix = json.load(file)
+                if fix.get('coordinates'):
+                    fix['coordinates'] = tuple(fix['coordinates'])
+                return fix
+        except Exception as e:
+            logger.error(f"Error loading last location: {e}")
+        return None
+
+    def _save(self, fix):
+        try:
+            os.makedirs(os.path.dirname(self.state_file) or ".", exist_ok=True)
+            with open(self.state_file, 'w', encoding='utf-8') as file:
+                json.dump(fix, file)
+        except Exception as e:
+            logger.error(f"Error saving last location: {e}")
+
+    def start(self):
+        """Start refreshing in the background"""
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run)
+        self.thread.daemon = True
+        self.thread.start()
+        logger.info("Location service started")
+
+    def _run(self):
+        while self.running:
+            interval = self.refresh_interval if self.refresh() else self.retry_interval
+            self.wakeup.wait(interval)
+            self.wakeup.clear()
+
+    def refresh(self):
+        """Ask the provider for a new fix; keep the old one if that fails"""
+        try:
+            fix = self.provider()
+        except Exception as e:
+            fix = None
+            logger.error(f"Error refreshing location: {e}")
+        if not fix:
+            self.failures += 1
+            return False
+        self.update(fix)
+        self.failures = 0
+        return True
+
+    def update(self, fix):
+        """Store a new fix from any source"""
+        fix = dict(fix)
+        fix.setdefault('timestamp', time.time())
+        self.fix = fix  # Replacing the reference keeps readers lock-free
+        if self.state_file:
+            self._save(fix)
+
+    def refresh_now(self):
+        """Wake the background thread for an immediate refresh"""
+        self.wakeup.set()
+
+    def get_location(self):
+        """Return the cached fix with its age in seconds, or UNKNOWN_LOCATION if there has never been one"""
+        if not self.running:
+            self.start()
+        fix = self.fix
+        if fix is None:
+            return dict(UNKNOWN_LOCATION, age=None)
+        location = dict(fix)
+        location['age'] = time.time() - fix['timestamp']
+        return location
+
+    def stop(self):
+        self.running = False
+        self.wakeup.set()
+
+# Create a global instance
+location_service = LocationService()
+
+def get_location_service():
+    """Return the shared location service"""
+    return location_service
+
+def get_location():
+    """Return the latest cached location without touching the network"""
+    return location_service.get_location()
@@ -0,0 +1,152 @@
+import time
+import threading
+import logging
+from Backend.LocationService import get_location_service, distance_m
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+logger = logging.getLogger(__name__)
+
+SAMPLE_INTERVAL = 30  # Seconds between location samples while an incident is open
+MIN_DISTANCE_M = 150  # Movement that triggers an update
+MAX_INTERVAL = 600  # Seconds after which an update is sent even without movement
+MAX_INCIDENT_DURATION = 4 * 3600  # Incidents close themselves after this long
+
+def send_location_update(location, moved_m, elapsed):
+    """Default notifier: queue a location update for all contacts"""
+    from Backend.WhatsAppAutomation import send_location_update as send
+    return send(location, moved_m, elapsed)
+
+class LocationTracker:
+    """Follows the location while an incident is open and reports meaningful changes.
+
+    While tracking, the location service refreshes every `sample_interval`
+    seconds. An update goes out only when the position has moved at least
+    `min_distance` metres from the last reported one, or when `max_interval`
+    seconds have passed since the last report, so a long incident in one
+    place costs one message every few minutes rather than one per sample.
+    Every sample is kept in `trail` for the incident's evidence bundle.
+    """
+
+    def __init__(self, service=None, notify=send_location_update, sample_interval=SAMPLE_INTERVAL,
+                 min_distance=MIN_DISTANCE_M, max_interval=MAX_INTERVAL, max_duration=MAX_INCIDENT_DURATION):
+        self.service = service
+        self.notify = notify
+        self.sample_interval = sample_interval
+        self.min_distance = min_distance
+        self.max_interval = max_interval
+        self.max_duration = max_duration
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.active = False
+        self.opened_at = None
+        self.last_sent = None
+        self.last_sent_time = None
+        self.saved_interval = None
+        self.stats = {}
+        self.trail = []
+
+    def open_incident(self, location=None):
+        """Start tracking; `location` is the fix already sent with the alert"""
+        with self.lock:
+            if self.active:
+                return False
+            self.service = self.service or get_location_service()
+            self.active = True
+            self.opened_at = time.time()
+            self.last_sent = location.get('coordinates') if location else None
+            self.last_sent_time = self.opened_at
+            self.stats = {'samples': 0, 'updates': 0, 'suppressed': 0}
+            self.trail = []
+            if location:
+                self._add_to_trail(location, sent=True)
+
+            # Sample faster than the idle refresh schedule while the incident lasts
+            self.saved_interval = self.service.refresh_interval
+            self.service.refresh_interval = min(self.service.refresh_interval, self.sample_interval)
+            self.service.start()
+            self.service.refresh_now()
+
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self._run)
+            self.thread.daemon = True
+            self.thread.start()
+        logger.info("Incident opened, live location tracking started")
+        return True
+
+    def _run(self):
+        while not self.stop_event.wait(self.sample_interval):
+            try:
+                if time.time() - self.opened_at > self.max_duration:
+                    logger.info("Incident reached its maximum duration")
+                    break
+                self.sample()
+            except Exception as e:
+                logger.error(f"Error tracking location: {e}")
+        self._finish()
+
+    def sample(self):
+        """Check the current fix and send an update if it is due"""
+        location = self.service.get_location()
+        coordinates = location.get('coordinates')
+        self.stats['samples'] += 1
+        if not coordinates:
+            return False
+        point = self._add_to_trail(location, sent=False)
+
+        now = time.time()
+        moved = distance_m(self.last_sent, coordinates) if self.last_sent else None
+        elapsed = now - self.last_sent_time
+        if moved is not None and moved < self.min_distance and elapsed < self.max_interval:
+            self.stats['suppressed'] += 1
+            return False
+
+        if self.notify(location, moved, elapsed):
+            point['sent'] = True
+            self.last_sent = coordinates
+            self.last_sent_time = now
+            self.stats['updates'] += 1
+            logger.info(f"Location update sent (moved {moved or 0:.0f} m, {elapsed:.0f}s since last)")
+            return True
+        return False
+
+    def _add_to_trail(self, location, sent):
+        point = {'time': time.time(), 'coordinates': location.get('coordinates'),
+                 'address': location.get('address'), 'age': location.get('age'), 'sent': sent}
+        self.trail.append(point)
+        return point
+
+    def close_incident(self):
+        """Stop tracking"""
+        if not self.active:
+            return False
+        self.stop_event.set()
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout=5)
+        self._finish()
+        return True
+
+    def _finish(self):
+        with self.lock:
+            if not self.active:
+                return
+            self.active = False
+            if self.saved_interval is not None:
+                self.service.refresh_interval = self.saved_interval
+        logger.info(f"Incident closed, location tracking stopped: {self.stats}")
+
+# Create a global instance
+location_tracker = LocationTracker()
+
+def open_incident(location=None):
+    """Begin live location tracking for a new incident"""
+    return location_tracker.open_incident(location)
+
+def close_incident():
+    """End live location tracking"""
+    return location_tracker.close_incident()
+
+def get_location_trail():
+    """Locations sampled during the current or most recent incident"""
+    return list(location_tracker.trail)
@@ -0,0 +1,92 @@
+import logging
+from math import gcd
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+logger = logging.getLogger(__name__)
+
+DETECTION_RATE = 16000  # Sample rate every detector works at
+
+class PolyphaseResampler:
+    """Streaming rational resampler (up / down) built on a polyphase FIR.
+
+    A Kaiser-windowed low-pass is designed once and split into `up` phases of
+    `taps_per_phase` coefficients. Each output sample then costs only
+    `taps_per_phase` multiply-adds on the original input, and a block's worth
+    of outputs is computed with one einsum. The last input samples are kept
+    between calls so consecutive blocks join without clicks.
+    """
+
+    def __init__(self, in_rate=44100, out_rate=DETECTION_RATE, taps_per_phase=48, beta=6.0):
+        divisor = gcd(in_rate, out_rate)
+        self.up = out_rate // divisor
+        self.down = in_rate // divisor
+        self.taps = taps_per_phase
+
+        # Low-pass just under the lower Nyquist rate, relative to the upsampled rate
+        length = self.up * taps_per_phase
+        cutoff = 0.45 / max(self.up, self.down)
+        n = np.arange(length) - (length - 1) / 2.0
+        h = 2 * cutoff * np.sinc(2 * cutoff * n) * np.kaiser(length, beta) * self.up
+
+        # phases[p, j] pairs with input x[i - (taps - 1) + j] for phase p
+        self.phases = h.reshape(taps_per_phase, self.up).T[:, ::-1].astype(np.float32)
+        self.history = np.zeros(taps_per_phase - 1, dtype=np.float32)
+        self.consumed = 0  # Input samples seen before the current block
+        self.produced = 0  # Output samples emitted so far
+
+    def process(self, samples):
+        """Resample a block of mono float32 samples"""
+        samples = np.asarray(samples, dtype=np.float32)
+        extended = np.concatenate((self.history, samples))
+        total = self.consumed + len(samples)
+
+        # Every output whose newest input sample has arrived can be computed
+        end = (total * self.up + self.down - 1) // self.down
+        outputs = np.arange(self.produced, end, dtype=np.int64)
+        positions = outputs * self.down
+        windows = sliding_window_view(extended, self.taps)[positions // self.up - self.consumed]
+        result = np.einsum('ij,ij->i', windows, self.phases[positions % self.up])
+
+        self.history = extended[len(extended) - (self.taps - 1):].copy()
+        self.consumed = total
+        self.produced = end
+        return result
+
+    def reset(self):
+        """Forget the stream history"""
+        self.history[:] = 0
+        self.consumed = 0
+        self.produced = 0
+
+class DetectionStream:
+    """Capture-side stage that turns full-rate interleaved audio into 16 kHz mono.
+
+    The downmix and resample happen once here, and every detector consumes
+    the reduced stream. Evidence recording keeps tapping the full-rate audio.
+    """
+
+    def __init__(self, in_rate=44100, channels=2, out_rate=DETECTION_RATE):
+        self.in_rate = in_rate
+        self.channels = channels
+        self.sample_rate = out_rate
+        self.resampler = PolyphaseResampler(in_rate, out_rate) if in_rate != out_rate else None
+
+    def process(self, block):
+        """Downmix an interleaved int16 (or float) block and resample it to 16 kHz"""
+        block = np.asarray(block)
+        scale = np.float32(1.0 / 32768.0 if block.dtype == np.int16 else 1.0)
+        if self.channels > 1:
+            mono = block.reshape(-1, self.channels).mean(axis=1, dtype=np.float32) * scale
+        else:
+            mono = block.astype(np.float32) * scale
+        if self.resampler is None:
+            return mono
+        return self.resampler.process(mono)
+
+    def reset(self):
+        """Forget the stream history"""
+        if self.resampler:
+            self.resampler.reset()
@@ -0,0 +1,253 @@
+import os
+import sys
+import csv
+import math
+import argparse
+import logging
+import numpy as np
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+logger = logging.getLogger(__name__)
+
+INDEX_DIR = os.path.join("Data", "Gazetteer")
+EARTH_RADIUS_KM = 6371.0
+LEAF_SIZE = 16  # Points scanned with one vectorised distance computation
+NAME_COLUMNS = ("name", "asciiname", "city", "place", "place_name", "town")
+LAT_COLUMNS = ("lat", "latitude")
+LON_COLUMNS = ("lon", "lng", "long", "longitude")
+
+def to_unit_vectors(lat, lon):
+    """Latitude/longitude in degrees to points on the unit sphere, so straight-line distance orders like great-circle distance"""
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    return np.stack((np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)), axis=-1)
+
+def chord_to_km(squared_chord):
+    """Great-circle distance for a squared straight-line distance between unit vectors"""
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(squared_chord) / 2))
+
+def maps_url(coordinates):
+    """Maps link that points at the coordinates themselves"""
+    if not coordinates or coordinates[0] is None:
+        return None
+    return f"https://www.google.com/maps?q={coordinates[0]:.6f},{coordinates[1]:.6f}"
+
+def build_tree(points):
+    """Reorder points into an implicit KD-tree; return (order, axes).
+
+    Every node covering [lo, hi) keeps its median at mid = (lo + hi) // 2,
+    with smaller values along the split axis on the left. The split axis of
+    each node is stored at its mid index, so the tree needs no pointers and
+    can be memory-mapped straight from disk.
+    """
+    count = len(points)
+    order = np.arange(count)
+    axes = np.full(count, -1, dtype=np.int8)
+    stack = [(0, count)]
+    while stack:
+        lo, hi = stack.pop()
+        if hi - lo <= LEAF_SIZE:
+            continue
+        block = points[order[lo:hi]]
+        axis = int(np.argmax(block.max(axis=0) - block.min(axis=0)))
+        mid = (lo + hi) // 2
+        partition = np.argpartition(block[:, axis], mid - lo)
+        order[lo:hi] = order[lo:hi][partition]
+        axes[mid] = axis
+        stack.append((lo, mid))
+        stack.append((mid + 1, hi))
+    return order, axes
+
+def find_column(header, requested, candidates):
+    """Index of a CSV column given by name or number, or guessed from common names"""
+    if requested is not None:
+        if str(requested).isdigit():
+            return int(requested)
+        return [column.strip().lower() for column in header].index(requested.lower())
+    lowered = [column.strip().lower() for column in header]
+    for candidate in candidates:
+        if candidate in lowered:
+            return lowered.index(candidate)
+    raise ValueError(f"None of the columns {candidates} found in {header}")
+
+def build_index(csv_path, out_dir=INDEX_DIR, name_column=None, lat_column=None, lon_column=None,
+                extra_columns=(), delimiter=",", has_header=True):
+    """Build the on-disk index from any CSV gazetteer.
+
+    Columns may be given by header name or zero-based number; name, latitude
+    and longitude are guessed from common header names otherwise. Values of
+    `extra_columns` (e.g. region, country) are appended to the place name.
+    """
+    names, lats, lons = [], [], []
+    with open(csv_path, 'r', encoding='utf-8', newline='') as file:
+        reader = csv.reader(file, delimiter=delimiter)
+        header = next(reader) if has_header else []
+        name_index = find_column(header, name_column, NAME_COLUMNS if has_header else ())
+        lat_index = find_column(header, lat_column, LAT_COLUMNS if has_header else ())
+        lon_index = find_column(header, lon_column, LON_COLUMNS if has_header else ())
+        extra_indexes = [find_column(header, column, ()) for column in extra_columns]
+
+        for row in reader:
+            try:
+                lat, lon = float(row[lat_index]), float(row[lon_index])
+            except (ValueError, IndexError):
+                continue
+            parts = [row[name_index]] + [row[index] for index in extra_indexes if index < len(row) and row[index]]
+            names.append(", ".join(part.strip() for part in parts if part.strip()))
+            lats.append(lat)
+            lons.append(lon)
+
+    if not names:
+        raise ValueError(f"No usable rows in {csv_path}")
+
+    points = to_unit_vectors(lats, lons)
+    order, axes = build_tree(points)
+
+    encoded = [names[index].encode('utf-8') for index in order]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(name) for name in encoded])
+
+    os.makedirs(out_dir, exist_ok=True)
+    np.save(os.path.join(out_dir, "points.npy"), points[order].astype(np.float32))
+    np.save(os.path.join(out_dir, "coords.npy"), np.column_stack((lats, lons))[order].astype(np.float32))
+    np.save(os.path.join(out_dir, "axes.npy"), axes)
+    np.save(os.path.join(out_dir, "offsets.npy"), offsets)
+    with open(os.path.join(out_dir, "names.bin"), 'wb') as file:
+        file.write(b"".join(encoded))
+    logger.info(f"Indexed {len(encoded)} places into {out_dir}")
+    return len(encoded)
+
+class ReverseGeocoder:
+    """Nearest-place lookups against the memory-mapped gazetteer index.
+
+    All arrays are opened with mmap, so start-up is instant and only the
+    pages a query touches are read. A query walks the implicit KD-tree,
+    pruning branches whose splitting plane is further away than the best
+    match so far, and scans leaves of LEAF_SIZE points in one numpy step.
+    """
+
+    def __init__(self, directory=INDEX_DIR):
+        self.directory = directory
+        # Plain ndarray views over the mapped files avoid np.memmap's per-index overhead
+        self.points = self._map("points.npy")
+        self.coords = self._map("coords.npy")
+        self.axes = self._map("axes.npy")
+        self.offsets = self._map("offsets.npy")
+        self.names = np.asarray(np.memmap(os.path.join(directory, "names.bin"), dtype=np.uint8, mode='r')) \
+            if self.offsets[-1] else np.zeros(0, dtype=np.uint8)
+
+    def _map(self, filename):
+        return np.asarray(np.load(os.path.join(self.directory, filename), mmap_mode='r'))
+
+    def __len__(self):
+        return len(self.points)
+
+    def name(self, index):
+        return bytes(self.names[self.offsets[index]:self.offsets[index + 1]]).decode('utf-8')
+
+    def nearest_index(self, lat, lon):
+        """Return (index, squared chord distance) of the closest place"""
+        query = to_unit_vectors(lat, lon)
+        qx, qy, qz = query.tolist()
+        best_index, best_distance = -1, float('inf')
+        stack = [(0, len(self.points), 0.0)]
+        while stack:
+            lo, hi, bound = stack.pop()
+            if bound >= best_distance:
+                continue
+            if hi - lo <= LEAF_SIZE:
+                distances = ((self.points[lo:hi] - query) ** 2).sum(axis=1)
+                index = int(np.argmin(distances))
+                if distances[index] < best_distance:
+                    best_index, best_distance = lo + index, float(distances[index])
+                continue
+
+            # Internal nodes are handled with plain floats; numpy calls cost more than the arithmetic
+            mid = (lo + hi) // 2
+            px, py, pz = self.points[mid].tolist()
+            distance = (px - qx) ** 2 + (py - qy) ** 2 + (pz - qz) ** 2
+            if distance < best_distance:
+                best_index, best_distance = mid, distance
+
+            axis = self.axes[mid]
+            offset = (qx - px) if axis == 0 else (qy - py) if axis == 1 else (qz - pz)
+            near, far = ((lo, mid), (mid + 1, hi)) if offset < 0 else ((mid + 1, hi), (lo, mid))
+            stack.append((far[0], far[1], offset * offset))
+            stack.append((near[0], near[1], 0.0))
+        return best_index, best_distance
+
+    def nearest(self, lat, lon):
+        """Closest place as {name, coordinates, distance_km}"""
+        index, distance = self.nearest_index(lat, lon)
+        return {
+            'name': self.name(index),
+            'coordinates': (float(self.coords[index][0]), float(self.coords[index][1])),
+            'distance_km': chord_to_km(distance)
+        }
+
+    def describe(self, coordinates):
+        """Short human-readable description of where the coordinates are"""
+        place = self.nearest(*coordinates)
+        if place['distance_km'] < 1:
+            return place['name']
+        return f"{place['distance_km']:.1f} km from {place['name']}"
+
+_reverse_geocoder = None
+
+def get_reverse_geocoder():
+    """Return the shared index, or None if it has not been built"""
+    global _reverse_geocoder
+    if _reverse_geocoder is None and os.path.exists(os.path.join(INDEX_DIR, "points.npy")):
+        try:
+            _reverse_geocoder = ReverseGeocoder(INDEX_DIR)
+        except Exception as e:
+            logger.error(f"Error loading gazetteer index: {e}")
+    return _reverse_geocoder
+
+def describe_location(location):
+    """Place name for a location fix, falling back to its own address"""
+    coordinates = location.get('coordinates') if location else None
+    geocoder = get_reverse_geocoder()
+    if geocoder and coordinates and coordinates[0] is not None:
+        try:
+            return geocoder.describe(coordinates)
+        except Exception as e:
+            logger.error(f"Error reverse geocoding {coordinates}: {e}")
+    return location.get('address', "Unknown") if location else "Unknown"
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline reverse geocoding index")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Build the index from a CSV gazetteer")
+    build_parser.add_argument("csv")
+    build_parser.add_argument("--out", default=INDEX_DIR)
+    build_parser.add_argument("--name-column")
+    build_parser.add_argument("--lat-column")
+    build_parser.add_argument("--lon-column")
+    build_parser.add_argument("--extra-columns", default="", help="Comma-separated columns appended to the name")
+    build_parser.add_argument("--delimiter", default=",", help="Use '\\t' for tab-separated files such as GeoNames")
+    build_parser.add_argument("--no-header", action="store_true", help="Columns must then be given by number")
+
+    lookup_parser = subparsers.add_parser("lookup", help="Find the place nearest to a coordinate")
+    lookup_parser.add_argument("lat", type=float)
+    lookup_parser.add_argument("lon", type=float)
+    lookup_parser.add_argument("--index", default=INDEX_DIR)
+
+    args = parser.parse_args()
+    if args.command == "build":
+        delimiter = "\t" if args.delimiter in ("\\t", "tab") else args.delimiter
+        extra = [column for column in args.extra_columns.split(",") if column]
+        build_index(args.csv, args.out, args.name_column, args.lat_column, args.lon_column, extra,
+                    delimiter, not args.no_header)
+    else:
+        geocoder = ReverseGeocoder(args.index)
+        place = geocoder.nearest(args.lat, args.lon)
+        print(f"{place['name']} ({place['distance_km']:.2f} km)  {maps_url((args.lat, args.lon))}")
+
+if __name__ == "__main__":
+    main()
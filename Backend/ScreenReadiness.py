@@ -0,0 +1,236 @@
+import os
+import sys
+import glob
+import time
+import argparse
+import logging
+import numpy as np
+import cv2
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+logger = logging.getLogger(__name__)
+
+TEMPLATE_DIR = os.path.join("Data", "Templates")
+MATCH_SCALE = 0.5  # Screenshots and templates are matched at half resolution
+MATCH_THRESHOLD = 0.8
+TEMPLATE_SCALES = (1.0, 0.8, 1.25, 0.67, 1.5)  # Covers the usual display scaling factors
+POLL_INTERVAL = 0.1
+
+# UI elements the WhatsApp automation waits for; each has a <name>.png in TEMPLATE_DIR
+ELEMENTS = ("send", "attach", "location", "live_location", "live_duration", "document")
+
+class LiveScreen:
+    """The real display, driven through pyautogui"""
+
+    def grab(self):
+        """Return (BGR screenshot, factor from screenshot pixels to click coordinates)"""
+        import pyautogui
+        shot = pyautogui.screenshot()
+        factor = pyautogui.size()[0] / shot.width
+        return cv2.cvtColor(np.asarray(shot), cv2.COLOR_RGB2BGR), factor
+
+    def click(self, x, y):
+        import pyautogui
+        pyautogui.click(x=x, y=y)
+
+class RecordedScreens:
+    """Replays screenshots from a directory in name order, for testing without a display.
+
+    Every grab() returns the next screenshot and then keeps returning the
+    last one, so a sequence recorded while WhatsApp Web loads plays back like
+    the live screen. Clicks are recorded in `clicks` instead of executed.
+    """
+
+    def __init__(self, directory):
+        self.paths = sorted(glob.glob(os.path.join(directory, "*.png")))
+        if not self.paths:
+            raise FileNotFoundError(f"No screenshots found in {directory}")
+        self.index = 0
+        self.clicks = []
+
+    def grab(self):
+        image = cv2.imread(self.paths[self.index])
+        self.index = min(self.index + 1, len(self.paths) - 1)
+        return image, 1.0
+
+    def click(self, x, y):
+        self.clicks.append((x, y))
+
+class ScreenReadiness:
+    """Waits for UI elements to appear on screen using OpenCV template matching.
+
+    Templates are small PNG crops of the buttons (see `crop` in the CLI).
+    Both the screenshot and the templates are converted to grayscale and
+    downscaled by `scale` before matching, and each template is tried at a
+    few sizes so the same crops work across display scaling settings.
+    """
+
+    def __init__(self, template_dir=TEMPLATE_DIR, source=None, scale=MATCH_SCALE, threshold=MATCH_THRESHOLD):
+        self.template_dir = template_dir
+        self.source = source or LiveScreen()
+        self.scale = scale
+        self.threshold = threshold
+        self.templates = {}
+        self.best_sizes = {}
+
+    def has_template(self, name):
+        return os.path.exists(os.path.join(self.template_dir, f"{name}.png"))
+
+    def _template(self, name):
+        """Grayscale, downscaled versions of a template at every TEMPLATE_SCALES size"""
+        if name not in self.templates:
+            image = cv2.imread(os.path.join(self.template_dir, f"{name}.png"), cv2.IMREAD_GRAYSCALE)
+            if image is None:
+                raise FileNotFoundError(f"Template {name}.png not found in {self.template_dir}")
+            variants = []
+            for size in TEMPLATE_SCALES:
+                factor = self.scale * size
+                width, height = int(image.shape[1] * factor), int(image.shape[0] * factor)
+                if width >= 4 and height >= 4:
+                    variants.append(cv2.resize(image, (width, height), interpolation=cv2.INTER_AREA))
+            self.templates[name] = variants
+        return self.templates[name]
+
+    def _prepare(self, screenshot):
+        gray = cv2.cvtColor(screenshot, cv2.COLOR_BGR2GRAY) if screenshot.ndim == 3 else screenshot
+        return cv2.resize(gray, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+
+    def locate(self, name, screenshot=None, factor=1.0):
+        """Return (x, y, score) of the element's centre in click coordinates, or None"""
+        if screenshot is None:
+            screenshot, factor = self.source.grab()
+        screen = self._prepare(screenshot)
+        variants = self._template(name)
+
+        # The size that matched last time is tried first and usually ends the search
+        order = sorted(range(len(variants)), key=lambda index: index != self.best_sizes.get(name))
+        best = None
+        for index in order:
+            template = variants[index]
+            if template.shape[0] > screen.shape[0] or template.shape[1] > screen.shape[1]:
+                continue
+            result = cv2.matchTemplate(screen, template, cv2.TM_CCOEFF_NORMED)
+            _, score, _, (left, top) = cv2.minMaxLoc(result)
+            if best is None or score > best[2]:
+                centre_x = (left + template.shape[1] / 2) / self.scale * factor
+                centre_y = (top + template.shape[0] / 2) / self.scale * factor
+                best = (int(centre_x), int(centre_y), float(score))
+                if score >= self.threshold:
+                    self.best_sizes[name] = index
+                    break
+        if best is None or best[2] < self.threshold:
+            return None
+        return best
+
+    def wait_for(self, name, timeout=10):
+        """Poll the screen until the element is visible; return its position or None"""
+        deadline = time.time() + timeout
+        while True:
+            found = self.locate(name)
+            if found or time.time() >= deadline:
+                return found
+            time.sleep(POLL_INTERVAL)
+
+    def wait_and_click(self, name, fallback=None, timeout=10, fallback_delay=2):
+        """Click the element as soon as it is visible.
+
+        Without a template for `name` this behaves like the old fixed
+        automation: sleep `fallback_delay` seconds and click `fallback`.
+        Returns False if the element never appeared.
+        """
+        if not self.has_template(name):
+            time.sleep(fallback_delay)
+            if fallback:
+                self.source.click(*fallback)
+            return True
+
+        start = time.time()
+        found = self.wait_for(name, timeout)
+        if not found:
+            logger.warning(f"'{name}' not visible after {timeout}s")
+            return False
+        self.source.click(found[0], found[1])
+        logger.info(f"Clicked '{name}' at ({found[0]}, {found[1]}) after {time.time() - start:.2f}s")
+        return True
+
+# Create a global instance
+screen_readiness = ScreenReadiness()
+
+def get_screen_readiness():
+    """Return the shared readiness detector"""
+    return screen_readiness
+
+def test_recorded(directory, template_dir=TEMPLATE_DIR, names=ELEMENTS):
+    """Locate every element in every recorded screenshot; return {screenshot: {name: (x, y, score)}}"""
+    detector = ScreenReadiness(template_dir, source=RecordedScreens(directory))
+    results = {}
+    for path in detector.source.paths:
+        screenshot = cv2.imread(path)
+        found = {}
+        for name in names:
+            if detector.has_template(name):
+                start = time.perf_counter()
+                found[name] = detector.locate(name, screenshot)
+                elapsed = (time.perf_counter() - start) * 1000
+                status = f"({found[name][0]}, {found[name][1]}) score {found[name][2]:.2f}" if found[name] else "not found"
+                print(f"{os.path.basename(path)}  {name:14s} {status}  [{elapsed:.1f} ms]")
+        results[path] = found
+    return results
+
+def record_screens(directory, count=20, interval=0.5):
+    """Save a sequence of screenshots for building templates and replay tests"""
+    os.makedirs(directory, exist_ok=True)
+    source = LiveScreen()
+    for index in range(count):
+        screenshot, _ = source.grab()
+        cv2.imwrite(os.path.join(directory, f"screen_{index:03d}.png"), screenshot)
+        time.sleep(interval)
+    print(f"Saved {count} screenshots to {directory}")
+
+def crop_template(screenshot, name, x, y, width, height, template_dir=TEMPLATE_DIR):
+    """Cut a template for `name` out of a recorded screenshot"""
+    image = cv2.imread(screenshot)
+    if image is None:
+        raise FileNotFoundError(screenshot)
+    os.makedirs(template_dir, exist_ok=True)
+    path = os.path.join(template_dir, f"{name}.png")
+    cv2.imwrite(path, image[y:y + height, x:x + width])
+    print(f"Saved template {path}")
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description="Screen readiness templates for the WhatsApp automation")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    test_parser = subparsers.add_parser("test", help="Match the templates against recorded screenshots")
+    test_parser.add_argument("directory")
+    test_parser.add_argument("--templates", default=TEMPLATE_DIR)
+
+    record_parser = subparsers.add_parser("record", help="Record screenshots of the live screen")
+    record_parser.add_argument("directory")
+    record_parser.add_argument("--count", type=int, default=20)
+    record_parser.add_argument("--interval", type=float, default=0.5)
+
+    crop_parser = subparsers.add_parser("crop", help="Cut a template out of a screenshot")
+    crop_parser.add_argument("screenshot")
+    crop_parser.add_argument("name", choices=ELEMENTS)
+    crop_parser.add_argument("x", type=int)
+    crop_parser.add_argument("y", type=int)
+    crop_parser.add_argument("width", type=int)
+    crop_parser.add_argument("height", type=int)
+    crop_parser.add_argument("--templates", default=TEMPLATE_DIR)
+
+    args = parser.parse_args()
+    if args.command == "test":
+        test_recorded(args.directory, args.templates)
+    elif args.command == "record":
+        record_screens(args.directory, args.count, args.interval)
+    else:
+        crop_template(args.screenshot, args.name, args.x, args.y, args.width, args.height, args.templates)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,441 @@
+import io
+import os
+import sys
+import json
+import time
+import queue
+import hashlib
+import inspect
+import argparse
+import threading
+import logging
+import numpy as np
+import soundfile as sf
+from datetime import datetime
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Backend.EvidenceCatalog import register_evidence, forget_evidence
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+logger = logging.getLogger(__name__)
+
+SEGMENT_DIR = os.path.join("Data", "Emergency", "Segments")
+SEGMENT_SECONDS = 30  # Length of each evidence segment
+SEGMENT_FORMAT = "FLAC"  # "FLAC" (lossless) or "OGG" (Vorbis, smaller)
+OGG_QUALITY = 0.5  # Vorbis quality between 0 (smallest) and 1 (best)
+ENCODE_QUEUE_SEGMENTS = 3  # Finished segments allowed to wait for the encoder
+QUOTA_BYTES = 1024 ** 3  # Disk space the segments may use
+MAX_INCIDENT_RECORDING = 3600  # Seconds an incident is recorded if nothing closes it
+ROLLING_RECORDING = False  # Keep recording between incidents so the quota holds a rolling history
+FORMATS = {"FLAC": ("flac", "PCM_16"), "OGG": ("ogg", "VORBIS"), "WAV": ("wav", "PCM_16")}
+FALLBACK_FORMAT = "WAV"  # Written when the configured format cannot be encoded, so no audio is lost
+# soundfile only accepts compression_level from 0.13 on; Requirements.txt pins 0.12.1
+COMPRESSION_LEVEL_SUPPORTED = "compression_level" in inspect.signature(sf.SoundFile.__init__).parameters
+LEDGER_NAME = "segments.jsonl"  # Hash and timing of every segment, appended as it is written
+INCIDENT_PREFIX = "incident_"
+SEGMENT_PREFIX = "segment_"
+
+def segment_files(directory=SEGMENT_DIR):
+    """Finished segments as (path, size, mtime, is_incident), oldest first"""
+    if not os.path.isdir(directory):
+        return []
+    extensions = tuple("." + extension for extension, _ in FORMATS.values())
+    files = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.endswith(extensions):
+                stat = entry.stat()
+                files.append((entry.path, stat.st_size, stat.st_mtime, entry.name.startswith(INCIDENT_PREFIX)))
+    files.sort(key=lambda item: item[2])
+    return files
+
+def load_ledger(directory=SEGMENT_DIR):
+    """Ledger entries of the segments written to a directory, by file name"""
+    entries = {}
+    path = os.path.join(directory, LEDGER_NAME)
+    if not os.path.exists(path):
+        return entries
+    with open(path, 'r', encoding='utf-8') as file:
+        for line in file:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            entries[entry['file']] = entry
+    return entries
+
+class RetentionManager:
+    """Keeps the segment directory under a disk quota.
+
+    The oldest segments recorded outside an incident are deleted first.
+    Incident segments are evidence, so they are only deleted when
+    `evict_incidents` is set; otherwise the overrun is logged and left for
+    the user to deal with.
+    """
+
+    def __init__(self, directory=SEGMENT_DIR, quota_bytes=QUOTA_BYTES, evict_incidents=False):
+        self.directory = directory
+        self.quota_bytes = quota_bytes
+        self.evict_incidents = evict_incidents
+        self.evicted = 0
+        self.evicted_bytes = 0
+
+    def usage(self):
+        """Bytes used by incident and other segments"""
+        files = segment_files(self.directory)
+        return {
+            'incident': sum(size for _, size, _, incident in files if incident),
+            'other': sum(size for _, size, _, incident in files if not incident),
+            'files': len(files)
+        }
+
+    def enforce(self):
+        """Delete segments until the directory fits the quota; return the deleted paths"""
+        files = segment_files(self.directory)
+        total = sum(size for _, size, _, _ in files)
+        if total <= self.quota_bytes:
+            return []
+
+        candidates = [item for item in files if not item[3]]
+        if self.evict_incidents:
+            candidates += [item for item in files if item[3]]
+        evicted = []
+        for path, size, _, _ in candidates:
+            if total <= self.quota_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError as e:
+                logger.error(f"Error deleting segment {path}: {e}")
+                continue
+            forget_evidence(path)
+            total -= size
+            evicted.append(path)
+            self.evicted += 1
+            self.evicted_bytes += size
+
+        if total > self.quota_bytes:
+            logger.warning(f"Incident recordings use {total / 1024 ** 2:.0f} MB, "
+                           f"over the {self.quota_bytes / 1024 ** 2:.0f} MB quota")
+        if evicted:
+            logger.info(f"Retention deleted {len(evicted)} old segments")
+        return evicted
+
+class SegmentRecorder:
+    """Records the hub's full-rate stream as fixed-length compressed segments.
+
+    The capture thread only copies audio into a preallocated segment buffer.
+    Each full buffer is handed to an encoder thread through a small bounded
+    queue, written as FLAC or Ogg Vorbis, and then the retention manager
+    trims the directory back to its quota. Segments that overlap an open
+    incident are named incident_<id>_... so retention keeps them.
+
+    Each segment is encoded into memory and hashed with SHA-256 on its way
+    to disk, and the digest is appended to the directory's ledger, so the
+    integrity record never costs a second read of the audio.
+    """
+
+    def __init__(self, directory=SEGMENT_DIR, segment_seconds=SEGMENT_SECONDS, fmt=SEGMENT_FORMAT,
+                 retention=None, sample_rate=44100, channels=2):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported segment format {fmt}; use one of {list(FORMATS)}")
+        self.directory = directory
+        self.segment_seconds = segment_seconds
+        self.format = fmt
+        self.retention = retention or RetentionManager(directory)
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.encode_queue = queue.Queue(maxsize=ENCODE_QUEUE_SEGMENTS)
+        self.recording = False
+        self.capture_thread = None
+        self.encoder_thread = None
+        self.incident_id = None
+        self.incident_started = None
+        self.incident_deadline = None
+        self.segment_incident = None
+        self.cut_requested = False  # Close the current segment early so an incident ends on a boundary
+        self.pending = 0  # Segments handed off but not yet on disk
+        self.idle = threading.Condition()
+        self.last_segment = None
+        self.sequence = 0  # Keeps names unique when segments start within the same second
+        self.lock = threading.Lock()
+        self.stats = self._new_stats()
+
+    def _new_stats(self):
+        return {'segments': 0, 'audio_seconds': 0.0, 'encode_cpu': 0.0, 'raw_bytes': 0, 'encoded_bytes': 0,
+                'dropped_frames': 0}
+
+    def start(self):
+        """Start recording segments"""
+        if self.recording:
+            return False
+        os.makedirs(self.directory, exist_ok=True)
+        self.recording = True
+        self.stats = self._new_stats()
+        self.encoder_thread = threading.Thread(target=self._encode_loop)
+        self.encoder_thread.daemon = True
+        self.encoder_thread.start()
+        self.capture_thread = threading.Thread(target=self._capture)
+        self.capture_thread.daemon = True
+        self.capture_thread.start()
+        logger.info(f"Segment recording started ({self.segment_seconds}s {self.format} segments)")
+        return True
+
+    def mark_incident(self, incident_id):
+        """Name the current and following segments after an incident"""
+        with self.lock:
+            self.incident_id = incident_id
+            self.incident_started = time.time()
+            self.incident_deadline = time.time() + MAX_INCIDENT_RECORDING
+            self.segment_incident = self.segment_incident or incident_id
+
+    def clear_incident(self):
+        """End the current segment; segments started from now on are ordinary again"""
+        with self.lock:
+            self.cut_requested = self.recording and self.incident_id is not None
+            self.incident_id = None
+            self.incident_deadline = None
+
+    def wait_idle(self, timeout=30):
+        """Wait until every segment recorded so far is encoded; return False on timeout"""
+        deadline = time.time() + timeout
+        with self.idle:
+            while (self.pending or (self.cut_requested and self.recording)) and time.time() < deadline:
+                self.idle.wait(0.1)
+            return not self.pending
+
+    def _capture(self):
+        from Backend.AudioHub import get_audio_hub
+
+        hub = get_audio_hub()
+        if not hub.start():
+            self.recording = False
+            self.encode_queue.put(None)
+            return
+        subscription = hub.subscribe("segments", "full")
+        segment_frames = int(self.segment_seconds * self.sample_rate)
+        buffer, filled, started = None, 0, None
+        try:
+            while self.recording:
+                if self.incident_deadline and time.time() > self.incident_deadline:
+                    logger.info("Incident recording reached its maximum duration")
+                    self.clear_incident()
+                    if not ROLLING_RECORDING:
+                        self.recording = False
+                        break
+                if self.cut_requested:
+                    if buffer is not None and filled:
+                        self._hand_off(buffer, filled, started)
+                    buffer = None
+                    self.cut_requested = False
+                frames = subscription.read(timeout=0.1)
+                if frames is None:
+                    continue
+                while len(frames):
+                    if buffer is None:
+                        buffer = np.empty((segment_frames, self.channels), dtype=np.int16)
+                        filled, started = 0, datetime.now()
+                        with self.lock:
+                            self.segment_incident = self.incident_id
+                    count = min(len(frames), segment_frames - filled)
+                    buffer[filled:filled + count] = frames[:count]
+                    filled += count
+                    frames = frames[count:]
+                    if filled == segment_frames:
+                        self._hand_off(buffer, filled, started)
+                        buffer = None
+        except Exception as e:
+            logger.error(f"Error in segment recording: {e}")
+        finally:
+            if buffer is not None and filled:
+                self._hand_off(buffer, filled, started)
+            self.stats['dropped_frames'] = subscription.dropped_frames
+            subscription.close()
+            hub.stop()
+            self.encode_queue.put(None)
+
+    def _hand_off(self, buffer, filled, started):
+        """Queue a finished segment; blocks if the encoder is behind, which the hub counts as dropped audio"""
+        with self.lock:
+            incident = self.segment_incident
+        with self.idle:
+            self.pending += 1
+        self.encode_queue.put((buffer[:filled], started, incident))
+
+    def segment_path(self, started, incident=None, fmt=None):
+        extension = FORMATS[fmt or self.format][0]
+        stamp = f"{started.strftime('%Y%m%d_%H%M%S')}_{self.sequence:05d}"
+        if incident:
+            return os.path.join(self.directory, f"{INCIDENT_PREFIX}{incident}_{stamp}.{extension}")
+        return os.path.join(self.directory, f"{SEGMENT_PREFIX}{stamp}.{extension}")
+
+    def _encode_loop(self):
+        while True:
+            item = self.encode_queue.get()
+            if item is None:
+                break
+            try:
+                self.encode(*item)
+            except Exception as e:
+                logger.error(f"Error encoding segment: {e}")
+            finally:
+                with self.idle:
+                    self.pending -= 1
+                    self.idle.notify_all()
+
+    def encode_bytes(self, audio, fmt):
+        """Encode a segment in memory and return the file contents"""
+        options = {}
+        if fmt == "OGG" and COMPRESSION_LEVEL_SUPPORTED:
+            options['compression_level'] = 1.0 - OGG_QUALITY
+        encoded = io.BytesIO()
+        with sf.SoundFile(encoded, 'w', samplerate=self.sample_rate, channels=self.channels,
+                          format=fmt, subtype=FORMATS[fmt][1], **options) as file:
+            file.write(audio)
+        return encoded.getbuffer()
+
+    def encode(self, audio, started, incident=None):
+        """Compress one segment to disk and apply the quota; return its path"""
+        self.sequence += 1
+        fmt = self.format
+        cpu_start = time.thread_time()
+        try:
+            data = self.encode_bytes(audio, fmt)
+        except Exception as e:
+            logger.error(f"Error encoding {fmt} segment, writing {FALLBACK_FORMAT} instead: {e}")
+            fmt = FALLBACK_FORMAT
+            data = self.encode_bytes(audio, fmt)
+        digest = hashlib.sha256(data).hexdigest()
+        self.stats['encode_cpu'] += time.thread_time() - cpu_start
+        path = self.segment_path(started, incident, fmt)
+        temp_path = path + ".part"  # Only complete segments ever carry the final name
+
+        with open(temp_path, 'wb') as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+        self._record(path, digest, len(data), len(audio), started, incident)
+        register_evidence(path, "segment", incident, started.timestamp(),
+                          started.timestamp() + len(audio) / self.sample_rate, len(data), digest)
+
+        self.stats['segments'] += 1
+        self.stats['audio_seconds'] += len(audio) / self.sample_rate
+        self.stats['raw_bytes'] += audio.nbytes
+        self.stats['encoded_bytes'] += len(data)
+        self.last_segment = path
+        self.retention.enforce()
+        return path
+
+    def _record(self, path, digest, size, frames, started, incident):
+        """Append a segment's hash and timing to the ledger"""
+        entry = {'file': os.path.basename(path), 'sha256': digest, 'bytes': size, 'frames': frames,
+                 'sample_rate': self.sample_rate, 'started': started.timestamp(), 'incident': incident}
+        try:
+            with open(os.path.join(self.directory, LEDGER_NAME), 'a', encoding='utf-8') as file:
+                file.write(json.dumps(entry) + "\n")
+        except Exception as e:
+            logger.error(f"Error writing segment ledger: {e}")
+
+    def report(self):
+        """Encode cost and compression achieved so far"""
+        stats = self.stats
+        audio_seconds = stats['audio_seconds']
+        return {
+            'segments': stats['segments'],
+            'audio_seconds': round(audio_seconds, 1),
+            'encode_cpu_seconds': round(stats['encode_cpu'], 3),
+            'encode_cpu_percent': round(100 * stats['encode_cpu'] / audio_seconds, 2) if audio_seconds else None,
+            'compression_ratio': round(stats['raw_bytes'] / stats['encoded_bytes'], 2) if stats['encoded_bytes'] else None,
+            'evicted': self.retention.evicted,
+            'dropped_frames': stats['dropped_frames']
+        }
+
+    def stop(self):
+        """Stop recording, encode the partial last segment and return its path"""
+        if not self.recording:
+            return None
+        self.recording = False
+        if self.capture_thread:
+            self.capture_thread.join(timeout=5)
+        if self.encoder_thread:
+            self.encoder_thread.join(timeout=30)
+        logger.info(f"Segment recording stopped: {self.report()}")
+        return self.last_segment
+
+# Create a global instance
+segment_recorder = SegmentRecorder()
+
+def get_segment_recorder():
+    """Return the shared segment recorder"""
+    return segment_recorder
+
+def start_incident_recording(incident_id=None):
+    """Record evidence segments for a new incident and return its id"""
+    incident_id = incident_id or datetime.now().strftime("%Y%m%d_%H%M%S")
+    segment_recorder.mark_incident(incident_id)
+    segment_recorder.start()
+    return incident_id
+
+def stop_incident_recording():
+    """End the incident and return (incident id, start time) once its segments are on disk.
+
+    Recording carries on only in rolling mode.
+    """
+    incident = (segment_recorder.incident_id, segment_recorder.incident_started)
+    segment_recorder.clear_incident()
+    if ROLLING_RECORDING:
+        segment_recorder.wait_idle()
+    else:
+        segment_recorder.stop()
+    return incident
+
+def start_rolling_recording():
+    """Keep a rolling, quota-limited history of audio between incidents"""
+    if ROLLING_RECORDING:
+        segment_recorder.start()
+
+def benchmark(wav_path, fmt=SEGMENT_FORMAT, segment_seconds=SEGMENT_SECONDS):
+    """Encode a recording as segments into a scratch directory and return the report"""
+    import tempfile
+
+    audio, sample_rate = sf.read(wav_path, dtype='int16', always_2d=True)
+    recorder = SegmentRecorder(tempfile.mkdtemp(prefix="segments_"), segment_seconds, fmt,
+                               sample_rate=sample_rate, channels=audio.shape[1])
+    step = int(segment_seconds * sample_rate)
+    started = datetime.now()
+    for offset in range(0, len(audio), step):
+        recorder.encode(audio[offset:offset + step], started, incident="bench")
+    return recorder.report()
+
+def main():
+    parser = argparse.ArgumentParser(description="Compressed evidence segments")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    bench_parser = subparsers.add_parser("bench", help="Report encode CPU and compression for a WAV file")
+    bench_parser.add_argument("wav")
+    bench_parser.add_argument("--format", default=SEGMENT_FORMAT, choices=list(FORMATS))
+    bench_parser.add_argument("--segment-seconds", type=float, default=SEGMENT_SECONDS)
+
+    usage_parser = subparsers.add_parser("usage", help="Show disk use and apply the retention quota")
+    usage_parser.add_argument("--dir", default=SEGMENT_DIR)
+    usage_parser.add_argument("--quota-mb", type=float, default=QUOTA_BYTES / 1024 ** 2)
+    usage_parser.add_argument("--enforce", action="store_true")
+
+    args = parser.parse_args()
+    if args.command == "bench":
+        for key, value in benchmark(args.wav, args.format, args.segment_seconds).items():
+            print(f"{key:20s} {value}")
+    else:
+        retention = RetentionManager(args.dir, int(args.quota_mb * 1024 ** 2))
+        if args.enforce:
+            retention.enforce()
+        usage = retention.usage()
+        print(f"{usage['files']} segments: incident {usage['incident'] / 1024 ** 2:.1f} MB, "
+              f"other {usage['other'] / 1024 ** 2:.1f} MB, quota {args.quota_mb:.0f} MB")
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@ import speech_recognition as sr
 from dotenv import dotenv_values
 import os
 import mtranslate as mt
+from Backend.AudioHub import HubMicrophone
 
 # Load environment variables
 env_vars = dotenv_values(".env")
@@ -41,7 +42,7 @@ def UniversalTranslator(Text):
 class SpeechRecognizer:
     def __init__(self):
         self.recognizer = sr.Recognizer()
-        self.microphone = sr.Microphone()
+        self.microphone = HubMicrophone()  # Shares the device with the detectors
         
         # Adjust for ambient noise
         print("Adjusting for ambient noise... Please wait...")
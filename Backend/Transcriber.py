@@ -0,0 +1,415 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import importlib
+import importlib.util
+import threading
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import soundfile as sf
+
+# Add the project root directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Backend.Resampler import DetectionStream, DETECTION_RATE
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+logger = logging.getLogger(__name__)
+
+TRANSCRIPT_DB = os.path.join("Data", "transcripts.db")
+RECOGNISER = os.environ.get("TRANSCRIBER", "vosk")  # "vosk", "faster-whisper" or "module:factory"
+VOSK_MODEL_DIR = os.path.join("Data", "Models", "vosk")
+WHISPER_MODEL = os.environ.get("WHISPER_MODEL", os.path.join("Data", "Models", "whisper"))
+TRANSCRIBE_WORKERS = max(1, (os.cpu_count() or 2) // 2)  # Leave half the cores to capture and detection
+WORKER_NICE = 10  # Added to each worker's niceness so the scheduler always prefers live detection
+POLL_INTERVAL = 10  # Seconds between checks of the evidence catalogue for new audio
+TRANSCRIBE_KINDS = ("segment", "recording", "preroll")
+READ_BLOCK_SECONDS = 10  # Audio decoded and resampled at a time
+THREAD_LIMITS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    path TEXT PRIMARY KEY,
+    incident TEXT,
+    started REAL,
+    duration REAL,
+    recogniser TEXT,
+    text TEXT,
+    words TEXT,
+    elapsed REAL,
+    transcribed REAL NOT NULL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS transcripts_incident ON transcripts (incident, started);
+CREATE VIRTUAL TABLE IF NOT EXISTS transcript_search USING fts5(text, path UNINDEXED);
+"""
+
+class VoskRecogniser:
+    """Offline Kaldi recogniser; small models run several times faster than real time on one core"""
+    name = "vosk"
+
+    def __init__(self, model_dir=VOSK_MODEL_DIR):
+        from vosk import Model, SetLogLevel
+
+        SetLogLevel(-1)
+        self.model = Model(model_dir)
+
+    def transcribe(self, audio, sample_rate):
+        from vosk import KaldiRecognizer
+
+        recognizer = KaldiRecognizer(self.model, sample_rate)
+        recognizer.SetWords(True)
+        pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+        results = []
+        step = sample_rate // 2 * 2  # Half a second of int16 samples
+        for offset in range(0, len(pcm), step):
+            if recognizer.AcceptWaveform(pcm[offset:offset + step]):
+                results.append(json.loads(recognizer.Result()))
+        results.append(json.loads(recognizer.FinalResult()))
+        return [{'word': word['word'], 'start': word['start'], 'end': word['end'], 'confidence': word.get('conf')}
+                for result in results for word in result.get('result', [])]
+
+class WhisperRecogniser:
+    """faster-whisper (CTranslate2) with int8 weights, for better accuracy at a higher CPU cost"""
+    name = "faster-whisper"
+
+    def __init__(self, model=WHISPER_MODEL):
+        from faster_whisper import WhisperModel
+
+        self.model = WhisperModel(model, device="cpu", compute_type="int8", cpu_threads=1)
+
+    def transcribe(self, audio, sample_rate):
+        segments, _ = self.model.transcribe(audio, word_timestamps=True, vad_filter=True)
+        return [{'word': word.word.strip(), 'start': word.start, 'end': word.end, 'confidence': word.probability}
+                for segment in segments for word in segment.words]
+
+RECOGNISERS = {
+    "vosk": (VoskRecogniser, "vosk", VOSK_MODEL_DIR),
+    "faster-whisper": (WhisperRecogniser, "faster_whisper", None)
+}
+
+def load_recogniser(spec=RECOGNISER):
+    """Build a recogniser from a registered name or a "module:factory" path.
+
+    A recogniser is any object with transcribe(audio, sample_rate) that
+    takes 16 kHz mono float32 audio and returns a list of
+    {'word', 'start', 'end', 'confidence'} dicts with times in seconds.
+    """
+    if spec in RECOGNISERS:
+        return RECOGNISERS[spec][0]()
+    module, _, factory = spec.partition(":")
+    return getattr(importlib.import_module(module), factory)()
+
+def recogniser_available(spec=RECOGNISER):
+    """Whether the recogniser's package (and model, if it needs one on disk) is installed"""
+    if spec in RECOGNISERS:
+        _, package, model_dir = RECOGNISERS[spec]
+        return importlib.util.find_spec(package) is not None and (model_dir is None or os.path.isdir(model_dir))
+    return importlib.util.find_spec(spec.partition(":")[0]) is not None
+
+def load_audio(path):
+    """Decode a file to 16 kHz mono float32 a block at a time; return (audio, duration in seconds)"""
+    info = sf.info(path)
+    stream = DetectionStream(info.samplerate, info.channels)
+    blocks = [stream.process(block) for block in
+              sf.blocks(path, blocksize=int(READ_BLOCK_SECONDS * info.samplerate), dtype='float32', always_2d=False)]
+    audio = np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.float32)
+    return audio, info.frames / info.samplerate
+
+def lower_priority():
+    """Run the calling process below normal priority"""
+    try:
+        if hasattr(os, "nice"):
+            os.nice(WORKER_NICE)
+        else:
+            import psutil
+            psutil.Process().nice(psutil.BELOW_NORMAL_PRIORITY_CLASS)
+    except Exception as e:
+        logger.warning(f"Could not lower transcription priority: {e}")
+
+_worker_recogniser = None
+
+def _init_worker(spec):
+    """Process pool initializer: drop priority, pin to one thread and load the model once"""
+    global _worker_recogniser
+    lower_priority()
+    # Only this worker's environment changes. The recogniser's OpenMP/MKL runtimes load with the
+    # model below and read these; numpy's BLAS is already loaded, but the worker never calls into it
+    for variable in THREAD_LIMITS:
+        os.environ.setdefault(variable, "1")
+    _worker_recogniser = load_recogniser(spec)
+
+def _transcribe_file(path):
+    started = time.time()
+    audio, duration = load_audio(path)
+    words = _worker_recogniser.transcribe(audio, DETECTION_RATE) if len(audio) else []
+    return {'path': path, 'words': words, 'duration': duration, 'elapsed': time.time() - started}
+
+def fts_query(text):
+    """Quote every term so user input cannot break the FTS5 query syntax"""
+    terms = [term.replace('"', '""') for term in text.split()]
+    return " ".join(f'"{term}"' for term in terms)
+
+class TranscriptStore:
+    """Transcripts with word timestamps in SQLite, searchable through an FTS5 index"""
+
+    def __init__(self, path=TRANSCRIPT_DB):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def has(self, path):
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM transcripts WHERE path = ?", (path,)).fetchone() is not None
+
+    def save(self, result, entry=None, recogniser=None, error=None):
+        """Store one file's transcript and add it to the search index"""
+        entry = entry or {}
+        words = result.get('words', [])
+        text = " ".join(word['word'] for word in words)
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.execute("INSERT OR REPLACE INTO transcripts (path, incident, started, duration, recogniser, "
+                                  "text, words, elapsed, transcribed, error) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                  (result['path'], entry.get('incident'), entry.get('started'), result.get('duration'),
+                                   recogniser, text, json.dumps(words), result.get('elapsed'), time.time(), error))
+                self.conn.execute("DELETE FROM transcript_search WHERE path = ?", (result['path'],))
+                if text:
+                    self.conn.execute("INSERT INTO transcript_search (text, path) VALUES (?, ?)",
+                                      (text, result['path']))
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def search(self, query, limit=20):
+        """Transcripts matching a query, with the wall-clock time of every matching word"""
+        terms = {term.lower() for term in query.split()}
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT t.path, t.incident, t.started, t.words, "
+                "snippet(transcript_search, 0, '[', ']', '...', 12) FROM transcript_search "
+                "JOIN transcripts t ON t.path = transcript_search.path "
+                "WHERE transcript_search MATCH ? ORDER BY rank LIMIT ?", (fts_query(query), limit)).fetchall()
+        results = []
+        for path, incident, started, words, snippet in rows:
+            hits = [(word['word'], word['start'], (started or 0) + word['start'])
+                    for word in json.loads(words) if word['word'].lower() in terms]
+            results.append({'path': path, 'incident': incident, 'snippet': snippet, 'hits': hits})
+        return results
+
+    def transcript(self, path):
+        with self.lock:
+            row = self.conn.execute("SELECT text, words FROM transcripts WHERE path = ?", (path,)).fetchone()
+        return {'text': row[0], 'words': json.loads(row[1])} if row else None
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+class TranscriptionService:
+    """Transcribes finished evidence audio in a low-priority process pool.
+
+    A feeder thread polls the evidence catalogue for newly registered
+    recordings and segments, and incident audio jumps the queue. At most two
+    files per worker are in flight, each worker process runs single-threaded
+    at reduced priority, and the model is loaded once per worker, so a long
+    incident is worked through at several times real time on spare cores
+    while capture and detection keep theirs.
+    """
+
+    def __init__(self, recogniser=RECOGNISER, workers=TRANSCRIBE_WORKERS, store=None, catalog=None,
+                 poll_interval=POLL_INTERVAL):
+        self.recogniser = recogniser
+        self.workers = workers
+        self.store = store
+        self.catalog = catalog
+        self.poll_interval = poll_interval
+        self.executor = None
+        self.thread = None
+        self.running = False
+        self.wakeup = threading.Event()
+        self.backlog = deque()
+        self.in_flight = {}
+        self.watermark = (0.0, 0)  # (registration time, rowid) of the newest catalogue entry seen
+        self.lock = threading.Lock()
+        self.stats = {'files': 0, 'failed': 0, 'audio_seconds': 0.0, 'worker_seconds': 0.0, 'busy_since': None,
+                      'busy_seconds': 0.0}
+
+    def start(self):
+        """Start transcribing in the background; False if no recogniser is installed"""
+        with self.lock:
+            if self.running:
+                return True
+            if not recogniser_available(self.recogniser):
+                logger.info(f"Offline transcription disabled: recogniser '{self.recogniser}' is not installed")
+                return False
+            if self.catalog is None:
+                from Backend.EvidenceCatalog import get_evidence_catalog
+                self.catalog = get_evidence_catalog()
+            self.store = self.store or TranscriptStore()
+            # Spawn rather than fork: a forked child would inherit the GUI and audio threads' locks
+            self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                initargs=(self.recogniser,),
+                                                mp_context=multiprocessing.get_context("spawn"))
+            self.running = True
+            self.thread = threading.Thread(target=self._run)
+            self.thread.daemon = True
+            self.thread.start()
+        logger.info(f"Offline transcription started ({self.recogniser}, {self.workers} workers)")
+        return True
+
+    def _run(self):
+        while self.running:
+            try:
+                self._poll_catalog()
+                self._fill_pool()
+            except Exception as e:
+                logger.error(f"Error scheduling transcription: {e}")
+            self.wakeup.wait(self.poll_interval)
+            self.wakeup.clear()
+
+    def _poll_catalog(self):
+        while True:
+            registered, rowid = self.watermark
+            entries = self.catalog.registered_since(registered, TRANSCRIBE_KINDS, after_rowid=rowid)
+            if not entries:
+                return
+            self.watermark = (entries[-1]['registered'], entries[-1]['rowid'])
+            for entry in entries:
+                if self.store.has(entry['path']):
+                    continue
+                if entry['incident']:
+                    self.backlog.appendleft(entry)
+                else:
+                    self.backlog.append(entry)
+
+    def _fill_pool(self):
+        while self.backlog and len(self.in_flight) < 2 * self.workers:
+            entry = self.backlog.popleft()
+            if not os.path.exists(entry['path']):
+                continue
+            future = self.executor.submit(_transcribe_file, entry['path'])
+            with self.lock:
+                self.in_flight[future] = entry
+                if self.stats['busy_since'] is None:
+                    self.stats['busy_since'] = time.time()
+            future.add_done_callback(self._finished)
+
+    def _finished(self, future):
+        with self.lock:
+            entry = self.in_flight.pop(future, None)
+        if entry is None or future.cancelled():
+            return
+        try:
+            result = future.result()
+            self.store.save(result, entry, self.recogniser)
+            self.stats['files'] += 1
+            self.stats['audio_seconds'] += result['duration']
+            self.stats['worker_seconds'] += result['elapsed']
+        except Exception as e:
+            self.stats['failed'] += 1
+            logger.error(f"Error transcribing {entry['path']}: {e}")
+            try:
+                self.store.save({'path': entry['path']}, entry, self.recogniser, error=str(e))
+            except Exception:
+                pass
+        with self.lock:
+            if not self.in_flight and not self.backlog and self.stats['busy_since'] is not None:
+                self.stats['busy_seconds'] += time.time() - self.stats['busy_since']
+                self.stats['busy_since'] = None
+        self.wakeup.set()
+
+    def idle(self):
+        return not self.backlog and not self.in_flight
+
+    def report(self):
+        """Throughput so far as multiples of real time, per worker and overall"""
+        stats = self.stats
+        busy = stats['busy_seconds'] + (time.time() - stats['busy_since'] if stats['busy_since'] else 0.0)
+        return {
+            'files': stats['files'],
+            'failed': stats['failed'],
+            'audio_seconds': round(stats['audio_seconds'], 1),
+            'per_worker_speed': round(stats['audio_seconds'] / stats['worker_seconds'], 1) if stats['worker_seconds'] else None,
+            'overall_speed': round(stats['audio_seconds'] / busy, 1) if busy else None,
+            'pending': len(self.backlog) + len(self.in_flight)
+        }
+
+    def stop(self):
+        self.running = False
+        self.wakeup.set()
+        if self.thread:
+            self.thread.join(timeout=5)
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+# Create a global instance
+transcription_service = TranscriptionService()
+
+def get_transcription_service():
+    """Return the shared transcription service"""
+    return transcription_service
+
+def start_transcription():
+    """Transcribe evidence in the background if an offline recogniser is installed"""
+    try:
+        return transcription_service.start()
+    except Exception as e:
+        logger.error(f"Error starting transcription: {e}")
+        return False
+
+def search_transcripts(query, limit=20):
+    """Search every transcript for the given words"""
+    return TranscriptStore().search(query, limit)
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline transcription of evidence recordings")
+    parser.add_argument("--recogniser", default=RECOGNISER, help="vosk, faster-whisper or module:factory")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    transcribe_parser = subparsers.add_parser("transcribe", help="Transcribe one file and print the words")
+    transcribe_parser.add_argument("file")
+
+    run_parser = subparsers.add_parser("run", help="Work through the untranscribed evidence and report the speed")
+    run_parser.add_argument("--workers", type=int, default=TRANSCRIBE_WORKERS)
+
+    search_parser = subparsers.add_parser("search", help="Search the transcripts")
+    search_parser.add_argument("query")
+
+    args = parser.parse_args()
+    if args.command == "transcribe":
+        _init_worker(args.recogniser)
+        result = _transcribe_file(args.file)
+        for word in result['words']:
+            print(f"{word['start']:8.2f} {word['end']:8.2f}  {word['word']}")
+        print(f"{result['duration']:.1f}s of audio in {result['elapsed']:.1f}s "
+              f"({result['duration'] / max(result['elapsed'], 1e-6):.1f}x real time)")
+    elif args.command == "run":
+        service = TranscriptionService(args.recogniser, args.workers, poll_interval=0.5)
+        if not service.start():
+            sys.exit(1)
+        time.sleep(1)
+        while not service.idle():
+            time.sleep(0.5)
+        service.stop()
+        for key, value in service.report().items():
+            print(f"{key:18s} {value}")
+    else:
+        for result in search_transcripts(args.query):
+            times = ", ".join(f"{word} at {offset:.1f}s" for word, offset, _ in result['hits'])
+            print(f"{result['path']}  {result['snippet']}  ({times})")
+
+if __name__ == "__main__":
+    main()
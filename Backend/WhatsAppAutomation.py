@@ -14,6 +14,10 @@ import pywhatkit as kit
 import webbrowser
 import urllib.parse
 import pyperclip
+from Backend.AlertDispatcher import load_contacts
+from Backend.AlertOutbox import queue_alert
+from Backend.ScreenReadiness import get_screen_readiness
+from Backend.ReverseGeocoder import describe_location, maps_url
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
@@ -119,257 +123,165 @@ def get_whatsapp_window():
         logger.error(f"Error handling WhatsApp window: {e}")
         return None
 
-def send_emergency_alert(location, audio_file=None):
-    """Send emergency alert via WhatsApp"""
+SEND_POSITION = (1200, 700)  # Fallback click positions, used only when no template is recorded
+ATTACH_POSITION = (1000, 700)
+WHATSAPP_LOAD_TIMEOUT = 30
+UPLOAD_TIMEOUT = 30
+
+def click_send(screen, timeout=10, fallback_delay=2):
+    """Click the send button once it is visible, falling back to the Enter key"""
+    if not screen.wait_and_click('send', SEND_POSITION, timeout=timeout, fallback_delay=fallback_delay):
+        logger.warning("Send button not found, pressing Enter instead")
+        pyautogui.press('enter')
+
+def send_whatsapp_alert(number, message, audio_file=None, progress=None, share_location=True):
+    """Send the alert message, live location and audio file to one number via WhatsApp Web.
+
+    `progress`, if given, is called with the name of each step as it completes.
+    With `share_location` False the live location step is skipped.
+    """
+    def report(step):
+        if progress:
+            progress(step)
+    
     try:
-        # Emergency contact numbers
-        numbers = ["+917760401421", "+916205245097"]
+        screen = get_screen_readiness()
+        
+        # URL encode the message
+        encoded_message = urllib.parse.quote(message)
+        
+        # Open WhatsApp Web directly with the message
+        url = f"https://web.whatsapp.com/send?phone={number}&text={encoded_message}"
+        webbrowser.open(url)
+        logger.info(f"Opening WhatsApp Web for {number}")
+        
+        # The send button appears as soon as the chat has loaded with the message filled in
+        click_send(screen, timeout=WHATSAPP_LOAD_TIMEOUT, fallback_delay=15)
+        logger.info(f"Emergency message sent to {number}")
+        report("message")
+        
+        # Send live location (skipped when only the attachment is being resent)
+        if share_location:
+            try:
+                steps = [
+                    ('attach', ATTACH_POSITION),  # Attachment button (clip icon)
+                    ('location', (1000, 500)),  # Location option
+                    ('live_location', (1000, 400)),  # "Share Live Location" option
+                    ('live_duration', (1000, 300))  # Duration (8 hours)
+                ]
+                location_sent = all(screen.wait_and_click(name, position) for name, position in steps)
+                if location_sent:
+                    click_send(screen)
+                    logger.info(f"Live location sent to {number}")
+                    report("location")
+                else:
+                    logger.error("Failed to send live location")
+                    pyautogui.press('esc')
+            
+            except Exception as e:
+                logger.error(f"Failed to send live location to {number}: {e}")
+        
+        # If audio file exists, try to send it
+        if audio_file and os.path.exists(audio_file):
+            try:
+                logger.info(f"Attempting to send audio file: {audio_file}")
+                
+                # Attachment button, then the document option
+                if screen.wait_and_click('attach', ATTACH_POSITION) and screen.wait_and_click('document', (1000, 600)):
+                    # Copy file path to clipboard
+                    abs_path = os.path.abspath(audio_file)
+                    pyperclip.copy(abs_path)
+                    
+                    # Paste file path in file dialog
+                    time.sleep(1)  # The native file dialog cannot be template matched reliably
+                    pyautogui.hotkey('ctrl', 'v')
+                    pyautogui.press('enter')
+                    
+                    # Send the file once the upload preview shows its send button
+                    click_send(screen, timeout=UPLOAD_TIMEOUT, fallback_delay=5)
+                    logger.info(f"Audio file sent to {number}")
+                    report("audio")
+                else:
+                    logger.error("Failed to open the document picker")
+                
+            except Exception as e:
+                logger.error(f"Failed to send audio file to {number}: {e}")
         
-        # Create a more detailed emergency message
-        message = f"""🚨 URGENT: EMERGENCY ALERT 🚨
+        logger.info(f"Alert sent to {number}")
+        return True
+        
+    except Exception as e:
+        logger.error(f"Failed to send alert to {number}: {e}")
+        return False
+
+def build_alert_message(location, audio_file=None, recording_follows=False):
+    """Create the emergency alert text for a location"""
+    address = describe_location(location)
+    maps = maps_url(location.get('coordinates')) if location else None
+    if audio_file:
+        audio_line = "\n            - Audio recording attached"
+    elif recording_follows:
+        audio_line = "\n            - Audio recording will follow"
+    else:
+        audio_line = ""
+    return f"""🚨 URGENT: EMERGENCY ALERT 🚨
 
           ⚠️ IMMEDIATE ATTENTION REQUIRED ⚠️
 
             This is an automated emergency alert from JARVIS AI Safety System.
 
             Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-            Location: {location['address']}
-            Maps: https://maps.app.goo.gl/oHbGFfHsw8oCGTTV8
+            Location: {address}
+            Maps: {maps or 'Unavailable'}
 
-            ⚠️ Possible distress situation detected:
-            - Audio recording attached
-            - Live location shared
+            ⚠️ Possible distress situation detected:{audio_line}
+            - Location updates will follow while the incident is open
             - Immediate response required
 
 Please respond immediately and take necessary action.
 
 This is an automated message from JARVIS AI Safety System."""
-        
-        success = False
-        for number in numbers:
-            try:
-                # URL encode the message
-                encoded_message = urllib.parse.quote(message)
-                
-                # Open WhatsApp Web directly with the message
-                url = f"https://web.whatsapp.com/send?phone={number}&text={encoded_message}"
-                webbrowser.open(url)
-                logger.info(f"Opening WhatsApp Web for {number}")
-                time.sleep(15)  # Increased wait time for WhatsApp Web to load
-                
-                # Try multiple methods to send the message
-                message_sent = False
-                for attempt in range(5):  # Try 5 times
-                    try:
-                        # Method 1: Direct click on send button (multiple positions)
-                        send_positions = [
-                            (1200, 700),  # Common position
-                            (1150, 700),  # Slightly left
-                            (1250, 700),  # Slightly right
-                            (1200, 650),  # Slightly up
-                            (1200, 750)   # Slightly down
-                        ]
-                        
-                        for pos_x, pos_y in send_positions:
-                            try:
-                                # Move mouse to position
-                                pyautogui.moveTo(pos_x, pos_y, duration=0.5)
-                                time.sleep(0.5)
-                                # Click
-                                pyautogui.click()
-                                time.sleep(2)
-                                message_sent = True
-                                break
-                            except:
-                                continue
-                        
-                        if message_sent:
-                            break
-                            
-                        # Method 2: Using Enter key
-                        pyautogui.press('enter')
-                        time.sleep(2)
-                        message_sent = True
-                        break
-                    except:
-                        try:
-                            # Method 3: Using Ctrl+Enter
-                            pyautogui.hotkey('ctrl', 'enter')
-                            time.sleep(2)
-                            message_sent = True
-                            break
-                        except:
-                            try:
-                                # Method 4: Using Tab and Enter
-                                pyautogui.press('tab')
-                                time.sleep(0.5)
-                                pyautogui.press('enter')
-                                time.sleep(2)
-                                message_sent = True
-                                break
-                            except:
-                                time.sleep(1)
-                
-                if not message_sent:
-                    logger.error("Failed to send message after multiple attempts")
-                    continue
-                
-                logger.info(f"Emergency message sent to {number}")
-                time.sleep(3)
-                
-                # Send live location
-                try:
-                    # Click attachment button (clip icon)
-                    pyautogui.click(x=1000, y=700)
-                    time.sleep(2)
-                    
-                    # Click location option
-                    pyautogui.click(x=1000, y=500)
-                    time.sleep(2)
-                    
-                    # Click "Share Live Location" option
-                    pyautogui.click(x=1000, y=400)
-                    time.sleep(2)
-                    
-                    # Select duration (8 hours)
-                    pyautogui.click(x=1000, y=300)
-                    time.sleep(2)
-                    
-                    # Send live location
-                    location_sent = False
-                    for attempt in range(5):  # Try 5 times
-                        try:
-                            # Try multiple positions for send button
-                            for pos_x, pos_y in send_positions:
-                                try:
-                                    pyautogui.moveTo(pos_x, pos_y, duration=0.5)
-                                    time.sleep(0.5)
-                                    pyautogui.click()
-                                    time.sleep(2)
-                                    location_sent = True
-                                    break
-                                except:
-                                    continue
-                            
-                            if location_sent:
-                                break
-                                
-                            # Try Enter key
-                            pyautogui.press('enter')
-                            time.sleep(2)
-                            location_sent = True
-                            break
-                        except:
-                            try:
-                                # Try Ctrl+Enter
-                                pyautogui.hotkey('ctrl', 'enter')
-                                time.sleep(2)
-                                location_sent = True
-                                break
-                            except:
-                                try:
-                                    # Try Tab and Enter
-                                    pyautogui.press('tab')
-                                    time.sleep(0.5)
-                                    pyautogui.press('enter')
-                                    time.sleep(2)
-                                    location_sent = True
-                                    break
-                                except:
-                                    time.sleep(1)
-                    
-                    if not location_sent:
-                        logger.error("Failed to send live location after multiple attempts")
-                    
-                    logger.info(f"Live location sent to {number}")
-                    time.sleep(3)
-                    
-                except Exception as e:
-                    logger.error(f"Failed to send live location to {number}: {e}")
-                
-                # If audio file exists, try to send it
-                if audio_file and os.path.exists(audio_file):
-                    try:
-                        logger.info(f"Attempting to send audio file: {audio_file}")
-                        
-                        # Click attachment button (clip icon)
-                        pyautogui.click(x=1000, y=700)
-                        time.sleep(2)
-                        
-                        # Click document option
-                        pyautogui.click(x=1000, y=600)
-                        time.sleep(2)
-                        
-                        # Copy file path to clipboard
-                        abs_path = os.path.abspath(audio_file)
-                        pyperclip.copy(abs_path)
-                        
-                        # Paste file path in file dialog
-                        pyautogui.hotkey('ctrl', 'v')
-                        time.sleep(2)
-                        pyautogui.press('enter')
-                        time.sleep(5)  # Wait for file upload
-                        
-                        # Send the file
-                        file_sent = False
-                        for attempt in range(5):  # Try 5 times
-                            try:
-                                # Try multiple positions for send button
-                                for pos_x, pos_y in send_positions:
-                                    try:
-                                        pyautogui.moveTo(pos_x, pos_y, duration=0.5)
-                                        time.sleep(0.5)
-                                        pyautogui.click()
-                                        time.sleep(2)
-                                        file_sent = True
-                                        break
-                                    except:
-                                        continue
-                                
-                                if file_sent:
-                                    break
-                                    
-                                # Try Enter key
-                                pyautogui.press('enter')
-                                time.sleep(2)
-                                file_sent = True
-                                break
-                            except:
-                                try:
-                                    # Try Ctrl+Enter
-                                    pyautogui.hotkey('ctrl', 'enter')
-                                    time.sleep(2)
-                                    file_sent = True
-                                    break
-                                except:
-                                    try:
-                                        # Try Tab and Enter
-                                        pyautogui.press('tab')
-                                        time.sleep(0.5)
-                                        pyautogui.press('enter')
-                                        time.sleep(2)
-                                        file_sent = True
-                                        break
-                                    except:
-                                        time.sleep(1)
-                        
-                        if not file_sent:
-                            logger.error("Failed to send audio file after multiple attempts")
-                        else:
-                            logger.info(f"Audio file sent to {number}")
-                        
-                    except Exception as e:
-                        logger.error(f"Failed to send audio file to {number}: {e}")
-                
-                logger.info(f"Alert sent to {number}")
-                time.sleep(3)
-                success = True
-                
-            except Exception as e:
-                logger.error(f"Failed to send alert to {number}: {e}")
-                continue
-        
-        return success
+
+def send_location_update(location, moved_m=None, elapsed=None):
+    """Queue a location update for every contact during an open incident"""
+    try:
+        moved = f"Moved about {moved_m:.0f} m since the last update" if moved_m else "No significant movement"
+        message = f"""📍 JARVIS EMERGENCY - LOCATION UPDATE
+
+Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+Location: {describe_location(location)}
+Maps: {maps_url(location.get('coordinates')) or 'Unavailable'}
+{moved}"""
+        # Live location is already being shared since the first alert; updates are text only
+        queue_alert(load_contacts(), message, share_location=False)
+        return True
+    except Exception as e:
+        logger.error(f"Error sending location update: {e}")
+        return False
+
+def send_alert_recording(audio_file, trace=None):
+    """Queue the emergency audio recording as its own delivery"""
+    try:
+        message = f"🎙️ JARVIS EMERGENCY - audio recording ({datetime.now().strftime('%Y-%m-%d %H:%M:%S')})"
+        # The alert that preceded the recording already started sharing the live location
+        queue_alert(load_contacts(), message, audio_file=audio_file, trace=trace, share_location=False)
+        return True
+    except Exception as e:
+        logger.error(f"Error sending emergency recording: {e}")
+        return False
+
+def send_emergency_alert(location, audio_file=None, trace=None, recording_follows=False):
+    """Queue an emergency alert for every contact and channel.
+
+    The alert is written to the durable outbox and delivered by its
+    background worker, so this returns as soon as the alert is safely
+    recorded rather than after the browser automation has finished.
+    """
+    try:
+        message = build_alert_message(location, audio_file, recording_follows)
+        alert_id = queue_alert(load_contacts(), message, audio_file=audio_file, trace=trace)
+        logger.info(f"Emergency alert {alert_id} queued for delivery")
+        return True
         
     except Exception as e:
         logger.error(f"Error sending emergency alert: {e}")
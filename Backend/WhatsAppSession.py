@@ -0,0 +1,266 @@
+import os
+import re
+import time
+import threading
+import logging
+from dotenv import dotenv_values
+
+# Setup logging
+logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(message)s', datefmt='%Y-%m-%d %H:%M:%S')
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+env_vars = dotenv_values(".env")
+
+WHATSAPP_URL = "https://web.whatsapp.com"
+PROFILE_DIR = os.path.abspath(os.path.join("Data", "WhatsAppProfile"))
+LOGIN_TIMEOUT = 120  # Seconds to wait for the QR code to be scanned on first use
+CHAT_TIMEOUT = 15
+KEEPALIVE_INTERVAL = 60
+
+# WhatsApp Web changes its markup from time to time; keep the selectors in one place
+SELECTORS = {
+    'chat_list': "#pane-side",
+    'compose': "footer div[contenteditable='true']",
+    'attach': "span[data-icon='plus'], span[data-icon='attach-menu-plus'], span[data-icon='clip']",
+    # The attach menu holds two file inputs; the image/video one would send audio as media
+    'file_input': "input[type='file'][accept='*'], input[type='file']:not([accept*='image'])",
+    'send': "span[data-icon='send'], span[data-icon='wds-ic-send-filled']",
+    'invalid_number': "div[data-animate-modal-popup='true']"
+}
+
+class AttachmentError(Exception):
+    """The alert text was delivered but the attachment was not"""
+
+def whatsapp_driver_mode():
+    """"selenium" to use the persistent session, anything else for the desktop automation path"""
+    return (env_vars.get("WHATSAPP_DRIVER") or os.environ.get("WHATSAPP_DRIVER") or "desktop").lower()
+
+class WhatsAppSession:
+    """One logged-in WhatsApp Web tab kept warm in a dedicated Chrome profile.
+
+    The profile directory stores the login, so the QR code only has to be
+    scanned once. Chats are switched inside the already loaded page by
+    clicking an injected wa.me link, which WhatsApp Web handles without a
+    reload, so each further contact costs a few hundred milliseconds instead
+    of a full page load.
+    """
+
+    def __init__(self, profile_dir=PROFILE_DIR, headless=False):
+        self.profile_dir = profile_dir
+        self.headless = headless
+        self.driver = None
+        self.current_chat = None
+        self.lock = threading.RLock()
+        self.ready = threading.Event()
+        self.keepalive_thread = None
+        self.running = False
+
+    def start(self):
+        """Launch Chrome with the persistent profile and wait for WhatsApp Web to log in.
+
+        Only the browser launch holds the session lock. The wait for the QR
+        code scan does not, so the keepalive and stop() are never held up by it.
+        """
+        start = time.time()
+        with self.lock:
+            if self.driver is not None and self.ready.is_set() and self._is_alive():
+                return True
+            if self.driver is None or not self._is_alive():
+                from selenium import webdriver
+                from selenium.webdriver.chrome.service import Service
+                from webdriver_manager.chrome import ChromeDriverManager
+
+                os.makedirs(self.profile_dir, exist_ok=True)
+                options = webdriver.ChromeOptions()
+                options.add_argument(f"--user-data-dir={self.profile_dir}")
+                options.add_argument("--disable-notifications")
+                if self.headless:
+                    options.add_argument("--headless=new")
+
+                self.ready.clear()
+                self.current_chat = None
+                self.driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
+                self.driver.get(WHATSAPP_URL)
+
+        # Several callers may wait here for the same login; polling the page is harmless
+        if not self._wait_for(SELECTORS['chat_list'], LOGIN_TIMEOUT):
+            logger.error("WhatsApp Web did not log in; scan the QR code in the session window")
+            return False
+        if not self.ready.is_set():
+            self.ready.set()
+            logger.info(f"WhatsApp Web session ready in {time.time() - start:.1f}s")
+
+        if not self.running:
+            self.running = True
+            self.keepalive_thread = threading.Thread(target=self._keepalive)
+            self.keepalive_thread.daemon = True
+            self.keepalive_thread.start()
+        return True
+
+    def start_in_background(self):
+        """Warm the session without blocking the caller"""
+        thread = threading.Thread(target=self._safe_start)
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def _safe_start(self):
+        try:
+            self.start()
+        except Exception as e:
+            logger.error(f"Error starting WhatsApp Web session: {e}")
+
+    def _keepalive(self):
+        """Restart the browser if it was closed so the next alert finds a warm session"""
+        while self.running:
+            time.sleep(KEEPALIVE_INTERVAL)
+            if not self.running:
+                break
+            with self.lock:
+                if self.driver is not None and not self._is_alive():
+                    logger.warning("WhatsApp Web session lost, restarting")
+                    self.ready.clear()
+                    self.driver = None
+                    self.current_chat = None
+            if self.driver is None:
+                self._safe_start()
+
+    def _is_alive(self):
+        try:
+            return bool(self.driver.window_handles)
+        except Exception:
+            return False
+
+    def _find(self, selector):
+        from selenium.webdriver.common.by import By
+        elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
+        return elements[0] if elements else None
+
+    def _wait_for(self, selector, timeout):
+        """Poll for an element; return it or None"""
+        deadline = time.time() + timeout
+        while time.time() < deadline and self.driver is not None:
+            element = self._find(selector)
+            if element is not None:
+                return element
+            time.sleep(0.1)
+        return None
+
+    @staticmethod
+    def _is_stale(element):
+        """True once an element has been removed from the page"""
+        from selenium.common.exceptions import StaleElementReferenceException
+
+        try:
+            element.is_enabled()
+            return False
+        except StaleElementReferenceException:
+            return True
+
+    def open_chat(self, number):
+        """Switch to the chat with `number` inside the loaded page and return its compose box"""
+        phone = re.sub(r"\D", "", number)
+        compose = self._find(SELECTORS['compose'])
+        if phone == self.current_chat and compose is not None:
+            return compose
+        self.current_chat = None
+        self.driver.execute_script(
+            "var link = document.createElement('a');"
+            "link.href = 'https://wa.me/' + arguments[0];"
+            "document.body.appendChild(link); link.click(); link.remove();", phone)
+
+        # Wait until the compose box belongs to the newly opened chat. Switching chats re-renders
+        # the conversation pane, so the previous box goes stale; WebElement equality is not reliable
+        deadline = time.time() + CHAT_TIMEOUT
+        while time.time() < deadline:
+            if self._find(SELECTORS['invalid_number']) and not self._find(SELECTORS['compose']):
+                raise ValueError(f"{number} is not on WhatsApp")
+            current = self._find(SELECTORS['compose'])
+            if current is not None and (compose is None or self._is_stale(compose)):
+                self.current_chat = phone
+                return current
+            time.sleep(0.05)
+
+        # Fall back to loading the chat URL directly
+        logger.warning(f"In-page chat switch to {number} timed out, loading the chat URL")
+        self.driver.get(f"{WHATSAPP_URL}/send?phone={phone}")
+        compose = self._wait_for(SELECTORS['compose'], CHAT_TIMEOUT)
+        if compose is not None:
+            self.current_chat = phone
+        return compose
+
+    def send_message(self, number, message):
+        """Send a text message to one number"""
+        from selenium.webdriver.common.keys import Keys
+
+        with self.lock:
+            compose = self.open_chat(number)
+            if compose is None:
+                raise TimeoutError(f"Chat with {number} did not open")
+            compose.click()
+            # insertText keeps the line breaks that send_keys would turn into Enter presses
+            self.driver.execute_script("document.execCommand('insertText', false, arguments[0]);", message)
+            compose.send_keys(Keys.ENTER)
+            return True
+
+    def send_file(self, number, filepath):
+        """Attach and send a file in the currently open chat with `number`"""
+        with self.lock:
+            attach = self._wait_for(SELECTORS['attach'], CHAT_TIMEOUT)
+            if attach is None:
+                raise TimeoutError("Attachment button not found")
+            attach.click()
+            file_input = self._wait_for(SELECTORS['file_input'], CHAT_TIMEOUT)
+            if file_input is None:
+                raise TimeoutError("Document upload field not found")
+            file_input.send_keys(os.path.abspath(filepath))
+            send = self._wait_for(SELECTORS['send'], CHAT_TIMEOUT)
+            if send is None:
+                raise TimeoutError(f"Could not send {filepath} to {number}")
+            send.click()
+            return True
+
+    def send_alert(self, number, message, audio_file=None):
+        """Send the alert text and, if present, the audio file to one number.
+
+        Raises AttachmentError if the text went out but the file did not, so
+        the caller can retry just the file.
+        """
+        if not self.ready.is_set() and not self.start():
+            return False
+        start = time.time()
+        with self.lock:
+            self.send_message(number, message)
+            if audio_file and os.path.exists(audio_file):
+                try:
+                    self.send_file(number, audio_file)
+                except Exception as e:
+                    raise AttachmentError(f"Alert text sent to {number} but the audio file was not: {e}") from e
+        logger.info(f"WhatsApp alert sent to {number} in {time.time() - start:.2f}s")
+        return True
+
+    def stop(self):
+        """Close the browser; the login stays in the profile directory"""
+        self.running = False
+        with self.lock:
+            self.ready.clear()
+            if self.driver is not None:
+                try:
+                    self.driver.quit()
+                except Exception:
+                    pass
+                self.driver = None
+                self.current_chat = None
+
+# Create a global instance
+whatsapp_session = WhatsAppSession()
+
+def get_whatsapp_session():
+    """Return the shared WhatsApp Web session"""
+    return whatsapp_session
+
+def warm_whatsapp_session():
+    """Start the session in the background when the selenium driver is selected"""
+    if whatsapp_driver_mode() == "selenium":
+        whatsapp_session.start_in_background()
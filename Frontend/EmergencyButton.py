@@ -1,7 +1,6 @@
 import os
 import sys
 import numpy as np
-import geocoder
 import threading
 import time
 from datetime import datetime
@@ -12,8 +11,17 @@ import soundfile as sf
 import pyaudio
 import wave
 import speech_recognition as sr
-from Backend.WhatsAppAutomation import send_emergency_alert
+from Backend.WhatsAppAutomation import send_emergency_alert, send_alert_recording
 from Backend.AudioRecorder import stop_recording
+from Backend.AudioHub import get_audio_hub, to_float, HubMicrophone
+from Backend.Resampler import DETECTION_RATE
+from Backend.KeywordSpotter import KeywordSpotter
+from Backend.LocationService import get_location
+from Backend.LocationTracker import open_incident, close_incident
+from Backend.SegmentRecorder import start_incident_recording
+from Backend.EvidenceBundle import close_incident_evidence
+from Backend.EvidenceCatalog import register_evidence, latest_audio_file
+from Backend.AlertTrace import AlertTrace
 from PyQt5.QtWidgets import QPushButton
 from PyQt5.QtCore import Qt
 
@@ -28,6 +36,7 @@ emergency_active = False
 VOLUME_THRESHOLD = 0.1
 FREQUENCY_THRESHOLD = 1000
 ALERT_COOLDOWN = 60  # 60 seconds cooldown between alerts
+RECORDING_GRACE = 5  # Extra seconds a recording may take before it is cut short
 
 # Emergency keywords
 EMERGENCY_KEYWORDS = ["help", "save", "emergency", "danger", "scared", "unsafe"]
@@ -106,6 +115,7 @@ class EmergencyDetector:
         self.voice_detection_count = 0
         self.last_alert_time = 0
         self.recognizer = sr.Recognizer()
+        self.keyword_spotter = KeywordSpotter(EMERGENCY_KEYWORDS)
         
     def start_detection(self):
         """Start monitoring for distress signals"""
@@ -120,8 +130,47 @@ class EmergencyDetector:
     
     def _monitor_audio(self):
         """Monitor audio input for distress signals"""
+        # Spot keywords on-device when templates are enrolled, otherwise fall back to Google STT
+        if self.keyword_spotter.has_templates():
+            self._monitor_keywords()
+        else:
+            logger.info("No keyword templates enrolled, using online speech recognition")
+            self._monitor_speech()
+    
+    def _monitor_keywords(self):
+        """Run the offline keyword spotter on the streaming 16 kHz audio"""
+        hub = get_audio_hub()
+        subscription = None
         try:
-            with sr.Microphone() as source:
+            if not hub.start():
+                self.monitoring = False
+                return
+            subscription = hub.subscribe("keywords", "detect")
+            self.keyword_spotter.reset()
+            logger.info("Listening for emergency keywords (offline)...")
+            
+            while self.monitoring:
+                audio_data = subscription.read(timeout=0.5)
+                if audio_data is None:
+                    continue
+                
+                spotted = self.keyword_spotter.process(audio_data)
+                if spotted:
+                    logger.info(f"Emergency keyword detected: {spotted}")
+                    self._handle_distress()
+                    
+        except Exception as e:
+            logger.error(f"Error in keyword monitoring: {e}")
+            self.monitoring = False
+        finally:
+            if subscription:
+                subscription.close()
+                hub.stop()
+    
+    def _monitor_speech(self):
+        """Send each phrase to online speech recognition and look for keywords"""
+        try:
+            with HubMicrophone() as source:
                 logger.info("Adjusting for ambient noise... Please wait...")
                 self.recognizer.adjust_for_ambient_noise(source, duration=2)
                 logger.info("Ready!")
@@ -161,42 +210,66 @@ class EmergencyDetector:
             if current_time - self.last_alert_time < ALERT_COOLDOWN:
                 logger.info("Alert cooldown in effect, skipping...")
                 return
+            trace = AlertTrace("keyword")
+            
+            # Start recording right away; the audio follows as a separate delivery
+            threading.Thread(target=self._send_emergency_recording, args=(trace,), daemon=True).start()
                 
-            # Get current location
+            # The cached location is available immediately, so the text alert goes out first
             location = get_location()
-            if not location:
-                logger.error("Could not get location!")
-                return
-            
-            # Record emergency audio
-            audio_file = self._record_emergency_audio()
-            if not audio_file:
-                logger.error("Failed to record emergency audio")
-                return
+            trace.mark("location", age=location.get('age'))
             
             # Send emergency alert
-            if send_emergency_alert(location=location, audio_file=audio_file):
+            if send_emergency_alert(location=location, trace=trace, recording_follows=True):
                 logger.info("Emergency alert sent successfully")
                 self.last_alert_time = current_time
+                open_incident(location)
+                start_incident_recording()
             else:
                 logger.error("Failed to send emergency alert")
             
         except Exception as e:
             logger.error(f"Error handling distress: {e}")
     
+    def _send_emergency_recording(self, trace, duration=10):
+        """Record emergency audio and send it as its own delivery"""
+        audio_file = self._record_emergency_audio(duration)
+        if not audio_file:
+            logger.error("Failed to record emergency audio")
+            return
+        trace.mark("recording", file=audio_file)
+        if not send_alert_recording(audio_file, trace=trace):
+            logger.error("Failed to send emergency audio recording")
+    
     def _record_emergency_audio(self, duration=10):
         """Record audio for specified duration"""
         try:
             logger.info("Recording emergency audio...")
             
-            # Initialize recording
-            recording = sd.rec(int(duration * self.sample_rate), 
-                             samplerate=self.sample_rate, 
-                             channels=self.channels,
-                             dtype='float32')
-            
-            # Wait for recording to complete
-            sd.wait()
+            # Record from the shared hub instead of opening the device again
+            hub = get_audio_hub()
+            if not hub.start():
+                return None
+            subscription = hub.subscribe("evidence", "full")
+            chunks = []
+            recorded = 0
+            # A stalled or stopped device must not hold the alert thread forever
+            deadline = time.time() + duration + RECORDING_GRACE
+            try:
+                while recorded < duration * self.sample_rate and hub.running and time.time() < deadline:
+                    frames = subscription.read(timeout=1.0)
+                    if frames is not None:
+                        chunks.append(frames.copy())
+                        recorded += len(frames)
+            finally:
+                subscription.close()
+                hub.stop()
+            if not chunks:
+                logger.error("No audio was captured for the emergency recording")
+                return None
+            if recorded < duration * self.sample_rate:
+                logger.warning(f"Emergency recording cut short at {recorded / self.sample_rate:.1f}s")
+            recording = np.concatenate(chunks)
             
             # Save recording
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -206,6 +279,7 @@ class EmergencyDetector:
             # Save as WAV file
             sf.write(filepath, recording, self.sample_rate)
             logger.info(f"Emergency audio saved to: {filepath}")
+            register_evidence(filepath, "recording", started=time.time() - len(recording) / self.sample_rate)
             
             return filepath
             
@@ -219,6 +293,8 @@ class EmergencyDetector:
             self.monitoring = False
             if self.monitor_thread:
                 self.monitor_thread.join(timeout=5)
+            close_incident()
+            close_incident_evidence()
             logger.info("Emergency detection stopped")
             return True
         return False
@@ -234,18 +310,6 @@ def stop_detection():
     """Stop emergency detection"""
     return emergency_detector.stop_detection()
 
-def get_location():
-    """Get current location using geocoder."""
-    try:
-        g = geocoder.ip('me')
-        return {
-            'address': g.address,
-            'coordinates': (g.lat, g.lng)
-        }
-    except Exception as e:
-        logger.error(f"Error getting location: {e}")
-        return None
-
 def detect_distress(audio_data, sample_rate):
     """Analyze audio data for distress signals."""
     try:
@@ -272,47 +336,38 @@ def monitor_audio():
     """Monitor audio for emergency signals."""
     global recording, emergency_active
     last_alert_time = 0
+    hub = get_audio_hub()
+    subscription = None
     
     try:
-        # Audio monitoring parameters
-        sample_rate = 44100
-        channels = 2
-        dtype = np.int16
-        
-        # Initialize PyAudio
-        p = pyaudio.PyAudio()
-        stream = p.open(
-            format=pyaudio.paInt16,
-            channels=channels,
-            rate=sample_rate,
-            input=True,
-            frames_per_buffer=1024
-        )
+        # Detect on the hub's shared 16 kHz mono stream
+        if not hub.start():
+            return
+        subscription = hub.subscribe("frontend-distress", "detect")
         
         logger.info("Started monitoring...")
         
         while recording:
             try:
                 # Read audio data
-                audio_data = np.frombuffer(stream.read(1024), dtype=np.int16)
+                audio_data = subscription.read(timeout=0.5)
+                if audio_data is None:
+                    continue
                 
                 # Convert to float for processing
-                audio_float = audio_data.astype(np.float32) / 32768.0
+                audio_mono = to_float(audio_data).ravel()
                 
                 # Check for emergency conditions
-                if detect_distress(audio_float, sample_rate):
+                if detect_distress(audio_mono, DETECTION_RATE):
                     current_time = time.time()
                     if current_time - last_alert_time >= ALERT_COOLDOWN:
                         logger.info("Distress signal detected!")
                         
                         # Get current location
                         location = get_location()
-                        if not location:
-                            logger.error("Could not get location!")
-                            continue
                         
                         # Get the recorded audio file
-                        audio_file = get_audio_file()
+                        audio_file = latest_audio_file()
                         if not audio_file:
                             logger.error("Could not get audio file!")
                             continue
@@ -324,22 +379,16 @@ def monitor_audio():
                         else:
                             logger.error("Failed to send emergency alert")
                 
-                # Small delay to prevent CPU overload
-                time.sleep(0.01)
-                
             except Exception as e:
                 logger.error(f"Error in audio processing loop: {e}")
-                time.sleep(0.1)
             
     except Exception as e:
         logger.error(f"Error in audio monitoring: {e}")
     finally:
         recording = False
-        if 'stream' in locals():
-            stream.stop_stream()
-            stream.close()
-        if 'p' in locals():
-            p.terminate()
+        if subscription:
+            subscription.close()
+            hub.stop()
 
 def start_detection():
     """Start the emergency detection system."""
@@ -15,10 +15,20 @@ from Backend.Automation import Automation
 from Backend.SpeechToText import SpeechRecognition
 from Backend.Chatbot import Chatbot
 from Backend.TextToSpeech import TextToSpeech
-from Backend.WhatsAppAutomation import send_emergency_alert
+from Backend.WhatsAppAutomation import send_emergency_alert, send_alert_recording
+from Backend.AudioHub import get_audio_hub
+from Backend.AlertOutbox import start_outbox_worker
+from Backend.WhatsAppSession import warm_whatsapp_session
+from Backend.LocationService import get_location, get_location_service
+from Backend.LocationTracker import open_incident, close_incident
+from Backend.SegmentRecorder import start_incident_recording
+from Backend.EvidenceBundle import close_incident_evidence
+from Backend.EvidenceCatalog import get_evidence_catalog, register_evidence
+from Backend.Transcriber import start_transcription
+from Backend.AlertTrace import AlertTrace
 import sounddevice as sd
 import soundfile as sf
-import geocoder
+import numpy as np
 import time
 from datetime import datetime
 from dotenv import dotenv_values
@@ -38,6 +48,8 @@ Assistantname = "Jarvis AI"  # Changed from JARVIS to Jarvis AI
 AssistantVoice = env_vars.get("AssistantVoice", "en-US-GuyNeural")
 InputLanguage = env_vars.get("InputLanguage", "en-US")
 GroqAPIKey = env_vars.get("GROQ_API_KEY")
+PREROLL_SECONDS = 5  # Audio from before the emergency keyword kept in the recording
+SAFE_PHRASES = ["i'm safe", "i am safe", "cancel emergency", "stop emergency", "emergency over"]
 
 
 # Validate required environment variables
@@ -47,6 +59,7 @@ if not Username:
 DefaultMessage = f'''{Username} : Hello JARVIS, How are you?
 JARVIS : Greetings {Username}. I am JARVIS, your advanced AI assistant. How may I assist you today?'''
 subprocesses = []
+incident_lock = threading.Lock()  # Closing and opening voice incidents run in order, off the listening loop
 Functions = ["open", "close", "play", "system", "content", "google search", "youtube search"]
 #Nikhil
 # Initialize Chatbot instance
@@ -106,25 +119,34 @@ def ShowChatsOnGUI():
 
 # Function to get current location details
 def get_current_location():
-    """Get current location details"""
-    try:
-        g = geocoder.ip('me')
-        if g.ok:
-            return {
-                'address': f"{g.city}, {g.state}, {g.country}",
-                'coordinates': (g.lat, g.lng)
-            }
-    except Exception as e:
-        print(f"Error getting location: {e}")
-    return None
+    """Get current location details from the background location service"""
+    return get_location()
 
 # Function to record audio for emergency
-def record_emergency_audio(duration=10):
-    """Record audio for specified duration"""
+def record_emergency_audio(duration=10, preroll=PREROLL_SECONDS):
+    """Record audio for specified duration, starting with what was heard just before"""
     try:
         print("Recording emergency audio...")
-        recording = sd.rec(int(duration * 44100), samplerate=44100, channels=2)
-        sd.wait()
+        # Record from the shared hub; its buffer already holds the spoken keyword
+        hub = get_audio_hub()
+        if not hub.start():
+            return None
+        ring = hub.streams['full']
+        # The pre-roll ends exactly where the subscription starts reading
+        audio, position = ring.snapshot(preroll)
+        subscription = hub.subscribe("voice-emergency", "full", position=position)
+        chunks = [audio]
+        recorded = 0
+        try:
+            while recorded < duration * ring.sample_rate and hub.running:
+                frames = subscription.read(timeout=1.0)
+                if frames is not None:
+                    chunks.append(frames.copy())
+                    recorded += len(frames)
+        finally:
+            subscription.close()
+            hub.stop()
+        recording = np.concatenate(chunks)
         
         # Save recording
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -132,12 +154,47 @@ def record_emergency_audio(duration=10):
         filepath = os.path.join("Data", "Emergency", filename)
         os.makedirs(os.path.join("Data", "Emergency"), exist_ok=True)
         
-        sf.write(filepath, recording, 44100)
+        sf.write(filepath, recording, ring.sample_rate)
+        register_evidence(filepath, "recording", started=time.time() - len(recording) / ring.sample_rate)
         return filepath
     except Exception as e:
         print(f"Error recording audio: {e}")
         return None
 
+# Record in the background and send the audio as its own delivery
+def send_emergency_recording(duration=10, trace=None):
+    audio_file = record_emergency_audio(duration)
+    if not audio_file:
+        ShowTextToScreen("Warning: Could not record audio!")
+        return
+    if trace:
+        trace.mark("recording", file=audio_file)
+    if send_alert_recording(audio_file, trace=trace):
+        ShowTextToScreen("Emergency audio recording sent.")
+    else:
+        ShowTextToScreen("Failed to send emergency audio recording!")
+
+# End the open incident: stop location updates and bundle its evidence
+def close_voice_incident():
+    with incident_lock:
+        try:
+            close_incident()
+            return close_incident_evidence()
+        except Exception as e:
+            print(f"Error closing incident: {e}")
+            return None
+
+# A repeated alert starts a new incident; the previous one is bundled first
+def open_voice_incident(location):
+    with incident_lock:
+        try:
+            close_incident()
+            close_incident_evidence()
+            open_incident(location)
+            start_incident_recording()
+        except Exception as e:
+            print(f"Error opening incident: {e}")
+
 # Initial execution setup
 def InitialExecution():
     SetMicrophoneStatus("False")
@@ -145,6 +202,11 @@ def InitialExecution():
     ShowDefaultChatIfNoChats()
     ChatLogIntegration()
     ShowChatsOnGUI()
+    get_location_service().start()  # Keep a location fix ready for alerts
+    warm_whatsapp_session()  # Log in to WhatsApp Web before an alert needs it
+    start_outbox_worker()  # Deliver any alerts left pending by a previous run
+    get_evidence_catalog()  # Open (and on first run build) the evidence index before an alert needs it
+    start_transcription()  # Transcribe finished evidence on spare cores
 
 InitialExecution()
 
@@ -157,30 +219,35 @@ def MainExecution(Query=None):
             if not Query:
                 continue  # Continue listening instead of returning
         
+        # Closing phrases are checked first, since "cancel emergency" contains a keyword;
+        # they never raise an alert, whether or not an incident is open
+        if any(phrase in Query.lower() for phrase in SAFE_PHRASES):
+            # Closing waits for the last segment to be encoded, so keep it off the listening loop
+            threading.Thread(target=close_voice_incident, daemon=True).start()
+            ShowTextToScreen("Emergency closed. Any evidence is being packaged.")
+            Query = None
+            continue
+
         # Check for emergency keywords
         emergency_keywords = ["help", "save", "emergency", "danger", "scared", "unsafe"]
         if any(keyword in Query.lower() for keyword in emergency_keywords):
             SetAssistantStatus("Emergency Detected!")
             ShowTextToScreen("🚨 EMERGENCY MODE ACTIVATED - Recording audio...")
             
-            # Get location
+            trace = AlertTrace("voice")
+            
+            # Start recording right away; the audio follows as a separate delivery
+            threading.Thread(target=send_emergency_recording, args=(10, trace), daemon=True).start()
+            
+            # The cached location is available immediately, so the text alert goes out first
             location = get_current_location()
-            if not location:
-                ShowTextToScreen("Warning: Could not get location!")
-                return True
-                
-            # Record audio
-            audio_file = record_emergency_audio(10)  # 10 seconds recording
-            if not audio_file:
-                ShowTextToScreen("Warning: Could not record audio!")
-                return True
-                
-            # Send emergency alert
+            trace.mark("location", age=location.get('age'))
             ShowTextToScreen("Sending emergency alert...")
-            success = send_emergency_alert(location, audio_file)
+            success = send_emergency_alert(location, trace=trace, recording_follows=True)
             
             if success:
-                ShowTextToScreen("Emergency alert sent successfully!")
+                threading.Thread(target=open_voice_incident, args=(location,), daemon=True).start()
+                ShowTextToScreen("Emergency alert sent! Audio recording will follow.")
             else:
                 ShowTextToScreen("Failed to send emergency alert!")
                 